@@ -7,9 +7,9 @@ Commands describe the input the account can do to the game.
 import math
 from evennia import CmdSet, utils
 from evennia.utils import evmenu
-from commands import MuxCommand
+from commands.command import MuxCommand
 from random import randint
-from world import rules
+from world import allies, rules, combat, specials
 
 
 class BattleCmdSet(CmdSet):
@@ -315,6 +315,7 @@ class CmdSpecialMessage(MuxCommand):
                     self.caller.db.Special_Messages[specialname].append(self.rhs)
                 except KeyError:
                     self.caller.db.Special_Messages.update({specialname: [self.rhs]})
+                specials.invalidate(self.caller)
                 self.caller.msg("Added new special message to %s: %s" % (specialname, self.rhs))
                 return
             self.caller.msg("Please specify a message to add!")
@@ -332,6 +333,7 @@ class CmdSpecialMessage(MuxCommand):
                 return
             self.caller.msg("Removed attack message: " + self.caller.db.Special_Messages[specialname][itemindex])
             del self.caller.db.Special_Messages[specialname][itemindex]
+            specials.invalidate(self.caller)
             return
         elif 'list' in switches or not switches or not self.rhs:
             # List the current special messages!
@@ -396,9 +398,10 @@ class CmdAttack(MuxCommand):
             return
         # Since the input was tested as valid, set the target here.
         target = self.caller.search(self.arglist[0])
+        fighter = combat.fighter(self.caller)
         # Attack type is ranged if target is farther than range 0, or melee if target is at range 0
         attack_type = 'ranged'
-        if self.caller.db.Combat_Range[target] == 0:
+        if combat.get(self.caller).range(self.caller, target) == 0:
             attack_type = 'melee'
         # Check the attack type versus the target and give an error message if needed.
         type_check = rules.attack_type_check(self.caller, target, attack_type, [])
@@ -413,8 +416,8 @@ class CmdAttack(MuxCommand):
             attack_message = self.args.split(None, 1)[1]
         # If everything checks out, queue the attack and spend the action.
         rules.queue_attack(self.caller, target, attack_message, [], attack_type)
-        self.caller.db.Combat_LastAction = 'attack'
-        self.caller.db.Combat_Actions -= 1
+        fighter.last_action = 'attack'
+        fighter.actions -= 1
 
 
 class CmdSecond(MuxCommand):
@@ -429,7 +432,8 @@ class CmdSecond(MuxCommand):
 
     def func(self):
         """This performs the actual command."""
-        if not self.caller.db.Combat_Second:
+        fighter = combat.fighter(self.caller)
+        if not fighter or not fighter.second:
             self.caller.msg("|413You can't make a second attack!|n")
             return
 
@@ -442,11 +446,11 @@ class CmdSecond(MuxCommand):
         # Since the input was tested as valid, set the target here.
         target = self.caller.search(self.arglist[0])
         # The attack type is set to the previous attack type.
-        attack_type = self.caller.db.Combat_Second[0]
+        attack_type = fighter.second[0]
         attack_message = ''
         type_check = rules.attack_type_check(self.caller, target, attack_type, [])
         # Also get the effects, if any.
-        effects = self.caller.db.Combat_Second[1]
+        effects = fighter.second[1]
         if type_check:
             self.caller.msg(type_check)
             return
@@ -458,8 +462,8 @@ class CmdSecond(MuxCommand):
             attack_message = self.args.split(None, 1)[1]
         # If everything checks out, queue the attack and delete the second attack value.
         rules.queue_attack(self.caller, target, attack_message, effects, attack_type)
-        self.caller.db.Combat_LastAction = "attack"
-        del self.caller.db.Combat_Second
+        fighter.last_action = "attack"
+        fighter.second = None
 
 
 class CmdDefend(MuxCommand):
@@ -496,7 +500,8 @@ class CmdDefend(MuxCommand):
         """
         This performs the actual command.
         """
-        if not self.caller.db.Combat_IncomingAttack:
+        fighter = combat.fighter(self.caller)
+        if not fighter or not fighter.incoming_attack:
             # No incoming attacks.
             self.caller.msg('There are no incoming attacks!')
             return
@@ -527,7 +532,8 @@ class CmdEndure(MuxCommand):
         """
         This performs the actual command.
         """
-        if not self.caller.db.Combat_IncomingAttack:
+        fighter = combat.fighter(self.caller)
+        if not fighter or not fighter.incoming_attack:
             # No incoming attacks.
             self.caller.msg("There are no incoming attacks!")
             return
@@ -550,7 +556,7 @@ class CmdRest(MuxCommand):
         """
         This performs the actual command.
         """
-        if self.caller.db.Combat_TurnHandler:
+        if combat.get(self.caller):
             # In combat.
             self.caller.msg("You can't rest, you're in a fight!")
             return
@@ -572,7 +578,7 @@ class CmdReturn(MuxCommand):
         """
         This performs the actual command.
         """
-        if self.caller.db.Combat_TurnHandler:
+        if combat.get(self.caller):
             # In combat.
             self.caller.msg("You can't return, you're in a fight!")
             return
@@ -632,14 +638,11 @@ class CmdAlly(MuxCommand):
             switches = []
         else:
             switches = self.switches
-        # Create the ally list if it doesn't exist.
-        if not self.caller.db.Allies:
-            self.caller.db.Allies = []
         # Add an ally
         if "remove" not in switches:
             # If no arguments, list allies.
             if not self.args:
-                if len(self.caller.db.Allies) == 0:
+                if not allies.allies_of(self.caller):
                     # The fighter has no friends and is a cool bad ass.
                     coollist = ["You walk alone", "A lone wolf", "None match your skill", "Trust only yourself",
                                 "It's you against the world", "The sole survivor"]
@@ -648,15 +651,17 @@ class CmdAlly(MuxCommand):
                     return
                 # Otherwise, list allies.
                 self.caller.msg("You consider these fighters your allies:")
-                for ally in self.caller.db.Allies:
-                    self.caller.msg(ally)
+                for ally in allies.listed(self.caller):
+                    if allies.considers(ally, self.caller):
+                        self.caller.msg("%s |252(mutual)|n" % ally)
+                    else:
+                        self.caller.msg(ally)
                 return
             target = self.caller.search(self.args, global_search=True)
             if not target or not rules.is_fighter(target):
                 self.caller.msg("Please specify a valid target.")
                 return
-            if target not in self.caller.db.Allies:
-                self.caller.db.Allies.append(target)
+            if allies.add(self.caller, target):
                 self.caller.msg("You now consider %s an ally." % target)
                 return
             self.caller.msg("You already consider %s an ally." % target)
@@ -665,10 +670,9 @@ class CmdAlly(MuxCommand):
             if not target or not rules.is_fighter(target):
                 self.caller.msg("Please specify a valid target.")
                 return
-            if target not in self.caller.db.Allies:
+            if not allies.remove(self.caller, target):
                 self.caller.msg("You already don't consider %s an ally." % target)
                 return
-            self.caller.db.Allies.remove(target)
             self.caller.msg("You no longer consider %s an ally." % target)
 
 
@@ -769,17 +773,28 @@ class CmdFight(MuxCommand):
             self.caller.msg("%s%s|n is no place for battles!" % (here.STYLE, here.key))
             return
         for thing in here.contents:
-            if thing.traits.health.actual:
+            if rules.is_fighter(thing) and thing.traits.health.actual:
                 fighters.append(thing)
         if len(fighters) <= 1:
             self.caller.msg("There's nobody here to fight!")
             return
-        if here.db.Combat_TurnHandler:
-            here.msg_contents("%s joins the fight!" % self.caller)
-            here.db.Combat_TurnHandler.join_fight(self.caller)
+        session = combat.get(here)
+        if session:
+            session.join(self.caller)
+            # Allies already in the fight are joined, not fought.
+            side = [ally for ally in session.teams.members(self.caller) if ally is not self.caller]
+            if side:
+                here.msg_contents("%s joins the fight on the side of %s!" %
+                                  (self.caller, utils.list_to_string(side, endsep="and", addquote=False)))
+            else:
+                here.msg_contents("%s joins the fight!" % self.caller)
             return
         here.msg_contents("%s starts a fight!" % self.caller)
-        here.scripts.add("scripts.TurnHandler")
+        session = combat.start(here, fighters)
+        sides = session.teams.sides()
+        if len(sides) < len(fighters):
+            here.msg_contents("Sides: %s" % " |555vs.|n ".join(
+                utils.list_to_string(side, endsep="and", addquote=False) for side in sides))
 
 
 class CmdPass(MuxCommand):
@@ -803,11 +818,12 @@ class CmdPass(MuxCommand):
                 replaced = self.args.replace("<self>", str(self.caller))
                 message = ("%s |222[Pass]|n" % replaced)
         self.caller.location.msg_contents(message)
-        self.caller.db.Combat_LastAction = "pass"
-        self.caller.db.Combat_Actions = 0
-        self.caller.db.Combat_Moves = 0
-        if self.caller.db.Combat_Second:
-            del self.caller.db.Combat_Second
+        fighter = combat.fighter(self.caller)
+        fighter.last_action = "pass"
+        fighter.actions = 0
+        fighter.moves = 0
+        fighter.second = None
+        combat.get(self.caller).record('pass', fighter=rules.ref(self.caller))
 
 
 class CmdDisengage(MuxCommand):
@@ -831,11 +847,12 @@ class CmdDisengage(MuxCommand):
                 replaced = self.args.replace("<self>", str(self.caller))
                 message = ("%s |222[Disengage]|n" % replaced)
         self.caller.location.msg_contents(message)
-        self.caller.db.Combat_LastAction = "disengage"
-        self.caller.db.Combat_Actions = 0
-        self.caller.db.Combat_Moves = 0
-        if self.caller.db.Combat_Second:
-            del self.caller.db.Combat_Second
+        fighter = combat.fighter(self.caller)
+        fighter.last_action = "disengage"
+        fighter.actions = 0
+        fighter.moves = 0
+        fighter.second = None
+        combat.get(self.caller).record('disengage', fighter=rules.ref(self.caller))
 
 
 class CmdWithdraw(MuxCommand):
@@ -862,6 +879,8 @@ class CmdWithdraw(MuxCommand):
     half your MOB stat, rounded down - you can give up your action
     in combat to 'dash' and gain extra movement. See 'help dash'
     for details.
+    Move before you act: your turn ends once your action is spent,
+    and any movement left over is lost.
 
     Using this command with no arguments will use up your movement
     until you reach the edge of the room. You can instead move a
@@ -881,7 +900,8 @@ class CmdWithdraw(MuxCommand):
             self.caller.msg(cmd_check)
             return
         # If everything checks out, check to see if an argument is given.
-        distance = self.caller.db.Combat_Moves
+        fighter = combat.fighter(self.caller)
+        distance = fighter.moves
         if len(self.arglist) > 0:
             who = self.arglist[0]
         if len(self.arglist) > 1:
@@ -889,14 +909,14 @@ class CmdWithdraw(MuxCommand):
             try:  # Set distance to integer given or max movement if arg isn't integer
                 distance = max(1, int(distance))
             except (TypeError, ValueError):
-                distance = self.caller.db.Combat_Moves
+                distance = fighter.moves
         target = self.caller.search(who)
         # Let's also make sure they aren't too far away.
-        if self.caller.db.Combat_Range[target] >= self.caller.location.db.RoomSize:
+        if combat.get(self.caller).range(self.caller, target) >= combat.get(self.caller).max_range:
             self.caller.msg("You can't move away any farther!")
             return
         # Let's make sure they don't try to move farther than they can.
-        if distance > self.caller.db.Combat_Moves:
+        if distance > fighter.moves:
             self.caller.msg("You don't have enough movement to move that many steps!")
             return
         # If everything checks out, queue the withdraw and spend the movement.
@@ -927,6 +947,8 @@ class CmdApproach(MuxCommand):
     half your MOB stat, rounded down - you can give up your action
     in combat to 'dash' and gain extra movement. See 'help dash'
     for details.
+    Move before you act: your turn ends once your action is spent,
+    and any movement left over is lost.
 
     Using this command with no arguments uses up your movement
     until you reach your target. You can instead specify a number
@@ -947,7 +969,8 @@ class CmdApproach(MuxCommand):
             self.caller.msg(cmd_check)
             return
         # If everything checks out, check to see if an argument is given.
-        distance = self.caller.db.Combat_Moves
+        fighter = combat.fighter(self.caller)
+        distance = fighter.moves
         if len(self.arglist) > 0:
             who = self.arglist[0]
         if len(self.arglist) > 1:
@@ -955,10 +978,10 @@ class CmdApproach(MuxCommand):
             try:
                 distance = max(1, int(distance))
             except (TypeError, ValueError):
-                distance = self.caller.db.Combat_Moves
+                distance = fighter.moves
         target = self.caller.search(who)
         # Let's make sure they don't try to move farther than they can.
-        if distance > self.caller.db.Combat_Moves:
+        if distance > fighter.moves:
             self.caller.msg("You don't have enough movement to move that many steps!")
             return
         # Calls the multi-step function, which also takes care of spending the movement.
@@ -998,17 +1021,19 @@ class CmdDash(MuxCommand):
         if cmd_check:
             self.caller.msg(cmd_check)
             return
+        fighter = combat.fighter(self.caller)
         # Check for immobilization.
-        if 'Immobilization' in self.caller.db.Combat_Conditions:
+        if 'Immobilization' in fighter.conditions:
             self.caller.msg("You're immobilized! You can't move!")
             return
         if not self.args:
             message = ("%s dashes for extra movement!" % self.caller)
         else:
             message = ("%s %s" % (self.caller, self.args))
-        self.caller.db.Combat_Actions -= 1
-        self.caller.db.Combat_LastAction = "dash"
-        self.caller.db.Combat_Moves += int(math.ceil(float(self.caller.db.MOB) / 2))
+        fighter.actions -= 1
+        fighter.last_action = "dash"
+        fighter.moves += int(math.ceil(float(self.caller.db.MOB) / 2))
+        combat.get(self.caller).record('dash', fighter=rules.ref(self.caller), moves=fighter.moves)
         self.caller.location.msg_contents(
             "%s |552[|554+%i|552 Movement]|n" % (message, int(math.ceil(float(self.caller.db.MOB) / 2))))
 
@@ -1028,24 +1053,22 @@ class CmdCharge(MuxCommand):
         if cmd_check:
             self.caller.msg(cmd_check)
             return
-        if not self.caller.db.Combat_Charged:
-            self.caller.db.Combat_Charged = []
+        fighter = combat.fighter(self.caller)
         if len(self.arglist) == 0:
             self.caller.msg("|413You need to specify a special move name!")
             return
         matchedspecial = ""
         message = ("%s prepares a special move!" % self.caller)
         if len(self.arglist) > 0:
-            for special in self.caller.db.Special_Moves:
-                if self.arglist[0].lower() in special.lower():
-                    matchedspecial = special
-            if matchedspecial == "":
+            move = specials.find(self.caller, self.arglist[0])
+            if not move:
                 self.caller.msg("|413You don't have that special move!")
                 return
-            if "Charge Move" not in self.caller.db.Special_Moves[matchedspecial][1]:
+            matchedspecial = move.name
+            if "Charge Move" not in move.effects:
                 self.caller.msg("|413You don't need to charge that move!")
                 return
-            if matchedspecial in self.caller.db.Combat_Charged:
+            if matchedspecial in fighter.charged:
                 self.caller.msg("|413That move is already charged!")
                 return
         if len(self.arglist) > 1:
@@ -1055,9 +1078,10 @@ class CmdCharge(MuxCommand):
                 message = "<self> " + message
             message = message.replace("<self>", str(self.caller))
         # If everything checks out, add the special to the charged list.
-        self.caller.db.Combat_Charged.append(matchedspecial)
-        self.caller.db.Combat_Actions -= 1
-        self.caller.db.Combat_LastAction = "charge"
+        fighter.charged.append(matchedspecial)
+        fighter.actions -= 1
+        fighter.last_action = "charge"
+        combat.get(self.caller).record('charge', fighter=rules.ref(self.caller), move=matchedspecial)
         self.caller.location.msg_contents("%s |255[Charge: |455%s|255]|n" % (message, matchedspecial))
 
 
@@ -1108,33 +1132,27 @@ class CmdRange(MuxCommand):
 
     def func(self):
         """This performs the actual command."""
-        if not self.caller.db.Combat_TurnHandler:
+        session = combat.get(self.caller)
+        if not session:
             self.caller.msg("You can only use this command in combat!")
             return
         target = self.caller.search(self.args, quiet=True)
-        if target:
+        if target and target[0] in session.slots:
             target = target[0]
-            targetrange = self.caller.db.Combat_Range[target]
+            targetrange = session.range(self.caller, target)
             self.caller.msg("|525%s: |545%i|525 steps away (%s)" % (target, targetrange, rules.range_name(targetrange)))
             return
         else:
-            rangelist = self.caller.db.Combat_Range
-            accountedfor = []
-            for key in rangelist:
-                targetrange = self.caller.db.Combat_Range[key]
-                if key != self.caller and key not in accountedfor:
-                    engage_group = rules.get_engage_group(key)
-                    if self.caller in engage_group:
-                        engage_group.remove(self.caller)
-                    if len(engage_group) == 1:
-                        self.caller.msg(
-                            "|525%s: |545%i|525 steps away (%s)" % (key, targetrange, rules.range_name(targetrange)))
-                        accountedfor.append(key)
-                    if len(engage_group) > 1:
-                        engage_list = utils.list_to_string(engage_group, endsep="and", addquote=False)
-                        self.caller.msg("|525%s: |545%i|525 steps away (%s)" %
-                                        (engage_list, targetrange, rules.range_name(targetrange)))
-                        accountedfor.extend(engage_group)
+            # Fighters engaged with each other share a space and are listed together.
+            for engage_group in session.engage_groups():
+                if self.caller in engage_group:
+                    engage_group.remove(self.caller)
+                if not engage_group:
+                    continue
+                targetrange = session.range(self.caller, engage_group[0])
+                engage_list = utils.list_to_string(engage_group, endsep="and", addquote=False)
+                self.caller.msg("|525%s: |545%i|525 steps away (%s)" %
+                                (engage_list, targetrange, rules.range_name(targetrange)))
             return
 
 
@@ -1199,115 +1217,76 @@ class CmdSpecial(MuxCommand):
 
     def func(self):
         # If no arguments, list the special moves.
+        table = specials.get(self.caller)
         if not self.args:
-            for special in self.caller.db.Special_Moves:
-                self.caller.msg(rules.pretty_special(self.caller, special) + "\n\n")
+            for name in sorted(table):
+                self.caller.msg(table[name].pretty() + "\n\n")
             return
+        fighter = combat.fighter(self.caller)
         # If already used a special this turn (after gaining a bonus action), return.
-        if self.caller.db.Combat_UsedSpecial:
+        if fighter and fighter.used_special:
             self.caller.msg("You already used a special move this turn!")
             return
         # First, let's try to match the first argument to a special move name.
-        # matched = False
-        for special_name in self.caller.db.Special_Moves:
-            if self.arglist[0].lower() in special_name.lower():
-                matched = special_name
-                if rules.special_cost(self.caller.db.Special_Moves[special_name][1]) > self.caller.db.SP:
-                    self.caller.msg("|413You don't have enough SP to use %s!" % matched)
-                    return
-                special_message = "default"
-                # If there's a 'Desperation Move' or 'Vital Move' effect, check the user's HP first.
-                if "Desperation Move" in self.caller.db.Special_Moves[special_name][1]:
-                    if self.caller.traits.health.actual > self.caller.traits.stat_vit.actual:
-                        self.caller.msg("|413You have too much HP to use %s!" % special_name)
-                        return
-                if "Vital Move" in self.caller.db.Special_Moves[special_name][1]:
-                    if self.caller.traits.health.actual < self.caller.traits.stat_vit.actual * 2:
-                        self.caller.msg("|413You don't have enough HP to use %s!" % special_name)
-                        return
-                # If there's a 'Charge Move' effect, check to see if it's charged.
-                if "Charge Move" in self.caller.db.Special_Moves[special_name][1]:
-                    if not self.caller.db.Combat_Charged or special_name not in self.caller.db.Combat_Charged:
-                        self.caller.msg(
-                            "|413You need to spend an action to charge this move first! Use the 'charge' command!|n")
-                        return
-                    # Remove the special from the charged list.
-                    if special_name in self.caller.db.Combat_Charged:
-                        self.caller.db.Combat_Charged.remove(special_name)
-                # If there's an 'Opening Gambit' effect, check to see if the last action was null.
-                if "Opening Gambit" in self.caller.db.Special_Moves[special_name][1]\
-                        and self.caller.db.Combat_LastAction != "null":
-                    self.caller.msg("|413You can only use %s on your first turn in combat!|n" % special_name)
-                    return
-                # If the special type is a Special Melee Attack:
-                if self.caller.db.Special_Moves[special_name][0] == "Special Melee Attack":
-                    if len(self.arglist) < 2:
-                        self.caller.msg("|413You need to specify a target!")
-                        return
-                    if len(self.arglist) > 2:
-                        special_message = self.args.split(None, 2)[2]
-                    # If everything checks out, move to the special_attack function as melee!
-                    self.special_attack(self.caller, matched, self.caller.db.Special_Moves[special_name][1],
-                                        self.arglist[1], special_message, "melee")
-                # If the special type is a Special Ranged Attack:
-                if self.caller.db.Special_Moves[special_name][0] == "Special Ranged Attack":
-                    if len(self.arglist) < 2:
-                        self.caller.msg("|413You need to specify a target!")
-                        return
-                    if len(self.arglist) > 2:
-                        special_message = self.args.split(None, 2)[2]
-                    # If everything checks out, move to the special_attack function as ranged!
-                    self.special_attack(self.caller, matched, self.caller.db.Special_Moves[special_name][1],
-                                        self.arglist[1], special_message, "ranged")
-                # If the special type is Support Self:
-                if self.caller.db.Special_Moves[special_name][0] == "Support Self":
-                    if len(self.arglist) > 1:
-                        special_message = self.args.split(None, 1)[1]
-                    # If everything checks out move to the support_self function!
-                    self.support_self(self.caller, matched, self.caller.db.Special_Moves[special_name][1],
-                                      special_message)
-                # If the special type is Support Other:
-                if self.caller.db.Special_Moves[special_name][0] == "Support Other":
-                    if len(self.arglist) < 2:
-                        self.caller.msg("|413You need to specify a target!")
-                        return
-                    if len(self.arglist) > 2:
-                        special_message = self.args.split(None, 2)[2]
-                    # If everything checks out, move to the support other function!
-                    self.support_other(self.caller, matched, self.caller.db.Special_Moves[special_name][1],
-                                       self.arglist[1], special_message)
-                # If the special type is Hinder Other:
-                if self.caller.db.Special_Moves[special_name][0] == "Hinder Other":
-                    if len(self.arglist) < 2:
-                        self.caller.msg("|413You need to specify a target!")
-                        return
-                    if len(self.arglist) > 2:
-                        special_message = self.args.split(None, 2)[2]
-                    # If everything checks out, move to the hinder other function!
-                    self.hinder_other(self.caller, matched, self.caller.db.Special_Moves[special_name][1],
-                                      self.arglist[1], special_message)
-                # If the special type is Special Defense:
-                if self.caller.db.Special_Moves[special_name][0] == "Special Defense":
-                    if len(self.arglist) > 1:
-                        special_message = self.args.split(None, 1)[1]
-                    # If everything checks out move to the special_defense function!
-                    self.special_defense(self.caller, matched, self.caller.db.Special_Moves[special_name][1],
-                                         special_message)
+        move = specials.find(self.caller, self.arglist[0])
+        if not move:
+            self.caller.msg("|413You don't have that special move!")
+            return
+        if move.cost > self.caller.db.SP:
+            self.caller.msg("|413You don't have enough SP to use %s!" % move.name)
+            return
+        special_message = "default"
+        # If there's a 'Desperation Move' or 'Vital Move' effect, check the user's HP first.
+        if "Desperation Move" in move.effects:
+            if self.caller.traits.health.actual > self.caller.traits.stat_vit.actual:
+                self.caller.msg("|413You have too much HP to use %s!" % move.name)
                 return
-        self.caller.msg("|413You don't have that special move!")
-
-    def special_attack(self, user, name, effects, target, special_message, attack_type):
-        # Check for pre-set special messages if none was given via the command:
-        if special_message == "default":
-            try:
-                special_message = "<self> uses a special attack on <target>!"
-                if len(user.db.Special_Messages[name]) > 0:
-                    special_message = user.db.Special_Messages[name][
-                        randint(0, len(user.db.Special_Messages[name]) - 1)]
-            except (KeyError, TypeError):
-                special_message = "<self> uses a special attack on <target>!"
-        if "<self>" not in special_message:
-            special_message = "<self> " + special_message
+        if "Vital Move" in move.effects:
+            if self.caller.traits.health.actual < self.caller.traits.stat_vit.actual * 2:
+                self.caller.msg("|413You don't have enough HP to use %s!" % move.name)
+                return
+        # If there's a 'Charge Move' effect, check to see if it's charged.
+        if "Charge Move" in move.effects:
+            if not fighter or move.name not in fighter.charged:
+                self.caller.msg(
+                    "|413You need to spend an action to charge this move first! Use the 'charge' command!|n")
+                return
+            # Remove the special from the charged list.
+            fighter.charged.remove(move.name)
+        # If there's an 'Opening Gambit' effect, check to see if the last action was null.
+        if "Opening Gambit" in move.effects and (not fighter or fighter.last_action != "null"):
+            self.caller.msg("|413You can only use %s on your first turn in combat!|n" % move.name)
+            return
+        # Moves used on someone else take a target before the message.
+        if move.needs_target:
+            if len(self.arglist) < 2:
+                self.caller.msg("|413You need to specify a target!")
+                return
+            if len(self.arglist) > 2:
+                special_message = self.args.split(None, 2)[2]
+        elif len(self.arglist) > 1:
+            special_message = self.args.split(None, 1)[1]
+        if move.attack_type:
+            self.special_attack(self.caller, move, self.arglist[1], special_message)
+        elif move.type == "Support Self":
+            self.support_self(self.caller, move, special_message)
+        elif move.type == "Support Other":
+            self.support_other(self.caller, move, self.arglist[1], special_message)
+        elif move.type == "Hinder Other":
+            self.hinder_other(self.caller, move, self.arglist[1], special_message)
+        elif move.type == "Special Defense":
+            self.special_defense(self.caller, move, special_message)
+
+    @staticmethod
+    def spend_sp(user, move):
+        """Pay the SP cost of move and log its use."""
+        user.db.SP -= move.cost
+        combat.get(user).record('special', fighter=rules.ref(user), move=move.name, type=move.type,
+                                effects=list(move.effects), cost=move.cost, sp=user.db.SP)
+
+    def special_attack(self, user, move, target, special_message):
+        # Use one of the move's messages if none was given via the command.
+        special_message = move.message(special_message)
         # If the special move type is "Special Attack", run this code!
 
         cmd_check = rules.cmd_check(user, target, "special attack",
@@ -1318,45 +1297,40 @@ class CmdSpecial(MuxCommand):
             return
 
         # Check the attack type versus the target and give an error message if needed.
-        type_check = rules.attack_type_check(self.caller, target, attack_type, effects)
+        type_check = rules.attack_type_check(self.caller, target, move.attack_type, move.effects)
         if type_check:
             self.caller.msg(type_check)
             return
 
         # If everything checks out, spend the SP, queue the special attack and spend the action.
-        user.db.SP -= rules.special_cost(effects)
+        self.spend_sp(user, move)
         target = user.search(target, quiet=True)[0]
         message = "|255[Special: |455%s|255 (|455%i|255 SP)]|n %s" %\
-                  (name, rules.special_cost(effects), special_message)
+                  (move.name, move.cost, special_message)
         # If there's a lunge attack effect, move the user forward two spaces.
-        if 'Lunge Attack' in effects:
+        if 'Lunge Attack' in move.effects:
             rules.ms_approach(user, target, 2, "free")
 
-        # Queue the attack here.
-        rules.queue_attack(user, target, message, effects, attack_type)
+        # Queue the attack here, or resolve it against everyone around the target at once.
+        if 'Area Attack' in move.effects:
+            rules.resolve_area_attack(user, target, message, move.effects, move.attack_type)
+        else:
+            rules.queue_attack(user, target, message, move.effects, move.attack_type)
 
         # If there's a parting attack effect, move the user back two spaces.
-        if 'Parting Attack' in effects:
+        if 'Parting Attack' in move.effects:
             rules.ms_withdraw(user, target, 2, "free")
 
         # Handle drawback conditions here.
-        rules.special_drawback(user, user, effects)
+        rules.special_drawback(user, user, move.effects)
 
-        user.db.Combat_LastAction = "special"
-        user.db.Combat_Actions -= 1
+        fighter = combat.fighter(user)
+        fighter.last_action = "special"
+        fighter.actions -= 1
 
-    def support_self(self, user, name, effects, special_message):
-        # Check for pre-set special messages if none was given via the command:
-        if special_message == "default":
-            try:
-                special_message = "<self> uses a special move!"
-                if len(user.db.Special_Messages[name]) > 0:
-                    special_message = user.db.Special_Messages[name][
-                        randint(0, len(user.db.Special_Messages[name]) - 1)]
-            except (KeyError, TypeError):
-                special_message = "<self> uses a special move!"
-        if "<self>" not in special_message:
-            special_message = "<self> " + special_message
+    def support_self(self, user, move, special_message):
+        # Use one of the move's messages if none was given via the command.
+        special_message = move.message(special_message)
         # If the special move type is "Support Self", run this code!
         cmd_check = rules.cmd_check(user, "", "use a special move",
                                     ['InCombat', 'IsTurn', 'HasHP', 'HasAction', 'AttacksResolved'])
@@ -1364,36 +1338,28 @@ class CmdSpecial(MuxCommand):
             self.caller.msg(cmd_check)
             return
         # If everything checks out, spend the SP, queue the special move and spend the action.
-        user.db.SP -= rules.special_cost(effects)
+        self.spend_sp(user, move)
         special_message = special_message.replace("<self>", str(user))
         message = "|255[Special: |455%s|255 (|455%i|255 SP)]|n %s" %\
-                  (name, rules.special_cost(effects), special_message)
-        if effects:
-            effect_string = utils.list_to_string(effects, endsep="|255and|455", addquote=False)
+                  (move.name, move.cost, special_message)
+        if move.effects:
+            effect_string = utils.list_to_string(move.effects, endsep="|255and|455", addquote=False)
             message += " |255[|455%s|255]|n" % effect_string
         self.caller.location.msg_contents(message)
-        rules.special_support(user, user, effects)
-        self.caller.db.Combat_LastAction = "special"
-        self.caller.db.Combat_Actions -= 1
+        rules.special_support(user, user, move.effects)
+        fighter = combat.fighter(self.caller)
+        fighter.last_action = "special"
+        fighter.actions -= 1
         # Handle drawback conditions here.
-        rules.special_drawback(user, user, effects)
+        rules.special_drawback(user, user, move.effects)
         # If there's a bonus action, give the user's action back.
-        if 'Bonus Action' in effects:
-            self.caller.db.Combat_Actions += 1
-            self.caller.db.Combat_UsedSpecial = True
+        if 'Bonus Action' in move.effects:
+            fighter.actions += 1
+            fighter.used_special = True
 
-    def support_other(self, user, name, effects, target, special_message):
-        # Check for pre-set special messages if none was given via the command:
-        if special_message == "default":
-            try:
-                special_message = "<self> uses a special move on <target>!"
-                if len(user.db.Special_Messages[name]) > 0:
-                    special_message = user.db.Special_Messages[name][
-                        randint(0, len(user.db.Special_Messages[name]) - 1)]
-            except (KeyError, TypeError):
-                special_message = "<self> uses a special move on <target>!"
-        if "<self>" not in special_message:
-            special_message = "<self> " + special_message
+    def support_other(self, user, move, target, special_message):
+        # Use one of the move's messages if none was given via the command.
+        special_message = move.message(special_message)
         # If the special move type is "Support Other", run this code!
 
         cmd_check = rules.cmd_check(user, target, "special support",
@@ -1405,43 +1371,35 @@ class CmdSpecial(MuxCommand):
         # Set the target, since it was checked above.
         target = user.search(target, quiet=True)[0]
         # If there's 'Touch Effect', it can only be used on engaged targets.
-        if "Touch Effect" in effects:
-            if user.db.Combat_Range[target] != 0:
+        if move.reach is not None:
+            if combat.get(user).range(user, target) > move.reach:
                 user.msg("|413You can only use this special move on engaged targets (at range 0)!|n")
                 return
         # If everything checks out, spend the SP, queue the special move and spend the action.
-        user.db.SP -= rules.special_cost(effects)
+        self.spend_sp(user, move)
 
         special_message = special_message.replace("<self>", str(user))
         special_message = special_message.replace("<target>", str(target))
         message = "|255[Special: |455%s|255 (|455%i|255 SP)]|n %s" %\
-                  (name, rules.special_cost(effects), special_message)
-        if effects:
-            effect_string = utils.list_to_string(effects, endsep="|255and|455", addquote=False)
+                  (move.name, move.cost, special_message)
+        if move.effects:
+            effect_string = utils.list_to_string(move.effects, endsep="|255and|455", addquote=False)
             message += " |255[|455%s|255]|n" % effect_string
         self.caller.location.msg_contents(message)
-        rules.special_support(target, self.caller, effects)
-        self.caller.db.Combat_LastAction = "special"
-        self.caller.db.Combat_Actions -= 1
+        rules.special_support(target, self.caller, move.effects)
+        fighter = combat.fighter(self.caller)
+        fighter.last_action = "special"
+        fighter.actions -= 1
         # Handle drawback conditions here.
-        rules.special_drawback(user, user, effects)
+        rules.special_drawback(user, user, move.effects)
         # If there's a bonus action, give the user's action back.
-        if 'Bonus Action' in effects:
-            self.caller.db.Combat_Actions += 1
-            self.caller.db.Combat_UsedSpecial = True
+        if 'Bonus Action' in move.effects:
+            fighter.actions += 1
+            fighter.used_special = True
 
-    def hinder_other(self, user, name, effects, target, special_message):
-        # Check for pre-set special messages if none was given via the command:
-        if special_message == "default":
-            try:
-                special_message = "<self> uses a special move on <target>!"
-                if len(user.db.Special_Messages[name]) > 0:
-                    special_message = user.db.Special_Messages[name][
-                        randint(0, len(user.db.Special_Messages[name]) - 1)]
-            except (KeyError, TypeError):
-                special_message = "<self> uses a special move on <target>!"
-        if "<self>" not in special_message:
-            special_message = "<self> " + special_message
+    def hinder_other(self, user, move, target, special_message):
+        # Use one of the move's messages if none was given via the command.
+        special_message = move.message(special_message)
         # If the special move type is "Hinder Other", run this code!
 
         cmd_check = rules.cmd_check(user, target, "special support",
@@ -1453,80 +1411,74 @@ class CmdSpecial(MuxCommand):
         # Set the target, since it was checked above.
         target = user.search(target, quiet=True)[0]
         # If there's 'Touch Effect', it can only be used on engaged targets.
-        if "Touch Effect" in effects:
-            if user.db.Combat_Range[target] != 0:
+        if move.reach is not None:
+            if combat.get(user).range(user, target) > move.reach:
                 user.msg("|413You can only use this special move on engaged targets (at range 0)!|n")
                 return
         # If everything checks out, spend the SP, queue the special move and spend the action.
-        user.db.SP -= rules.special_cost(effects)
+        self.spend_sp(user, move)
         special_message = special_message.replace("<self>", str(user))
         special_message = special_message.replace("<target>", str(target))
         message = "|255[Special: |455%s|255 (|455%i|255 SP)]|n %s" %\
-                  (name, rules.special_cost(effects), special_message)
-        if effects:
-            effectstring = utils.list_to_string(effects, endsep="|255and|455", addquote=False)
+                  (move.name, move.cost, special_message)
+        if move.effects:
+            effectstring = utils.list_to_string(move.effects, endsep="|255and|455", addquote=False)
             message += " |255[|455%s|255]|n" % effectstring
         self.caller.location.msg_contents(message)
-        rules.special_hinder(target, self.caller, effects)
-        self.caller.db.Combat_LastAction = "special"
-        self.caller.db.Combat_Actions -= 1
+        rules.special_hinder(target, self.caller, move.effects)
+        fighter = combat.fighter(self.caller)
+        fighter.last_action = "special"
+        fighter.actions -= 1
         # Handle drawback conditions here.
-        rules.special_drawback(user, user, effects)
+        rules.special_drawback(user, user, move.effects)
         # If there's a bonus action, give the user's action back.
-        if 'Bonus Action' in effects:
-            self.caller.db.Combat_Actions += 1
-            self.caller.db.Combat_UsedSpecial = True
+        if 'Bonus Action' in move.effects:
+            fighter.actions += 1
+            fighter.used_special = True
 
-    def special_defense(self, user, name, effects, special_message):
-        if not user.db.Combat_IncomingAttack:
+    def special_defense(self, user, move, special_message):
+        fighter = combat.fighter(user)
+        if not fighter or not fighter.incoming_attack:
             # No incoming attacks.
             user.msg("|413There are no incoming attacks!")
             return
-        attack_type = user.db.Combat_IncomingAttack[3]
-        if special_message == "default":
-            try:
-                special_message = "<self> uses a special move!"
-                if len(user.db.Special_Messages[name]) > 0:
-                    special_message = user.db.Special_Messages[name][
-                        randint(0, len(user.db.Special_Messages[name]) - 1)]
-            except (KeyError, TypeError):
-                special_message = "<self> uses a special move!"
-        if "<self>" not in special_message:
-            special_message = "<self> " + special_message
+        attack_type = fighter.incoming_attack[3]
+        # Use one of the move's messages if none was given via the command.
+        special_message = move.message(special_message)
 
             # If the special move type is "Special Defense", run this code!
         # Test for melee-only and ranged-only defense
-        if attack_type == "melee" and "Ranged-Only Defense" in effects:
+        if attack_type == "melee" and "Ranged-Only Defense" in move.effects:
             user.msg("|413You can only use this defense against ranged attacks!")
             return
-        if attack_type == "ranged" and "Melee-Only Defense" in effects:
+        if attack_type == "ranged" and "Melee-Only Defense" in move.effects:
             user.msg("|413You can only use this defense against melee attacks!")
             return
 
         # If there's a counterattack, make sure the defender can actually attack the offender in return
-        if "Counterattack" in effects:
+        if "Counterattack" in move.effects:
             # Attack type is ranged if target is farther than range 0, or melee if target is at range 0
             counterattack_type = "ranged"
-            if user.db.Combat_Range[user.db.Combat_IncomingAttack[1]] == 0:
+            if combat.get(user).range(user, fighter.incoming_attack[1]) == 0:
                 counterattack_type = "melee"
             # Check the attack type versus the target and give an error message if needed.
-            type_check = rules.attack_type_check(user, user.db.Combat_IncomingAttack[1], counterattack_type, [])
+            type_check = rules.attack_type_check(user, fighter.incoming_attack[1], counterattack_type, [])
             if type_check:
                 user.msg(type_check)
                 return
 
         # If everything checks out, spend the SP and execute the special defense.
-        user.db.SP -= rules.special_cost(effects)
+        self.spend_sp(user, move)
         special_message = special_message.replace("<self>", str(user))
         message = "|255[Special: |455%s|255 (|455%i|255 SP)]|n %s" %\
-                  (name, rules.special_cost(effects), special_message)
-        effect_string = utils.list_to_string(effects, endsep="|255and|455", addquote=False)
+                  (move.name, move.cost, special_message)
+        effect_string = utils.list_to_string(move.effects, endsep="|255and|455", addquote=False)
         message += " |255[|455%s|255]|n" % effect_string
         self.caller.location.msg_contents(message)
-        rules.defend_queue(user, "defend", effects)
+        rules.defend_queue(user, "defend", move.effects)
         # Handle drawback conditions here. Target is given as the character whose turn it is in combat.
-        rules.special_drawback(user.db.Combat_TurnHandler.db.fighters[user.db.Combat_TurnHandler.db.turn], user,
-                               effects)
+        rules.special_drawback(combat.get(user).current, user,
+                               move.effects)
 
 
 class CmdRemoveSpecial(MuxCommand):
@@ -1552,6 +1504,7 @@ class CmdRemoveSpecial(MuxCommand):
             if self.args.lower() in special.lower():
                 self.caller.msg("Special move %s deleted." % special)
                 del self.caller.db.Special_Moves[special]
+                specials.invalidate(self.caller)
                 return
         self.caller.msg("You don't have a special move named %s." % self.args)
 
@@ -1581,30 +1534,25 @@ class CmdEnterGame(MuxCommand):
                      (stats_total - 36))
             return
         # Verify each special move and check for if too many special moves are set.
-        special_count = 0
-        for special in char.db.Special_Moves:
-            special_count += 1
-            # Check the special move for stat requirements, etc. - if it returns a message, print it and return.
-            if rules.verify_special_move(self.caller, special):
-                char.msg(rules.verify_special_move(self.caller, special))
-                return
-            if special_count > 5:
-                char.msg("You have more than 5 special moves. You can only have 5! Remove some before continuing.")
+        table = specials.get(char)
+        for name in sorted(table):
+            # Check the special move for stat requirements, etc. - if it has an error, print it and return.
+            if table[name].error:
+                char.msg(table[name].error)
                 return
+        if len(table) > 5:
+            char.msg("You have more than 5 special moves. You can only have 5! Remove some before continuing.")
+            return
         # From here, the checks won't stop the account from entering the game, but will warn them first.
         if not self.args or self.args != "anyway":
             anyway = False
-            special_count = 0
             # Stats are lower than the cap.
             if stats_total < 36:
                 char.msg("Your stats total is less than 36! You can add %i more points of stats - try sticking them in "
                          "Vitality to get more HP if you don't know what else to do with them." % (36 - stats_total))
                 anyway = True
             # Less than the capped number of special moves are defined.
-            for special in char.db.Special_Moves:
-                print(special)
-                special_count += 1
-            if special_count < 5:
+            if len(table) < 5:
                 char.msg("You have less than five special moves set - you can set up to five. Even if you have 0 SP,"
                          " you can still use special moves with no SP cost by setting limits or drawbacks on them -"
                          " there's really no reason not to at least have the option!")
@@ -9,6 +9,8 @@ from evennia.comms.models import ChannelDB, Msg
 from evennia.comms.channelhandler import CHANNELHANDLER
 from evennia.utils import create, utils, evtable
 from evennia.utils.utils import make_iter
+from typeclasses.channels import format_line
+from world import chanhistory
 
 _DEFAULT_WIDTH = settings.CLIENT_DEFAULT_WIDTH
 
@@ -46,6 +48,7 @@ class CmdChannels(MuxAccountCommand):
     Options:
     /list to display all available channels.
     /join (on) or /part (off) to join or depart channels.
+    /history <channel> [= <lines>] to show what was said last.
 
     Batch options:
     /all      to affect all channels at once:
@@ -194,6 +197,28 @@ class CmdChannels(MuxAccountCommand):
             else:
                 string += "<None>"
             self.msg(string.strip())
+        elif 'history' in self.switches:
+            if not self.args:
+                self.msg("Usage: %s/history <channel> [= <lines>]" % self.cmdstring)
+                return
+            channel = find_channel(caller, self.lhs)
+            if not channel:
+                return
+            if not channel.access(caller, 'listen'):
+                self.msg("%s: You are not able to receive this channel." % channel.key)
+                return
+            count = settings.CHANNEL_JOIN_BACKSCROLL
+            if self.rhs:
+                if not self.rhs.strip().isdigit():
+                    self.msg("Usage: %s/history <channel> [= <lines>]" % self.cmdstring)
+                    return
+                count = int(self.rhs)
+            lines = chanhistory.recent(channel, count)  # From memory; nothing is read from storage.
+            if not lines:
+                self.msg("Nothing said on %s lately." % channel.key)
+                return
+            self.msg('\n'.join(["|wLast %i lines on %s:|n" % (len(lines), channel.key)] +
+                                [format_line(when, message) for when, message in lines]))
         elif 'lock' in self.switches:
             if not self.args:
                 self.msg("Usage: %s/lock <alias or channel>" % self.cmdstring)
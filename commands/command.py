@@ -10,6 +10,7 @@ from evennia.utils import inherits_from
 from evennia import default_cmds
 from evennia import Command as BaseCommand
 from evennia.commands.default.muxcommand import MuxCommand, MuxAccountCommand
+from world import presence
 
 
 class Command(BaseCommand):
@@ -166,6 +167,8 @@ class MuxCommand(default_cmds.MuxCommand):
         if account:
             account.db._command_time_total = (0 if account.db._command_time_total is None
                                               else account.db._command_time_total) + command_time
+        if char:
+            presence.touch(char)
         if char and hasattr(char, 'traits'):
             if char.traits.ct is None:
                 char.traits.add('ct', 'Core Time', 'counter')
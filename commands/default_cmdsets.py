@@ -75,6 +75,8 @@ from commands.about import CmdAbout
 from commands.mydie import CmdRoll
 from commands.staff import CmdWall
 from commands.staff import CmdAudit
+from commands.staff import CmdMass
+from commands.staff import CmdOccupancy
 from commands.sense import CmdSense
 from commands.change import CmdChange
 from commands.portal import CmdPortal
@@ -216,6 +218,8 @@ class AccountCmdSet(default_cmds.AccountCmdSet):
         self.add(CmdTime)
         self.add(CmdAbout)
         self.add(CmdAudit)
+        self.add(CmdMass)
+        self.add(CmdOccupancy)
         self.add(CmdSense)
         self.add(CmdAccess)
         self.add(CmdChange)
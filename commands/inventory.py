@@ -1,6 +1,8 @@
 # -*- coding: utf-8 -*-
 from commands.command import MuxCommand
+from django.conf import settings
 from evennia.utils import evtable
+from world import inventory
 from world.helpers import mass_unit
 
 
@@ -8,9 +10,16 @@ class CmdInventory(MuxCommand):
     """
     Shows your inventory: carrying, wielding, wearing, obscuring.
     Usage:
-      inventory
+      inventory [name||mass||count||new] [<page>]
     Switches:
     /weight   shows inventory item weight and carry total
+
+    Identical items are shown once with a count. Things carried are
+    listed by name, or by mass, count or newest first if you give that;
+    the order is kept for the next pages.
+    Examples:
+      inventory 2
+      inventory/weight mass
     """
     key = 'inventory'
     aliases = ['inv', 'i']
@@ -23,29 +32,40 @@ class CmdInventory(MuxCommand):
         and optionally, their weight.
         """
         you = self.character
-        items = you.contents
-        if not items:
+        if not you.contents:
             self.msg('You are not carrying anything.')
             return
-        items_not_worn = []
+        number, sort = 1, you.ndb.inventory_sort or settings.INVENTORY_SORT
+        for word in self.args.lower().split():
+            if word.isdigit():
+                number = int(word)
+            elif word in inventory.SORT_KEYS:
+                sort = you.ndb.inventory_sort = word
+            elif word != 'page':
+                self.msg('Sort by one of: %s.' % ', '.join(sorted(inventory.SORT_KEYS)))
+                return
+        view = inventory.get(you)
+        stacks, number, pages = view.page(number, sort)
         wear_table = evtable.EvTable(border="header")
-        for item in items:
-            if item.db.worn:
-                wear_table.add_row("|C%s|n" % item.name, item.db.desc or "")
-            else:
-                items_not_worn.append(item)
+        for item in view.worn:
+            wear_table.add_row("|C%s|n" % item.name, item.db.desc or "")
         mass = you.traits.mass.actual if you.traits.mass else 0
         table = evtable.EvTable(border='header')
-        for item in items_not_worn:
-            i_mass = mass_unit(item.get_mass()) if hasattr(item, 'get_mass') else 0
-            second = '(|y%s|n) ' % i_mass if 'weight' in self.switches else ''
+        for stack in stacks:
+            item = stack.first
+            second = '(|y%s|n) ' % mass_unit(stack.mass) if 'weight' in self.switches else ''
             second += item.db.desc_brief or item.db.desc or ''
-            table.add_row('%s' % item.get_display_name(you, mxp=('sense %s' % item.key)),
-                          second or '')
+            name = item.get_display_name(you, mxp=('sense %s' % item.key))
+            if stack.count > 1:
+                name += ' |wx%i|n' % stack.count
+            table.add_row(name, second or '')
         my_mass, my_total_mass = [mass, you.get_mass() if hasattr(you, 'get_mass') else 0]
         string = "|wYou (%s) and your possessions (%s) total |y%s|n:\n%s" %\
                  (mass_unit(mass), mass_unit(my_total_mass - my_mass),
                   mass_unit(my_total_mass), table)
+        if pages > 1:
+            string += "|/Page %i of %i, by %s. |winventory %i|n for the next." %\
+                      (number, pages, sort, number % pages + 1)
         if not wear_table.nrows == 0:
             string += "|/|wYou are wearing:\n%s" % wear_table
         self.msg(string)
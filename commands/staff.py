@@ -7,7 +7,10 @@ so typically requires knowledge of building commands to be effective.
 from commands.command import MuxCommand
 from django.conf import settings
 from evennia import utils
+from evennia.utils import evtable  # Used for CmdOccupancy
 from evennia.server.sessionhandler import SESSIONS  # Used for CmdWall
+from world import occupancy  # Used for CmdOccupancy
+from world.helpers import mass_unit  # Used for CmdMass
 
 # error return function, needed for search
 _AT_SEARCH_RESULT = utils.variable_from_module(*settings.SEARCH_AT_RESULT.rsplit('.', 1))
@@ -63,6 +66,88 @@ class CmdAudit(MuxCommand):
             self.msg('No audit information for {}.'.format(obj_name))
 
 
+class CmdMass(MuxCommand):
+    """
+    Check cached mass against mass added up from scratch
+    Usage:
+      @mass[/fix] [tangible]
+
+    Checks the tangible (default: the room you are in) and everything in
+    it, however deeply nested, and lists each whose cached mass has
+    drifted from its real mass.
+    /fix  Also drop the cached masses so they are added up again.
+    """
+    key = '@mass'
+    locks = 'cmd:perm(audit) or perm(helpstaff)'
+    help_category = 'Helpstaff'
+    account_caller = True
+
+    def func(self):
+        """Implements checking mass for drift."""
+        char = self.character
+        loc = char.location
+        args = self.args
+        obj_list = char.search(args, quiet=True, candidates=[loc] + loc.contents + char.contents) if args else [loc]
+        if not obj_list:
+            _AT_SEARCH_RESULT(obj_list, char, args, quiet=False)
+            return
+        obj = obj_list[0]
+        obj_name = obj.get_display_name(char)
+        if not hasattr(obj, 'mass_drift'):
+            self.msg('{} has no mass to check.'.format(obj_name))
+            return
+        drift = obj.mass_drift()
+        for each, cached, computed in drift:
+            self.msg('{}: cached {}, actually {}.'.format(each.get_display_name(char),
+                                                         mass_unit(cached), mass_unit(computed)))
+        if 'fix' in self.switches:
+            obj.reset_mass()
+            self.msg('Cached mass reset for {} and its contents.'.format(obj_name))
+        if drift:
+            self.msg('Mass drifted in {} of the tangibles in {}.'.format(len(drift), obj_name))
+        else:
+            self.msg('No mass drift in {} ({}).'.format(obj_name, mass_unit(obj.get_mass())))
+
+
+class CmdOccupancy(MuxCommand):
+    """
+    Show how busy areas have been
+    Usage:
+      @occupancy [area] [= hours]
+
+    Without an area, lists every area with its average visit time and
+    most characters at once. With an area, shows its load hour by hour:
+    visits ended that hour and peak occupancy. Default: last 24 hours.
+    """
+    key = '@occupancy'
+    aliases = ['@load']
+    locks = 'cmd:perm(audit) or perm(helpstaff)'
+    help_category = 'Helpstaff'
+    account_caller = True
+
+    def func(self):
+        """Implements showing occupancy of areas."""
+        area = self.lhs.strip()
+        hours = max(1, int(self.rhs)) if self.rhs and self.rhs.strip().isdigit() else 24
+        table = evtable.EvTable(border='none', pad_width=0, border_width=0, maxwidth=79)
+        if not area:
+            table.add_header('|wArea', '|wAvg Time', '|wPeak')
+            for name in occupancy.areas():
+                average = occupancy.average_dwell(area=name, hours=hours)
+                table.add_row(name, utils.time_format(average, 1) if average is not None else '-',
+                              occupancy.peak(area=name, hours=hours))
+            self.msg('[begin] Occupancy of areas, last {} hours:'.format(hours))
+        else:
+            rows = occupancy.heatmap(area, hours)
+            most = max(visits for hour, visits, peak in rows) or 1
+            table.add_header('|wHour', '|wVisits', '|wPeak', '')
+            for hour, visits, peak in rows:
+                table.add_row('{:02d}:00'.format(hour % 24), visits, peak, '|y' + '#' * (visits * 40 // most) + '|n')
+            self.msg('[begin] Occupancy of {}, last {} hours (UTC):'.format(area, hours))
+        self.msg(table)
+        self.msg('[end] Occupancy')
+
+
 class CmdWall(MuxCommand):
     """
     make an announcement to all
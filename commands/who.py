@@ -4,6 +4,14 @@ from commands.command import MuxAccountCommand
 from django.conf import settings
 from evennia.server.sessionhandler import SESSIONS
 from evennia.utils import ansi, utils, create, search, evtable
+from world import occupancy, presence
+
+# Sort keys of roster entries: name, longest online first, least idle first.
+SORT_KEYS = {
+    'alpha': lambda entry: entry.sort_key,
+    'on': lambda entry: entry.since,
+    'idle': lambda entry: -entry.idle,
+}
 
 
 class CmdWho(MuxAccountCommand):
@@ -31,27 +39,24 @@ class CmdWho(MuxAccountCommand):
     locks = 'cmd:all()'
 
     def func(self):
-        """Get all connected accounts by polling session."""
+        """Get all online characters from the presence roster."""
         you = self.account
         opt = self.switches
         args = self.args
-        session_list = SESSIONS.get_sessions()
+        entries = presence.online()
         notice = ''
         if args:
-            char = self.caller.get_puppet(self.session)
             if 'exact' in opt:
-                session_list = [sess for sess in session_list if sess.get_puppet()
-                                and sess.get_puppet().get_display_name(char, plain=True) == args]
+                entries = [entry for entry in entries if entry.key == args]
                 notice = '  Showing exact matches for "{}"'.format(args)
             else:
                 args = args.lower()
-                session_list = [sess for sess in session_list if sess.get_puppet()
-                                and sess.get_puppet().get_display_name(char, plain=True).lower().startswith(args)]
+                entries = [entry for entry in entries if entry.sort_key.startswith(args)]
                 notice = '  Showing matches that begin with "{}"'.format(args)
-        sessions_using_puppets = [sess for sess in session_list if sess.get_puppet()]
         cmd = self.cmdstring
         show_session_data = you.check_permstring('immortal') and not you.attributes.has('_quell')
         table = evtable.EvTable(border='none', pad_width=0, border_width=0, maxwidth=79)
+        now = time.time()
         if cmd == 'wa' or cmd == 'where':
             # Example output expected:
             # Occ, Location,  Avg Time, Top 3 Active, Directions
@@ -67,17 +72,15 @@ class CmdWho(MuxAccountCommand):
             table.reformat_column(2, width=6, align='l')
             table.reformat_column(3, width=16, pad_right=1, align='l')
             table.reformat_column(4, width=20, align='l')
-            locations = {}  # Create an empty dictionary to gather locations information.
-            sessions_using_puppets = self.option_sort(sessions_using_puppets, 'alpha')
-            for session in sessions_using_puppets:  # Go through connected list and see who's where.
-                character = session.get_puppet()
-                if character.location not in locations:
-                    locations[character.location] = []
-                locations[character.location].append(character)  # Build the list of who's in a location
-            for place in locations:
+            locations = {}  # Gather who's where, from the entries shown.
+            for entry in self.option_sort(entries, 'alpha'):
+                locations.setdefault(entry.location, []).append(entry)
+            for place in sorted(locations, key=lambda each: -len(locations[each])):
                 location = place.get_display_name(you) if place else (settings.NOTHINGNESS + '|n')
-                table.add_row(len(locations[place]), location, '?',
-                              ', '.join(each.get_display_name(you) for each in locations[place]),
+                average = occupancy.average_dwell(room=place) if place else None
+                table.add_row(len(locations[place]), location,
+                              utils.time_format(average, 1) if average is not None else '-',
+                              ', '.join(each.character.get_display_name(you) for each in locations[place]),
                               '')  # TODO - Directions to location
         elif cmd == 'ws':
             my_character = self.caller.get_puppet(self.session)
@@ -88,29 +91,18 @@ class CmdWho(MuxAccountCommand):
             table.reformat_column(0, width=45, align='l')
             table.reformat_column(1, width=8, align='l')
             table.reformat_column(2, width=7, pad_right=1, align='r')
-            for element in my_character.location.contents:
-                if not element.has_account:
-                    continue
-                delta_cmd = time.time() - max([each.cmd_last_visible for each in element.sessions.all()])
-                delta_con = time.time() - min([each.conn_time for each in element.sessions.all()])
-                name = element.get_display_name(you)
-                type = element.db.messages and element.db.messages.get('species') or ''
-                gend = element.db.messages and element.db.messages.get('gender') or ''
-                fill = ' ' if gend else ''
-                table.add_row(name + ', ' + gend.lower() + fill + type if type else name,
-                              utils.time_format(delta_con, 0), utils.time_format(delta_cmd, 1))
+            for entry in self.option_sort(presence.at(my_character.location), 'alpha'):
+                name = entry.character.get_display_name(you)
+                fill = ' ' if entry.gender else ''
+                table.add_row(name + ', ' + entry.gender.lower() + fill + entry.species if entry.species else name,
+                              utils.time_format(now - entry.since, 0), utils.time_format(now - entry.idle, 1))
         elif cmd == 'what' or cmd == 'wot':
-            session_list = self.option_sort(sessions_using_puppets, 'idle', True)
             table.add_header('|wCharacter  - Doing', '|wIdle')
             table.reformat_column(0, width=72, align='l')
             table.reformat_column(1, width=7, align='r')
-            for session in session_list:
-                character = session.get_puppet()
-                if not session.logged_in or not character:
-                    continue
-                delta_cmd = time.time() - session.cmd_last_visible
-                doing = character.get_display_name(you, pose=True)
-                table.add_row(doing, utils.time_format(delta_cmd, 1))
+            for entry in self.option_sort(entries, 'idle'):
+                doing = entry.character.get_display_name(you) + ('|n' + entry.doing if entry.doing else '')
+                table.add_row(doing, utils.time_format(now - entry.idle, 1))
         else:  # Default to displaying who
             if show_session_data:  # privileged info shown to Immortals and higher only when not quelled
                 table.add_header('|wCharacter', '|wAccount', '|wQuell', '|wCmds', '|wProtocol', '|wAddress')
@@ -120,6 +112,10 @@ class CmdWho(MuxAccountCommand):
                 table.reformat_column(3, width=6, pad_right=1, align='r')
                 table.reformat_column(4, width=11, align='l')
                 table.reformat_column(5, width=16, align='r')
+                session_list = SESSIONS.get_sessions()
+                if args:  # Sessions of the characters matched, then.
+                    matched = set(entry.character for entry in entries)
+                    session_list = [session for session in session_list if session.get_puppet() in matched]
                 for session in session_list:
                     account = session.get_account()
                     puppet = session.get_puppet()
@@ -129,21 +125,13 @@ class CmdWho(MuxAccountCommand):
                                   '|gYes|n' if account.attributes.get('_quell') else '|rNo|n',
                                   session.cmd_total, session.protocol_key, address)
             else:  # unprivileged info shown to everyone, including Immortals and higher when quelled
-                session_list = self.option_sort(sessions_using_puppets, 'alpha')
                 table.add_header('|wCharacter', '|wOn for', '|wIdle')
                 table.reformat_column(0, width=40, align='l')
                 table.reformat_column(1, width=8, align='l')
                 table.reformat_column(2, width=7, align='r')
-                for session in session_list:
-                    if not session.logged_in:
-                        continue
-                    character = session.get_puppet()
-                    if not character:
-                        continue
-                    delta_cmd = time.time() - session.cmd_last_visible
-                    delta_conn = time.time() - session.conn_time
-                    table.add_row(character.get_display_name(you), utils.time_format(delta_conn, 0),
-                                  utils.time_format(delta_cmd, 1))
+                for entry in self.option_sort(entries, 'alpha'):
+                    table.add_row(entry.character.get_display_name(you), utils.time_format(now - entry.since, 0),
+                                  utils.time_format(now - entry.idle, 1))
         account_count = (SESSIONS.account_count())
         is_one = account_count == 1
         string = '%s' % 'A' if is_one else str(account_count)
@@ -153,13 +141,19 @@ class CmdWho(MuxAccountCommand):
         self.msg(unicode(table))
         self.msg(string + notice)
 
-    def option_sort(self, to_sort, sort_type='alpha', reverse=False):
-        opt = self.switches
-        if not (sort_type == 'alpha' and 'alpha' in opt):
-            to_sort = sorted(to_sort, reverse=not ('reverse' in opt and reverse),
-                             key=lambda sess: sess.get_puppet().key.lower())
-        elif not (sort_type == 'on' and 'on' in opt):
-            pass
-        elif not (sort_type == 'idle' and 'idle' in opt):
-            pass
-        return to_sort
+    def option_sort(self, entries, sort_type='alpha'):
+        """
+        Sort roster entries by the option given, else by sort_type.
+
+        Args:
+            entries (list): Presence entries to sort.
+            sort_type (str): One of SORT_KEYS, used if no option picks one.
+
+        Returns:
+            entries (list): Sorted, reversed with /reverse.
+        """
+        for option in ('alpha', 'on', 'idle'):
+            if option in self.switches:
+                sort_type = option
+                break
+        return sorted(entries, key=SORT_KEYS[sort_type], reverse='reverse' in self.switches)
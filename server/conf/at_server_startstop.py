@@ -15,6 +15,10 @@ at_server_cold_start()
 at_server_cold_stop()
 
 """
+from django.conf import settings
+from evennia import TICKER_HANDLER, create_script, search_script
+from typeclasses import traits
+from world import chanhistory, cmdsetcache, combat, combatlog, gamestats, occupancy, portals, presence, turns
 
 
 def at_server_start():
@@ -22,7 +26,27 @@ def at_server_start():
     This is called every time the server starts up, regardless of
     how it was shut down.
     """
-    pass
+    cmdsetcache.install()  # Skip re-merging cmdsets while the cmdset stack is unchanged.
+    occupancy.load()  # Hourly visit counts of the last week.
+    presence.rebuild()  # Sessions outlive a reload; list who is puppeted again.
+    TICKER_HANDLER.add(interval=settings.OCCUPANCY_FLUSH_INTERVAL, callback=occupancy.flush_all,
+                       idstring='occupancy', persistent=False)
+    TICKER_HANDLER.add(interval=settings.TRAIT_FLUSH_INTERVAL, callback=traits.flush_all,
+                       idstring='trait_flush', persistent=False)
+    if not search_script('effect_scheduler'):
+        create_script('typeclasses.scripts.EffectScheduler')  # Processes timed effects.
+    combat.restore_all()  # Resume fights that were running before a reload.
+    TICKER_HANDLER.add(interval=settings.COMBAT_SNAPSHOT_INTERVAL, callback=combat.snapshot_all,
+                       idstring='combat_snapshot', persistent=False)
+    TICKER_HANDLER.add(interval=settings.COMBAT_LOG_FLUSH_INTERVAL, callback=combatlog.flush_all,
+                       idstring='combat_log', persistent=False)
+    turns.install()  # Run the turns of all fights.
+    portals.load()  # Resume portals lent out before a reload; take back strays.
+    TICKER_HANDLER.add(interval=settings.CHANNEL_LOG_FLUSH_INTERVAL, callback=chanhistory.flush_all,
+                       idstring='channel_log', persistent=False)
+    gamestats.refresh()  # Counts for the front page and MSSP.
+    TICKER_HANDLER.add(interval=settings.GAME_STATS_INTERVAL, callback=gamestats.refresh,
+                       idstring='game_stats', persistent=False)
 
 
 def at_server_stop():
@@ -30,7 +54,11 @@ def at_server_stop():
     This is called just before the server is shut down, regardless
     of it is for a reload, reset or shutdown.
     """
-    pass
+    traits.flush_all()  # Save buffered trait changes.
+    combat.snapshot_all()  # Save running fights.
+    combatlog.flush_all()  # Write out waiting combat log events.
+    occupancy.flush_all()  # Write out changed visit counts.
+    chanhistory.flush_all()  # Write out waiting channel lines.
 
 
 def at_server_reload_start():
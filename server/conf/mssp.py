@@ -9,10 +9,13 @@ automatically be reported. You don't have to fill in everything
 (and most are not used by all crawlers); leave the default
 if so needed. You need to @reload the game before updated
 information is made available to crawlers (reloading does not
-affect uptime).
+affect uptime). World counts (areas, rooms, objects...) are
+live, read from the counts world/gamestats.py keeps up to date.
 
 """
 
+from world import gamestats  # Counts refreshed by the Server, read from a file here in the Portal
+
 MSSPTable = {
 
     # Required fields
@@ -50,11 +53,11 @@ MSSPTable = {
 
     # World
 
-    "AREAS":              "0",
-    "HELPFILES":          "0",
-    "MOBILES":            "0",
-    "OBJECTS":            "0",
-    "ROOMS":              "0",      # use 0 if room-less
+    "AREAS":              gamestats.mssp('areas'),
+    "HELPFILES":          gamestats.mssp('helpfiles'),
+    "MOBILES":            gamestats.mssp('mobiles'),
+    "OBJECTS":            gamestats.mssp('objects'),
+    "ROOMS":              gamestats.mssp('rooms'),      # use 0 if room-less
     "CLASSES":            "0",      # use 0 if class-less
     "LEVELS":             "0",      # use 0 if level-less
     "RACES":              "0",      # use 0 if race-less
@@ -89,7 +92,7 @@ MSSPTable = {
     # World
 
     "DBSIZE":             "0",
-    "EXITS":              "0",
+    "EXITS":              gamestats.mssp('exits'),
     "EXTRA DESCRIPTIONS": "0",
     "MUDPROGS":           "0",
     "MUDTRIGS":           "0",
@@ -22,6 +22,7 @@ settings file:
 """
 
 from evennia.server.serversession import ServerSession as BaseServerSession
+from world import cmdsetcache
 
 
 class ServerSession(BaseServerSession):
@@ -33,4 +34,10 @@ class ServerSession(BaseServerSession):
     to the game server. All communication between game and account goes
     through their session(s).
     """
-    pass
+    def at_disconnect(self, reason=None):
+        """Drop the cached cmdset merges of this session, and of its account."""
+        account = self.get_account()
+        super(ServerSession, self).at_disconnect(reason=reason)
+        cmdsetcache.forget(self)
+        if account:
+            cmdsetcache.forget(account)  # Other sessions of the account merge again on their next command.
@@ -23,6 +23,7 @@ needs to be given explicitly (evennia.foo).
 
 # Use the defaults from Evennia unless explicitly overridden
 from evennia.settings_default import *
+import os
 
 ######################################################################
 # Evennia base server config
@@ -44,6 +45,8 @@ DELAY_CMD_LOGINSTART = 0.6
 
 MULTISESSION_MODE = 1
 
+SERVER_SESSION_CLASS = 'server.conf.serversession.ServerSession'  # Drops cached cmdsets on disconnect
+
 IRC_ENABLED = True  # @irc2chan Public = irc.furnet.org 7000 #NOW NOW
 
 SSH_ENABLED = True  # Activate SSH protocol communication (SecureShell)
@@ -92,6 +95,43 @@ HOME_ROOM_DESC = 'You may |gdesc/room ...|n to change it, and ' \
                  '|groom|n to get back here and can invite folks ' \
                  'over with |gsummon|n.|/Have other questions? ' \
                  'Use |ghelp|n with only the 1st word of each of those.'
+# Trait settings
+######################################################################
+TRAIT_BUFFERED = True  # Keep trait changes in memory, saved by the flush ticker
+TRAIT_FLUSH_INTERVAL = 30  # Seconds between trait flushes; the most lost in a crash
+# Combat settings
+######################################################################
+COMBAT_SNAPSHOT_INTERVAL = 10  # Seconds between saves of running fights
+COMBAT_TICK_INTERVAL = 1  # Seconds between turn scheduler ticks
+COMBAT_TURN_TIMEOUT = 90  # Seconds to finish a turn before passing automatically
+COMBAT_DEFEND_TIMEOUT = 30  # Seconds to answer an attack before defending automatically
+COMBAT_LOG_DIR = os.path.join(LOG_DIR, 'combat')  # One event log file per fight
+COMBAT_LOG_BATCH = 50  # Events kept in memory before they are appended to the log
+COMBAT_LOG_FLUSH_INTERVAL = 5  # Seconds between writes of waiting log events
+# Occupancy settings
+######################################################################
+OCCUPANCY_LOG = os.path.join(LOG_DIR, 'occupancy.jsonl')  # Hourly room and area visit counts
+OCCUPANCY_HOURS = 168  # Hours of counts kept in memory and in the log
+OCCUPANCY_FLUSH_INTERVAL = 300  # Seconds between writes of changed counts
+# Game stats settings
+######################################################################
+GAME_STATS_INTERVAL = 60  # Seconds between counts of rooms, objects, accounts... for web and MSSP
+GAME_STATS_FILE = os.path.join(LOG_DIR, 'gamestats.json')  # Counts as read by the Portal
+# Inventory settings
+######################################################################
+INVENTORY_PAGE_SIZE = 20  # Rows of carried things shown per inventory page
+INVENTORY_SORT = 'name'  # Default order of carried things: name, mass, count or new
+# Channel settings
+######################################################################
+CHANNEL_HISTORY_SIZE = 200  # Recent lines of each channel kept in memory for history
+CHANNEL_JOIN_BACKSCROLL = 10  # Lines shown on joining a channel, and by channel/history
+CHANNEL_LOG_DIR = os.path.join(LOG_DIR, 'channels')  # One log file per channel
+CHANNEL_LOG_BATCH = 20  # Lines kept in memory before they are appended to the log
+CHANNEL_LOG_FLUSH_INTERVAL = 30  # Seconds between writes of waiting lines
+# Portal settings
+######################################################################
+PORTAL_OPEN_DELAY = 10  # Seconds from opening a portal to its appearing
+PORTAL_LIFETIME = 180  # Seconds from opening a portal to its return to the pool
 # Other settings
 ######################################################################
 WELCOME_URL = 'http://lazylion.ddns.net:8000/static/website/images/nowlogo.png'
@@ -12,7 +12,10 @@ to be modified.
 
 """
 
+import time
+from django.conf import settings
 from evennia import DefaultChannel
+from world import chanhistory
 
 
 class Channel(DefaultChannel):
@@ -58,4 +61,26 @@ class Channel(DefaultChannel):
         post_send_message(msg) - called just after message was sent to channel
 
     """
-    pass
+    def distribute_message(self, msgobj, online=False):
+        """
+        Send msgobj to the channel's listeners, and add it to the
+        channel's history. Lines to keep are written out by the history
+        in batches, instead of to storage one by one.
+        """
+        keep_log = getattr(msgobj, 'keep_log', False)
+        msgobj.keep_log = False
+        super(Channel, self).distribute_message(msgobj, online=online)
+        chanhistory.record(self, msgobj.message, keep=bool(keep_log))
+
+    def post_join_channel(self, joiner):
+        """Show a new listener what was said last."""
+        super(Channel, self).post_join_channel(joiner)
+        lines = chanhistory.recent(self, settings.CHANNEL_JOIN_BACKSCROLL)
+        if lines:
+            joiner.msg('\n'.join(['|wRecently on %s:|n' % self.key] +
+                                  [format_line(when, message) for when, message in lines]))
+
+
+def format_line(when, message):
+    """A line of channel history, with the time it was sent."""
+    return '|x%s|n %s' % (time.strftime('%m-%d %H:%M', time.localtime(when)), message)
@@ -10,7 +10,8 @@ from typeclasses.tangibles import Tangible
 from evennia.utils.utils import lazy_property
 from traits import TraitHandler
 from world.helpers import make_bar, mass_unit
-from evennia.contrib.clothing import get_worn_clothes
+from world import allies, cmdsetcache, combat, presence
+from world.clothing import get_worn_clothes
 from evennia.utils import list_to_string
 # from evennia.utils.utils import delay  # Delay a follower's arrival after the leader
 from evennia.comms.models import ChannelDB, Msg  # To find and
@@ -124,8 +125,8 @@ class Character(DefaultCharacter, Tangible):
             self.msg("You can't move; you're incapacitated!")  # Type 'home' to TODO:
             # go back home and recover, or wait for a healer to come to you.")
             return False
-        if self.db.Combat_TurnHandler:  # Prevent move while in combat.
-            self.caller.msg("You can't leave while engaged in combat!")
+        if combat.get(self):  # Prevent move while in combat.
+            self.msg("You can't leave while engaged in combat!")
             return False
         if self.attributes.has('riders') and self.db.riders and self.location:  # Test list of riders.
             self.ndb.riders = []
@@ -145,6 +146,8 @@ class Character(DefaultCharacter, Tangible):
 
     def at_after_move(self, source_location):
         """Store last location and room then trigger the arrival look after a move. Reset doing to default."""
+        cmdsetcache.invalidate(self)  # New surroundings, new cmdset stack.
+        presence.moved(self)
         if self.db.messages and self.db.messages.get('location'):
             loc_name = self.location.get_display_name(self, plain=True)
             self.msg(self.db.messages.get('location') + loc_name)
@@ -292,6 +295,7 @@ class Character(DefaultCharacter, Tangible):
         """
         sessions = self.sessions.get()
         session = sessions[-1] if sessions else None
+        presence.arrive(self)
         if len(sessions) == 1:  # Skip re-stamping if the object is already puppeted.
             # After an account connects to a character, set the character's timestamp on:
             # Add object to "puppeted" attribute dictionary on self, keyed by self.account.
@@ -334,7 +338,12 @@ class Character(DefaultCharacter, Tangible):
                 just disconnected.
         """
         if self.has_account:  # if there's still a session controlling ...
+            presence.arrive(self)  # ... note which sessions are left ...
             return  # ... then there's nothing more to do.
+        presence.depart(self)
+        cmdsetcache.forget(self)
+        allies.forget(self)
+        self.traits.flush()  # Save buffered trait changes.
         if self.location:
             # reason = ['Idle Timeout', 'QUIT', 'BOOTED', 'Lost Connection']  # TODO
             at_home = self.location == self.home
@@ -486,6 +495,7 @@ class Character(DefaultCharacter, Tangible):
 class NPC(Character):
     """Uses Character class as a starting point."""
     STYLE = '|m'
+    COMPACT_TRAITS = True  # NPCs are numerous; keep their traits small.
 
     def at_object_creation(self):
         """Initialize a newly-created NPC"""
@@ -500,6 +510,7 @@ class NPC(Character):
         Called just after puppeting has been completed and all
         account<->Object links have been established.
         """
+        presence.arrive(self)
         self.msg("\nYou assume the role of %s.\n" % self.get_display_name(self))
         self.msg(self.at_look(self.location))
         if self.ndb.new_mail:
@@ -537,6 +548,11 @@ class NPC(Character):
             session (Session): Session controlling the connection that
                 just disconnected.
         """
+        if self.has_account:
+            presence.arrive(self)
+        else:
+            presence.depart(self)
+            allies.forget(self)
         if self.location:
             if self.has_account:  # Show as pose if NPC still being puppeted.
                 for each in self.location.contents:
@@ -557,4 +573,5 @@ class NPC(Character):
                     if not each.access(self, 'view'):
                         continue
                     each.msg("|r%s|n sleeps." % self.get_display_name(each, color=False), from_obj=self)
+                self.traits.flush()  # Save buffered trait changes.
             self.db.prelogout_location = self.location
@@ -4,14 +4,18 @@ By: whitenoise, 6/5/2016
 """
 
 from collections import OrderedDict
-from datetime import datetime
-from evennia import create_script
 from operator import itemgetter
+from time import time as now
+from typeclasses.scripts import schedule_effect
 import uuid
 
 # TODO: Make Effects for Characters and Rooms. Room Effects would change
 # light, water level, etc.
 
+# How an active Effect modifies reads of its affected trait:
+# 'add' its power, multiply by it ('mul') or replace the value ('set').
+EFFECT_OPS = ('add', 'mul', 'set')
+
 
 class EffectException(Exception):
     """
@@ -26,13 +30,30 @@ class EffectException(Exception):
 
 class EffectHandler(object):
     """ EffectHandler will not only handle the addition and removal of Effects
-    from an object, but it will also handle the processing of those Effects."""
+    from an object, but it will also handle the processing of those Effects.
+
+    Effects are stored as plain dicts of their fields. Queued effects
+    with a duration are processed when due by the `EffectScheduler`
+    script.
+
+    An effect is active from the time it fires until `interval` seconds
+    later, when it either fires again or expires. Active effects are kept
+    apart, with their expiry, and `modifiers()` and `effective()` fold
+    only those into per-trait modifiers, cached until `version` changes
+    or the first of them expires. Expired ones are dropped by `expire()`,
+    which the scheduler calls when they are due, so reads never write."""
     def __init__(self, obj, immediately_process=False, db_attribute='effects'):
         self.obj = obj
         self.immediately_process = immediately_process
         if not obj.attributes.has(db_attribute):
             obj.attributes.add(db_attribute, OrderedDict())
         self.effects = obj.attributes.get(db_attribute)
+        active_attribute = db_attribute + '_active'
+        if not obj.attributes.has(active_attribute):
+            obj.attributes.add(active_attribute, {})
+        self.active = obj.attributes.get(active_attribute)  # eid: (effect fields, expiry time)
+        self.version = 0  # Bumped whenever the active effects change.
+        self._aggregates = None  # (version, first expiry, {trait: (add, mul, set)})
 
     def __len__(self):
         return len(self.effects)
@@ -46,34 +67,42 @@ class EffectHandler(object):
     def get(self, eid):
         if eid not in self.effects:
             return None
-        return self.effects[eid]
+        return Effect(**self.effects[eid])
 
     def add(self, effect):
         key = effect.eid
         if key in self.effects:
             raise EffectException("Effect '{}' already exists.".format(key))
 
-        # TODO: check if Effect has valid fields?
+        if effect.op not in EFFECT_OPS:
+            raise EffectException("Invalid effect op '{}'.".format(effect.op))
 
-        self.effects[key] = effect
+        self.effects[key] = dict(effect._asdict())
+        self.version += 1
 
         if self.immediately_process:
             self.process(key)
+        elif effect.duration:
+            schedule_effect(self.obj, key, effect.due)
 
     def remove(self, eid):
-        if eid not in self.effects:
+        if eid not in self.effects and eid not in self.active:
             raise EffectException("Effect not found: {}".format(eid))
-        del self.effects[eid]
+        self.effects.pop(eid, None)
+        self.active.pop(eid, None)
+        self.version += 1
 
     def clear(self):
         for effect in self.all:
-            self.remove(effect)
+            self.remove(effect.eid)
+        self.active.clear()
+        self.version += 1
 
     @property
     def all(self):
         all_effects = []
         for effect in self.effects.itervalues():
-            all_effects.append(effect)
+            all_effects.append(Effect(**effect))
         return all_effects
 
     def process(self, eid=None, target=None, effecthandler_attr='effects',
@@ -83,35 +112,127 @@ class EffectHandler(object):
         """
         # grab effect passed in or off the top
         if eid:
-            effect = self.effects.pop(eid)
+            effect = Effect(**self.effects.pop(eid))
         else:
             if len(self.effects):
-                effect = self.popitem()[1]
+                effect = Effect(**self.effects.pop(next(iter(self.effects))))
             else:
                 return False
-
         if target is None:
             target = self.obj
+        self.expire()
+        if target is self.obj:  # Active until it fires again or expires.
+            expires = now() + effect.interval
+            self.active[effect.eid] = (dict(effect._asdict()), expires)
+            schedule_effect(self.obj, effect.eid, expires)
+        self.version += 1
         # fire!
         effect(target, effecthandler_attr, traithandler_attr)
         return True
 
+    def expire(self, when=None):
+        """
+        Drop the active effects that have expired by `when` (now if None).
+
+        Returns:
+            (int): how many were dropped
+        """
+        when = now() if when is None else when
+        expired = [eid for eid, (_, expires) in self.active.items() if expires <= when]
+        for eid in expired:
+            del self.active[eid]
+        if expired:
+            self.version += 1
+        return len(expired)
+
+    def modifiers(self, trait):
+        """
+        Combined modifiers of the active effects on a trait: those that
+        have fired and not yet expired. Queued effects do not count.
+
+        All traits are folded in one pass whenever `version` has
+        changed or an active effect has expired, skipping the expired
+        ones; until then this is a dict lookup. Nothing is written.
+
+        Args:
+            trait (str): key of the affected trait
+
+        Returns:
+            (tuple): total of 'add' powers, product of 'mul' powers and
+            the power of the latest 'set' effect, or None.
+        """
+        current = now()
+        if (self._aggregates is None or self._aggregates[0] != self.version or
+                self._aggregates[1] <= current):
+            folded, first_expiry = {}, float('inf')
+            # In the order they fired, so the latest 'set' wins.
+            fired = sorted(self.active.items(), key=lambda item: item[1][1] - item[1][0]['interval'])
+            for eid, (fields, expires) in fired:
+                if expires <= current:
+                    continue  # Dropped by expire() when the scheduler gets to it.
+                first_expiry = min(first_expiry, expires)
+                effect = Effect(**fields)
+                add, mul, override = folded.get(effect.affectedTrait, (0, 1, None))
+                if effect.op == 'mul':
+                    mul *= effect.power
+                elif effect.op == 'set':
+                    override = effect.power
+                else:
+                    add += effect.power
+                folded[effect.affectedTrait] = (add, mul, override)
+            self._aggregates = (self.version, first_expiry, folded)
+        return self._aggregates[2].get(trait, (0, 1, None))
+
+    def effective(self, trait, value=None):
+        """
+        Value of a trait after the active effects on it.
+
+        Args:
+            trait (str): key of the affected trait
+            value (int, float, optional): value to modify; defaults to
+                the `actual` value of the object's trait
+
+        Returns:
+            (int, float): the 'set' override if any, else (value + add) * mul
+        """
+        add, mul, override = self.modifiers(trait)
+        if override is not None:
+            return override
+        if value is None:
+            value = self.obj.traits.get(trait)
+            value = value.actual if value else 0
+        return (value + add) * mul
+
 
 class Effect(tuple):
+    """
+    An immutable Effect, fired `duration` times: first `delay` seconds
+    after `time`, then every `interval` seconds.
+    """
     __slots__ = ()
     _fields = ('name', 'power', 'affectedTrait', 'duration',
-               'delay', 'interval', 'script', 'time', 'eid')
+               'delay', 'interval', 'script', 'time', 'eid', 'op')
 
     def __new__(cls, name, power, affectedTrait,
                 duration=1, delay=0, interval=3, script=None,
-                time=str(datetime.now()), eid=uuid.uuid1().hex):
+                time=None, eid=None, op='add'):
+        if time is None:
+            time = now()
+        if eid is None:
+            eid = uuid.uuid1().hex
         return tuple.__new__(cls, (name, power, affectedTrait, duration, delay,
-                             interval, script, time, eid))
+                             interval, script, time, eid, op))
 
     def tick(self):
+        """The same Effect with one firing less, due `interval` from now."""
         return Effect(self.name, self.power, self.affectedTrait,
-                      self.duration, self.delay-1, self.interval,
-                      self.script, str(datetime.now()))
+                      self.duration-1, self.interval, self.interval,
+                      self.script, eid=self.eid, op=self.op)
+
+    @property
+    def due(self):
+        """Timestamp of the next time this Effect fires."""
+        return self.time + self.delay
 
     def __call__(self, target, effecthandler_attr, traithandler_attr):
         traithandler = getattr(target, traithandler_attr)
@@ -119,30 +240,17 @@ class Effect(tuple):
         if trait:
             # try to affect the trait by the power
             trait += self.power
-            if self.duration:
-                if self.script:
-                    # create script
-                    create_script(self.script,
-                                  name="effect_%s_%s" % (self.name,
-                                                         self.eid),
-                                  interval=self.interval,
-                                  start_delay=self.delay,
-                                  repeats=self.duration,
-                                  persistent=True,
-                                  obj=target)
-                    return
-                else:
-                    if (self.duration-1) > 1:
-                        new_effect = self.tick()
-                        effecthandler = getattr(target, effecthandler_attr)
-                        effecthandler.add(new_effect)
+            if self.duration > 1:
+                # queue the next firing with the scheduler
+                effecthandler = getattr(target, effecthandler_attr)
+                effecthandler.add(self.tick())
         else:
             raise EffectException("No such Trait\
                                    '{}'".format(self.affectedTrait))
 
     def _asnamedtuple(self):
         return 'Effect(name=%r, power=%r, affectedTrait=%r, duration=%r,\
-                delay=%r, interval=%r, script=%r, time=%r, eid=%r)' % self
+                delay=%r, interval=%r, script=%r, time=%r, eid=%r, op=%r)' % self
 
     def _asdict(self):
         return OrderedDict(zip(self._fields, self))
@@ -161,6 +269,8 @@ class Effect(tuple):
     affectedTrait = property(itemgetter(2), doc='Trait affected by the Effect')
     duration = property(itemgetter(3), doc='How many times the Effect fires')
     delay = property(itemgetter(4), doc='How long until the Effect starts')
-    script = property(itemgetter(5), doc='Script attached to Effect')
-    time = property(itemgetter(6), doc='Timestamp for Effect')
-    eid = property(itemgetter(7), doc='Unique ID for Effect')
+    interval = property(itemgetter(5), doc='Time between firings of the Effect')
+    script = property(itemgetter(6), doc='Script attached to Effect')
+    time = property(itemgetter(7), doc='Timestamp for Effect')
+    eid = property(itemgetter(8), doc='Unique ID for Effect')
+    op = property(itemgetter(9), doc='How the Effect modifies its Trait')
@@ -182,6 +182,7 @@ class Object(Tangible):
 
     """
     STYLE = '|145'
+    COMPACT_TRAITS = True  # Items are numerous; keep their traits small.
 
     def basetype_setup(self):
         """
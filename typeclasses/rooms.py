@@ -5,7 +5,7 @@ Rooms are simple containers that need no location of their own.
 import time  # Check time since last activity
 import random  # Random weather events
 from math import sqrt  # Distance formula for coordinate
-from evennia.server.sessionhandler import SESSIONS  # Checking sessions for active accounts in room
+from world import presence  # Characters puppeted in room, for weather
 from typeclasses.tangibles import Tangible
 from evennia.utils.utils import lazy_property
 from traits import TraitHandler
@@ -602,19 +602,10 @@ class Room(Tangible):
         any arguments and keyword arguments (hence the *args, **kwargs
         even though we don't actually use them in this example)
         """
-        slow_room = True
-        empty_room = True
-        session_list = SESSIONS.get_sessions()
-        for session in session_list:
-            character = session.get_puppet()
-            if not session.logged_in or not character or character.location != self:
-                continue
-            empty_room = False
-            if session.cmd_last_visible > self.ndb.weather_time:
-                slow_room = False
-                break
-        if empty_room:
+        present = presence.at(self)
+        if not present:
             return
+        slow_room = all(entry.idle <= self.ndb.weather_time for entry in present)
         if slow_room:
             self.attempt_weather_update(0.02)  # only attempt update 2% of the time
         else:
@@ -12,7 +12,27 @@ just overloads its hooks to have it perform its function.
 
 """
 
+import heapq
+from time import time
+from twisted.internet import reactor
 from evennia import DefaultScript
+from evennia.objects.models import ObjectDB
+from evennia.utils import logger
+
+_SCHEDULER = None  # The running EffectScheduler, set by its at_start()
+
+
+def schedule_effect(obj, eid, due):
+    """
+    Have the effect scheduler process effect `eid` of obj when due.
+
+    Args:
+        obj (Object): Object whose `effects` handler holds the effect.
+        eid (str): Unique ID of the effect.
+        due (float): Timestamp the effect fires at.
+    """
+    if _SCHEDULER is not None:
+        _SCHEDULER.schedule(obj, eid, due)
 
 
 class Script(DefaultScript):
@@ -89,3 +109,83 @@ class Script(DefaultScript):
 
     """
     pass
+
+
+class EffectScheduler(Script):
+    """
+    One global script processing the timed effects of every object.
+
+    Due effects are kept on a min-heap of (due, object, eid) and a single
+    timer is set for the earliest one, so nothing runs between expiries.
+    Everything due when the timer fires is processed in one batch.
+
+    Active effects are put on the heap at their expiry as well, so
+    they are dropped from their handler when they run out.
+
+    The heap is not stored: at_start() rebuilds it from the effects
+    stored on objects, so expiries survive reloads and those that fell
+    due while the server was down are processed right away.
+    """
+    def at_script_creation(self):
+        self.key = 'effect_scheduler'
+        self.desc = 'Processes timed effects when due'
+        self.persistent = True
+
+    def at_start(self):
+        """Rebuild the heap from the effects stored on objects."""
+        global _SCHEDULER
+        _SCHEDULER = self
+        self.ndb.timer = self.ndb.wake_at = None
+        heap = []
+        for obj in ObjectDB.objects.filter(db_attributes__db_key='effects'):
+            if not hasattr(obj, 'effects'):  # Not a Tangible.
+                continue
+            for effect in obj.effects.all:
+                if effect.duration:
+                    heap.append((effect.due, obj, effect.eid))
+            for eid, (_, expires) in obj.effects.active.items():
+                heap.append((expires, obj, eid))
+        heapq.heapify(heap)
+        self.ndb.heap = heap
+        self._wake()
+
+    def at_stop(self):
+        global _SCHEDULER
+        if self.ndb.timer and self.ndb.timer.active():
+            self.ndb.timer.cancel()
+        if _SCHEDULER is self:
+            _SCHEDULER = None
+
+    def schedule(self, obj, eid, due):
+        """Push an effect on the heap, waking sooner if it is the next due."""
+        heapq.heappush(self.ndb.heap, (due, obj, eid))
+        if self.ndb.wake_at is None or due < self.ndb.wake_at:
+            self._wake()
+
+    def _wake(self):
+        """Set the timer for the earliest due effect, if any."""
+        if self.ndb.timer and self.ndb.timer.active():
+            self.ndb.timer.cancel()
+        self.ndb.timer = self.ndb.wake_at = None
+        if self.ndb.heap:
+            self.ndb.wake_at = self.ndb.heap[0][0]
+            self.ndb.timer = reactor.callLater(max(0, self.ndb.wake_at - time()), self.process_due)
+
+    def process_due(self):
+        """Expire and process every effect that is due, then wait for the next one."""
+        now, heap, due = time(), self.ndb.heap, []
+        self.ndb.timer, self.ndb.wake_at = None, now  # Re-added effects wait for the batch.
+        while heap and heap[0][0] <= now:
+            due.append(heapq.heappop(heap))
+        for when, obj, eid in due:
+            if not obj.pk:  # Deleted since.
+                continue
+            obj.effects.expire(now)
+            effect = obj.effects.get(eid)
+            if effect is None or effect.due > now:  # Removed, expired, or re-added for later.
+                continue
+            try:
+                obj.effects.process(eid)
+            except Exception:
+                logger.log_trace('Effect {} on {} failed.'.format(eid, obj))
+        self._wake()
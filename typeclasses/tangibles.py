@@ -3,6 +3,9 @@ from evennia import DefaultObject
 from evennia.utils import inherits_from
 from evennia.utils.utils import lazy_property
 from traits import TraitHandler
+from effects import EffectHandler
+from world import allies, cmdsetcache, inventory
+from django.conf import settings
 import time  # Check time since last visit
 
 
@@ -16,10 +19,21 @@ class Tangible(DefaultObject):
     are categorized as "Tangible"
     """
     STYLE = '|Y'
+    COMPACT_TRAITS = False  # Use memory-light CompactTrait objects for bulk types.
 
     @lazy_property
     def traits(self):
-        return TraitHandler(self)
+        return TraitHandler(self, buffered=settings.TRAIT_BUFFERED, compact=self.COMPACT_TRAITS)
+
+    @lazy_property
+    def effects(self):
+        return EffectHandler(self)
+
+    def at_idmapper_flush(self):
+        """Save buffered trait changes before this object leaves the cache."""
+        if 'traits' in self.__dict__:
+            self.traits.flush()
+        return super(Tangible, self).at_idmapper_flush()
 
     def at_object_receive(self, new_arrival, source_location):
         """
@@ -39,6 +53,45 @@ class Tangible(DefaultObject):
             self.db.hosted[new_arrival] = (now, source_location, visit_count)
         else:
             self.db.hosted = {new_arrival: (now, source_location, visit_count)}
+        cmdsetcache.invalidate(self)  # Arrivals may bring cmdsets (exits, mailbox, dice...)
+        inventory.invalidate(self)
+        if hasattr(new_arrival, 'get_mass'):
+            self.carry_mass(new_arrival.get_mass())
+
+    def at_object_leave(self, moved_obj, target_location):
+        """
+        When an object leaves another.
+
+        Args:
+            moved_obj (Object): the object leaving.
+            target_location (Object): where moved_obj is going.
+        """
+        super(Tangible, self).at_object_leave(moved_obj, target_location)
+        cmdsetcache.invalidate(self)  # Departures may take cmdsets along.
+        inventory.invalidate(self)
+        if hasattr(moved_obj, 'get_mass'):
+            self.carry_mass(-moved_obj.get_mass())
+
+    def at_object_delete(self):
+        """
+        Take this tangible's own mass off whatever holds it before it is
+        deleted. Its contents are moved out next, and each departure takes
+        its own mass off through at_object_leave.
+        """
+        if self.location and hasattr(self.location, 'carry_mass'):
+            self.location.carry_mass(-self._own_mass()[0])
+        allies.forget(self)
+        return super(Tangible, self).at_object_delete()
+
+    def at_trait_change(self, key):
+        """
+        Called by the TraitHandler when trait key changes.
+
+        Args:
+            key (str): The trait that changed.
+        """
+        if key == 'mass':
+            self.update_mass()
 
     def get_display_name(self, viewer, **kwargs):
         """
@@ -81,11 +134,97 @@ class Tangible(DefaultObject):
             display_name += ('|n' if color else '') + display_pose
         return display_name
 
-    def get_mass(self):
+    # Mass of this tangible and all it contains is kept in ndb.mass_total, worked out
+    # on first use and then moved up the location chain as things arrive, leave or
+    # change mass. `@mass` compares it with compute_mass() to find drift.
+
+    def _own_mass(self):
+        """
+        Returns:
+            mass, weightless (tuple): This tangible's own mass, and True if
+                the mass of its contents is ignored.
+        """
         mass = self.traits.mass.actual if self.traits.mass else 0
-        if mass <= 0 and self.tags.get('weightless', category='flags'):
-            return mass  # Ignore mass of contents if this tangible is weight-free or inert.
-        return reduce(lambda x, y: x+y.get_mass() if hasattr(y, 'get_mass') else 0, [mass] + self.contents)
+        return mass, mass <= 0 and bool(self.tags.get('weightless', category='flags'))
+
+    def get_mass(self):
+        """Mass of this tangible and everything in it."""
+        total = self.ndb.mass_total
+        if total is None:
+            mass, weightless = self._own_mass()
+            if not weightless:  # Ignore mass of contents if this tangible is weight-free or inert.
+                mass += sum(obj.get_mass() for obj in self.contents if hasattr(obj, 'get_mass'))
+            total = self.ndb.mass_total = mass
+        return total
+
+    def compute_mass(self):
+        """Mass of this tangible and everything in it, added up again without cached totals."""
+        mass, weightless = self._own_mass()
+        if weightless:
+            return mass
+        return mass + sum(obj.compute_mass() for obj in self.contents if hasattr(obj, 'compute_mass'))
+
+    def carry_mass(self, delta):
+        """
+        Add delta to the mass of this tangible and the containers it is in,
+        up to the first one that ignores the mass of its contents.
+
+        Args:
+            delta (float): Mass arriving (or, if negative, leaving).
+        """
+        obj = self
+        while delta and obj is not None and hasattr(obj, 'carry_mass'):
+            if obj._own_mass()[1]:
+                return
+            if obj.ndb.mass_total is not None:
+                obj.ndb.mass_total += delta
+            obj = obj.location
+
+    def update_mass(self):
+        """Bring the mass of this tangible and its containers up to date after its own mass changed."""
+        old = self.ndb.mass_total
+        self.ndb.mass_total = None
+        if old is None:  # Nothing to take the difference from; let the containers add up again.
+            obj = self.location
+            while obj is not None and hasattr(obj, 'carry_mass'):
+                obj.ndb.mass_total = None
+                obj = obj.location
+            return
+        if self.location and hasattr(self.location, 'carry_mass'):
+            self.location.carry_mass(self.get_mass() - old)
+
+    def mass_drift(self):
+        """
+        Compare the cached mass of this tangible and everything in it with
+        masses added up again from scratch.
+
+        Returns:
+            drift (list): (tangible, cached mass, computed mass) for every
+                tangible whose cached mass is off.
+        """
+        drift = []
+        self._check_mass(drift)
+        return drift
+
+    def _check_mass(self, drift):
+        """Add up the mass of this tangible from scratch, noting any cached total that is off in drift."""
+        computed, weightless = self._own_mass()
+        for obj in self.contents:
+            if hasattr(obj, '_check_mass'):
+                mass = obj._check_mass(drift)
+                if not weightless:
+                    computed += mass
+        cached = self.ndb.mass_total
+        if cached is not None and abs(cached - computed) > 1e-6:
+            drift.append((self, cached, computed))
+        return computed
+
+    def reset_mass(self):
+        """Drop the cached mass of this tangible and everything in it, to be added up again on next use."""
+        self.ndb.mass_total = None
+        for obj in self.contents:
+            if hasattr(obj, 'reset_mass'):
+                obj.reset_mass()
 
     def get_limit(self):
         # TODO: Apply health as a small factor.
@@ -215,14 +215,106 @@ Example:
             >>> str(hp)                            # debuffs do not affect current
             'HP:            8 /   10 ( +0)'
             ```
+
+    Regen Trait Configuration
+
+        A regen type `Trait` is a gauge that refills (or drains) itself
+        over time without being written to. It stores the value of
+        `current` at time `t0` and a `rate` per second, and works out
+        `current` from the clock whenever it is read, within its bounds.
+
+        The stored data only changes when something other than time
+        changes the trait, so no ticker is needed to regenerate it.
+        Setting `current`, `rate` or a bound first records the value
+        reached so far as the new starting point.
+
+        Constructor Args:
+            (all keys listed above for 'gauge', plus:)
+            rate Optional(int, float): default 0
+                change of `current` per second; negative values drain it
+
+        Properties:
+            actual (int, float): returns the regenerated `current` value
+            rate (int, float): change of `current` per second
+
+        Examples:
+
+            ```python
+            >>> obj.traits.add('hp', 'HP', 'regen', base=10, rate=0.5)
+            >>> hp = obj.traits.hp
+            >>> hp.current -= 6                    # one write
+            >>> str(hp)
+            'HP:            4 /   10 ( +0)'
+            >>> str(hp)                            # four seconds later
+            'HP:          6.0 /   10 ( +0)'
+            >>> hp.rate = 0                        # stop regenerating at 6.0
+            ```
+
+**Compact Traits**
+    A `TraitHandler` created with `compact=True` hands out `CompactTrait`
+    objects instead. They keep their numbers in a fixed-layout `array`
+    with `__slots__` and no per-instance dict, for the thousands of NPCs
+    and items that only carry a few traits such as `mass` or `health`.
+    They behave like `Trait` and convert losslessly to and from the dict
+    format, so the same stored data can be loaded either way.
+
+        ```python
+        >>> hp = CompactTrait(obj.traits.attr_dict['hp'])
+        >>> hp.to_dict() == obj.traits.attr_dict['hp']
+        True
+        ```
+
+**Buffered Mode**
+    Every change to a trait normally saves the whole `traits` Attribute.
+    A `TraitHandler` created with `buffered=True` instead keeps a detached
+    copy of the traits in memory, marks the changed trait keys dirty and
+    saves them all in one write when `flush()` is called.
+
+    `flush_all()` saves every dirty handler. It is run by a ticker every
+    `settings.TRAIT_FLUSH_INTERVAL` seconds, when a character is unpuppeted
+    and at server stop, so at most one interval of changes is lost in a crash.
+
+    Example:
+
+        ```python
+        >>> obj.traits.hp.current -= 5     # in memory only
+        >>> obj.traits.dirty
+        {'hp'}
+        >>> obj.traits.flush()             # one save
+        ```
 """
 
 from evennia.utils.dbserialize import _SaverDict
 from evennia.utils import logger, lazy_property
 from functools import total_ordering
+from collections import Mapping, MutableSequence
+from array import array
+from time import time
+
+TRAIT_TYPES = ('static', 'counter', 'gauge', 'regen')
+RANGE_TRAITS = ('counter', 'gauge', 'regen')
+GAUGE_TRAITS = ('gauge', 'regen')
+
+_DIRTY_HANDLERS = set()  # Buffered TraitHandlers holding unsaved changes
+
+
+def flush_all(*args, **kwargs):
+    """Save every buffered `TraitHandler` with unsaved changes (the 'trait_flush' ticker)."""
+    for handler in list(_DIRTY_HANDLERS):
+        try:
+            handler.flush()
+        except Exception:
+            logger.log_trace('Trait flush failed for {}.'.format(handler.obj))
+            _DIRTY_HANDLERS.discard(handler)
 
-TRAIT_TYPES = ('static', 'counter', 'gauge')
-RANGE_TRAITS = ('counter', 'gauge')
+
+def _detach(data):
+    """Returns a plain copy of persistent (`_Saver*`) trait data."""
+    if isinstance(data, Mapping):
+        return dict((key, _detach(value)) for key, value in data.items())
+    if isinstance(data, MutableSequence):
+        return [_detach(value) for value in data]
+    return data
 
 
 class TraitException(Exception):
@@ -241,12 +333,23 @@ class TraitHandler(object):
     Args:
         obj (Object): parent Object typeclass for this TraitHandler
         db_attribute (str): name of the DB attribute for trait data storage
+        buffered (bool): hold changes in memory until `flush()`
+        compact (bool): hand out `CompactTrait` instead of `Trait` objects
     """
-    def __init__(self, obj, db_attribute='traits'):
+    _attrs = ('obj', 'db_attribute', 'buffered', 'compact', 'dirty', 'attr_dict', 'cache')
+
+    def __init__(self, obj, db_attribute='traits', buffered=False, compact=False):
         if not obj.attributes.has(db_attribute):
             obj.attributes.add(db_attribute, {})
 
+        self.obj = obj
+        self.db_attribute = db_attribute
+        self.buffered = buffered
+        self.compact = compact
+        self.dirty = set()
         self.attr_dict = obj.attributes.get(db_attribute)
+        if buffered:
+            self.attr_dict = _detach(self.attr_dict or {})
         self.cache = {}
 
     def __len__(self):
@@ -255,7 +358,7 @@ class TraitHandler(object):
 
     def __setattr__(self, key, value):
         """Returns error message if trait objects are assigned directly."""
-        if key in ('attr_dict', 'cache'):
+        if key in self._attrs:
             super(TraitHandler, self).__setattr__(key, value)
         else:
             raise TraitException(
@@ -292,10 +395,40 @@ class TraitHandler(object):
             if trait not in self.attr_dict:
                 return None
             data = self.attr_dict[trait]
-            self.cache[trait] = Trait(data)
+            trait_class = CompactTrait if self.compact else Trait
+            self.cache[trait] = trait_class(data, handler=self, key=trait)
         return self.cache[trait]
 
-    def add(self, key, name, trait_type='static', base=0, mod=0, min=None, max=None, extra=None):
+    def mark_dirty(self, key):
+        """Note that trait `key` changed.
+
+        Buffered handlers keep track of the key until the next flush.
+        Compact traits do not share their data, so unbuffered handlers
+        write them back right away. The parent object's `at_trait_change`
+        hook, if it has one, is called with the key.
+        """
+        if self.buffered:
+            self.dirty.add(key)
+            _DIRTY_HANDLERS.add(self)
+        elif self.compact and key in self.cache:
+            self.attr_dict[key] = self.cache[key].to_dict()
+        hook = getattr(self.obj, 'at_trait_change', None)
+        if hook:
+            hook(key)
+
+    def flush(self):
+        """Save all dirty traits in a single write."""
+        if not self.dirty:
+            return
+        if self.compact:
+            for key in self.dirty:
+                if key in self.cache and key in self.attr_dict:
+                    self.attr_dict[key] = self.cache[key].to_dict()
+        self.obj.attributes.add(self.db_attribute, self.attr_dict)
+        self.dirty.clear()
+        _DIRTY_HANDLERS.discard(self)
+
+    def add(self, key, name, trait_type='static', base=0, mod=0, min=None, max=None, extra=None, rate=0):
         """Create a new Trait and add it to the handler."""
         if extra is None:
             extra = {}
@@ -314,8 +447,11 @@ class TraitHandler(object):
                 trait.update(dict(min=min))
             if max:
                 trait.update(dict(max=max))
+            if trait_type == 'regen':
+                trait.update(dict(rate=rate, t0=time()))
 
             self.attr_dict[key] = trait
+            self.mark_dirty(key)
         else:
             raise TraitException("Invalid trait type specified.")
 
@@ -327,6 +463,7 @@ class TraitHandler(object):
         if trait in self.cache:
             del self.cache[trait]
         del self.attr_dict[trait]
+        self.mark_dirty(trait)
 
     def clear(self):
         """Remove all Traits from the handler's parent object."""
@@ -340,13 +477,112 @@ class TraitHandler(object):
 
 
 @total_ordering
-class Trait(object):
+class TraitNumeric(object):
+    """Numeric operations shared by `Trait` and `CompactTrait`.
+
+    Comparisons and arithmetic use the `actual` property of the trait.
+    """
+    __slots__ = ()
+
+    def __eq__(self, other):
+        """Support equality comparison between Traits or Trait and numeric.
+
+        Note:
+            This class uses the @functools.total_ordering() decorator to
+            complete the rich comparison implementation, therefore only
+            `__eq__` and `__lt__` are implemented.
+        """
+        if isinstance(other, TraitNumeric):
+            return self.actual == other.actual
+        elif type(other) in (float, int):
+            return self.actual == other
+        else:
+            return NotImplemented
+
+    def __lt__(self, other):
+        """Support less than comparison between `Trait`s or `Trait` and numeric."""
+        if isinstance(other, TraitNumeric):
+            return self.actual < other.actual
+        elif type(other) in (float, int):
+            return self.actual < other
+        else:
+            return NotImplemented
+
+    def __pos__(self):
+        """Access `actual` property through unary `+` operator."""
+        return self.actual
+
+    def __add__(self, other):
+        """Support addition between `Trait`s or `Trait` and numeric"""
+        if isinstance(other, TraitNumeric):
+            return self.actual + other.actual
+        elif type(other) in (float, int):
+            return self.actual + other
+        else:
+            return NotImplemented
+
+    def __sub__(self, other):
+        """Support subtraction between `Trait`s or `Trait` and numeric"""
+        if isinstance(other, TraitNumeric):
+            return self.actual - other.actual
+        elif type(other) in (float, int):
+            return self.actual - other
+        else:
+            return NotImplemented
+
+    def __mul__(self, other):
+        """Support multiplication between `Trait`s or `Trait` and numeric"""
+        if isinstance(other, TraitNumeric):
+            return self.actual * other.actual
+        elif type(other) in (float, int):
+            return self.actual * other
+        else:
+            return NotImplemented
+
+    def __floordiv__(self, other):
+        """Support floor division between `Trait`s or `Trait` and numeric"""
+        if isinstance(other, TraitNumeric):
+            return self.actual // other.actual
+        elif type(other) in (float, int):
+            return self.actual // other
+        else:
+            return NotImplemented
+
+    # yay, commutative property!
+    __radd__ = __add__
+    __rmul__ = __mul__
+
+    def __rsub__(self, other):
+        """Support subtraction between `Trait`s or `Trait` and numeric"""
+        if isinstance(other, TraitNumeric):
+            return other.actual - self.actual
+        elif type(other) in (float, int):
+            return other - self.actual
+        else:
+            return NotImplemented
+
+    def __rfloordiv__(self, other):
+        """Support floor division between `Trait`s or `Trait` and numeric"""
+        if isinstance(other, TraitNumeric):
+            return other.actual // self.actual
+        elif type(other) in (float, int):
+            return other // self.actual
+        else:
+            return NotImplemented
+
+
+class Trait(TraitNumeric):
     """Represents an object or Character trait.
 
+    Args:
+        data (dict): trait configuration data
+        handler (TraitHandler, optional): notified when the trait changes
+        key (str, optional): key of this trait in its handler
+
     Note:
         See module docstring for configuration details.
     """
-    def __init__(self, data):
+    def __init__(self, data, handler=None, key=None):
         if 'name' not in data:
             raise TraitException(
                 "Required key not found in trait data: 'name'")
@@ -361,16 +597,23 @@ class Trait(object):
         if 'extra' not in data:
             data['extra'] = {}
         if 'min' not in data:
-            data['min'] = 0 if self._type == 'gauge' else None
+            data['min'] = 0 if self._type in GAUGE_TRAITS else None
         if 'max' not in data:
-            data['max'] = 'base' if self._type == 'gauge' else None
+            data['max'] = 'base' if self._type in GAUGE_TRAITS else None
+        if self._type == 'regen':
+            if 'rate' not in data:
+                data['rate'] = 0
+            if 't0' not in data:
+                data['t0'] = time()
 
         self._data = data
         self._keys = ('name', 'type', 'base', 'mod',
-                      'current', 'min', 'max', 'extra')
+                      'current', 'min', 'max', 'rate', 't0', 'extra')
+        self._handler = handler
+        self._key = key
         self._locked = True
 
-        if not isinstance(data, _SaverDict):
+        if not (isinstance(data, _SaverDict) or (handler and handler.buffered)):
             logger.log_warn(
                 'Non-persistent {} class loaded.'.format(
                     type(self).__name__
@@ -385,7 +628,7 @@ class Trait(object):
 
     def __str__(self):
         """User-friendly string representation of this `Trait`"""
-        if self._type == 'gauge':
+        if self._type in GAUGE_TRAITS:
             status = "{actual:4} / {base:4}".format(actual=self.actual, base=self.base)
         else:
             status = "{actual:11}".format(actual=self.actual)
@@ -444,6 +687,7 @@ class Trait(object):
             if (self.__dict__.get('_locked', False) and
                     key not in ('_keys',)):
                 self._data['extra'][key] = value
+                self._changed()
             else:
                 super(Trait, self).__setattr__(key, value)
 
@@ -451,94 +695,7 @@ class Trait(object):
         """Delete extra parameters as attributes."""
         if key in self._data['extra']:
             del self._data['extra'][key]
-
-    # Numeric operations magic
-
-    def __eq__(self, other):
-        """Support equality comparison between Traits or Trait and numeric.
-
-        Note:
-            This class uses the @functools.total_ordering() decorator to
-            complete the rich comparison implementation, therefore only
-            `__eq__` and `__lt__` are implemented.
-        """
-        if type(other) == Trait:
-            return self.actual == other.actual
-        elif type(other) in (float, int):
-            return self.actual == other
-        else:
-            return NotImplemented
-
-    def __lt__(self, other):
-        """Support less than comparison between `Trait`s or `Trait` and numeric."""
-        if isinstance(other, Trait):
-            return self.actual < other.actual
-        elif type(other) in (float, int):
-            return self.actual < other
-        else:
-            return NotImplemented
-
-    def __pos__(self):
-        """Access `actual` property through unary `+` operator."""
-        return self.actual
-
-    def __add__(self, other):
-        """Support addition between `Trait`s or `Trait` and numeric"""
-        if isinstance(other, Trait):
-            return self.actual + other.actual
-        elif type(other) in (float, int):
-            return self.actual + other
-        else:
-            return NotImplemented
-
-    def __sub__(self, other):
-        """Support subtraction between `Trait`s or `Trait` and numeric"""
-        if isinstance(other, Trait):
-            return self.actual - other.actual
-        elif type(other) in (float, int):
-            return self.actual - other
-        else:
-            return NotImplemented
-
-    def __mul__(self, other):
-        """Support multiplication between `Trait`s or `Trait` and numeric"""
-        if isinstance(other, Trait):
-            return self.actual * other.actual
-        elif type(other) in (float, int):
-            return self.actual * other
-        else:
-            return NotImplemented
-
-    def __floordiv__(self, other):
-        """Support floor division between `Trait`s or `Trait` and numeric"""
-        if isinstance(other, Trait):
-            return self.actual // other.actual
-        elif type(other) in (float, int):
-            return self.actual // other
-        else:
-            return NotImplemented
-
-    # yay, commutative property!
-    __radd__ = __add__
-    __rmul__ = __mul__
-
-    def __rsub__(self, other):
-        """Support subtraction between `Trait`s or `Trait` and numeric"""
-        if isinstance(other, Trait):
-            return other.actual - self.actual
-        elif type(other) in (float, int):
-            return other - self.actual
-        else:
-            return NotImplemented
-
-    def __rfloordiv__(self, other):
-        """Support floor division between `Trait`s or `Trait` and numeric"""
-        if isinstance(other, Trait):
-            return other.actual // self.actual
-        elif type(other) in (float, int):
-            return other // self.actual
-        else:
-            return NotImplemented
+            self._changed()
 
     # Public members
 
@@ -550,7 +707,7 @@ class Trait(object):
     @property
     def actual(self):
         """The "actual" value of the trait."""
-        if self._type == 'gauge':
+        if self._type in GAUGE_TRAITS:
             return self.current
         elif self._type == 'counter':
             return self._mod_current()
@@ -569,10 +726,12 @@ class Trait(object):
 
     @base.setter
     def base(self, amount):
+        self._settle()
         if self._data.get('max', None) == 'base':
             self._data['base'] = amount
         if type(amount) in (int, float):
             self._data['base'] = self._enforce_bounds(amount)
+        self._changed()
 
     @property
     def mod(self):
@@ -582,9 +741,11 @@ class Trait(object):
     @mod.setter
     def mod(self, amount):
         if type(amount) in (int, float):
+            self._settle()
             delta = amount - self._data['mod']
             self._data['mod'] = amount
-            if self._type == 'gauge':
+            self._changed()
+            if self._type in GAUGE_TRAITS:
                 if delta >= 0:
                     # apply increases to current
                     self.current = self._enforce_bounds(self.current + delta)
@@ -604,10 +765,12 @@ class Trait(object):
     @min.setter
     def min(self, amount):
         if self._type in RANGE_TRAITS:
+            self._settle()
             if amount is None:
                 self._data['min'] = amount
             elif type(amount) in (int, float):
                 self._data['min'] = amount if amount < self.base else self.base
+            self._changed()
         else:
             raise AttributeError(
                 "static 'Trait' object has no attribute 'min'.")
@@ -633,18 +796,27 @@ class Trait(object):
     @max.setter
     def max(self, value):
         if self._type in RANGE_TRAITS:
+            self._settle()
             if value == 'base' or value is None:
                 self._data['max'] = value
             elif type(value) in (int, float):
                 self._data['max'] = value if value > self.base else self.base
+            self._changed()
         else:
             raise AttributeError(
                 "static 'Trait' object has no attribute 'max'.")
 
     @property
     def current(self):
-        """The `current` value of the `Trait`."""
-        if self._type == 'gauge':
+        """The `current` value of the `Trait`.
+
+        Note:
+            A regen trait adds `rate` for every second since `t0` to its
+            stored value, within bounds, each time this is read.
+        """
+        if self._type == 'regen':
+            return self._regen(self._data.get('current', self._mod_base()))
+        elif self._type == 'gauge':
             return self._data.get('current', self._mod_base())
         else:
             return self._data.get('current', self.base)
@@ -654,10 +826,33 @@ class Trait(object):
         if self._type in RANGE_TRAITS:
             if type(value) in (int, float):
                 self._data['current'] = self._enforce_bounds(value)
+                if self._type == 'regen':
+                    self._data['t0'] = time()
+                self._changed()
         else:
             raise AttributeError(
                 "'current' property is read-only on static 'Trait'.")
 
+    @property
+    def rate(self):
+        """Change of a regen trait's `current` per second."""
+        if self._type == 'regen':
+            return self._data['rate']
+        else:
+            raise AttributeError(
+                "{} 'Trait' object has no attribute 'rate'.".format(self._type))
+
+    @rate.setter
+    def rate(self, value):
+        if self._type == 'regen':
+            if type(value) in (int, float):
+                self._settle()
+                self._data['rate'] = value
+                self._changed()
+        else:
+            raise AttributeError(
+                "{} 'Trait' object has no attribute 'rate'.".format(self._type))
+
     @property
     def extra(self):
         """Returns a list containing available extra data keys."""
@@ -687,7 +882,7 @@ class Trait(object):
                 return "{:3.1f}%".format(self.current * 100.0 / self.max)
             elif self._type == 'counter' and self.base != 0:
                 return "{:3.1f}%".format(self.current * 100.0 / self._mod_base())
-            elif self._type == 'gauge' and self._mod_base() != 0:
+            elif self._type in GAUGE_TRAITS and self._mod_base() != 0:
                 return "{:3.1f}%".format(self.current * 100.0 / self._mod_base())
         # if we get to this point, it's either a static trait or
         # a divide by zero situation
@@ -695,6 +890,23 @@ class Trait(object):
 
     # Private members
 
+    def _changed(self):
+        """Tell the handler this trait's data changed."""
+        if self._handler is not None:
+            self._handler.mark_dirty(self._key)
+
+    def _regen(self, value):
+        """Returns value after regenerating at `rate` since `t0`."""
+        if not self._data['rate']:
+            return value
+        return self._enforce_bounds(value + self._data['rate'] * (time() - self._data['t0']))
+
+    def _settle(self):
+        """Store a regen trait's value as of now, before its rate or bounds change."""
+        if self._type == 'regen' and self._data['rate']:
+            self._data['current'] = self.current
+            self._data['t0'] = time()
+
     def _mod_base(self):
         return self._enforce_bounds(self.mod + self.base)
 
@@ -711,3 +923,366 @@ class Trait(object):
             if self.max is not None and value >= self.max:
                 return self.max
         return value
+
+
+_FIELDS = ('base', 'mod', 'current', 'min', 'max', 'rate', 't0')
+_BASE, _MOD, _CURRENT, _MIN, _MAX, _RATE, _T0 = range(len(_FIELDS))
+# How each slot of a CompactTrait value array is to be read back:
+_ABSENT, _NONE, _INT, _FLOAT, _MAX_BASE = range(5)
+
+
+class CompactTrait(TraitNumeric):
+    """Memory-light `Trait` for bulk objects such as NPCs and items.
+
+    The numeric fields are kept in one fixed-layout `array` of doubles,
+    in `_FIELDS` order, alongside a byte array recording whether each
+    value is absent, None, an int, a float or the 'base' literal. No
+    per-instance `__dict__` is created and attribute access does not go
+    through `__getattr__`, except for extra data.
+
+    It supports the same public API as `Trait`, and `to_dict()` returns
+    exactly the dict format it was created from.
+
+    Args:
+        data (dict): trait configuration data
+        handler (TraitHandler, optional): notified when the trait changes
+        key (str, optional): key of this trait in its handler
+    """
+    __slots__ = ('_name', '_type', '_values', '_kinds', '_extra', '_handler', '_key')
+
+    def __init__(self, data, handler=None, key=None):
+        if 'name' not in data:
+            raise TraitException(
+                "Required key not found in trait data: 'name'")
+        if 'type' not in data:
+            raise TraitException(
+                "Required key not found in trait data: 'type'")
+        _set = object.__setattr__
+        _set(self, '_name', data['name'])
+        _set(self, '_type', data['type'])
+        _set(self, '_values', array('d', [0.0] * len(_FIELDS)))
+        _set(self, '_kinds', array('B', [_ABSENT] * len(_FIELDS)))
+        _set(self, '_extra', dict(data.get('extra', {})))
+        _set(self, '_handler', handler)
+        _set(self, '_key', key)
+        self._store(_BASE, data.get('base', 0))
+        self._store(_MOD, data.get('mod', 0))
+        if 'current' in data:
+            self._store(_CURRENT, data['current'])
+        self._store(_MIN, data.get('min', 0 if self._type in GAUGE_TRAITS else None))
+        self._store(_MAX, data.get('max', 'base' if self._type in GAUGE_TRAITS else None))
+        if self._type == 'regen':
+            self._store(_RATE, data.get('rate', 0))
+            self._store(_T0, data.get('t0', time()))
+
+    @classmethod
+    def from_trait(cls, trait, handler=None, key=None):
+        """Convert a dict-backed `Trait` into a `CompactTrait`."""
+        return cls(trait._data, handler=handler, key=key)
+
+    def to_dict(self):
+        """Returns the trait in the dict format stored by `TraitHandler`."""
+        data = dict(name=self._name, type=self._type, extra=dict(self._extra))
+        for index, field in enumerate(_FIELDS):
+            if self._kinds[index] != _ABSENT:
+                data[field] = self._load(index)
+        return data
+
+    def __repr__(self):
+        """Debug-friendly representation of this Trait."""
+        data = self.to_dict()
+        return "{}({{{}}})".format(
+            type(self).__name__,
+            ', '.join(["'{}': {!r}".format(k, data[k])
+                       for k in ('name', 'type') + _FIELDS + ('extra',) if k in data]))
+
+    def __str__(self):
+        """User-friendly string representation of this `Trait`"""
+        if self._type in GAUGE_TRAITS:
+            status = "{actual:4} / {base:4}".format(actual=self.actual, base=self.base)
+        else:
+            status = "{actual:11}".format(actual=self.actual)
+
+        return "{name:12} {status} ({mod:+3})".format(
+            name=self.name,
+            status=status,
+            mod=self.mod)
+
+    def __unicode__(self):
+        """User-friendly unicode representation of this `Trait`"""
+        return unicode(str(self))
+
+    # Extra Properties magic
+
+    def __getitem__(self, key):
+        """Access extra parameters as dict keys."""
+        try:
+            return self._extra[key]
+        except KeyError:
+            raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        """Set extra parameters as dict keys."""
+        self._extra[key] = value
+        self._changed()
+
+    def __delitem__(self, key):
+        """Delete extra prameters as dict keys."""
+        self.__delattr__(key)
+
+    def __getattr__(self, key):
+        """Access extra parameters as attributes."""
+        if key in self._extra:
+            return self._extra[key]
+        raise AttributeError(
+            "{} '{}' has no attribute {!r}".format(
+                type(self).__name__, self._name, key
+            ))
+
+    def __setattr__(self, key, value):
+        """Set properties normally, anything else as extra parameters."""
+        if key in _COMPACT_ATTRS:
+            object.__setattr__(self, key, value)
+        else:
+            self._extra[key] = value
+            self._changed()
+
+    def __delattr__(self, key):
+        """Delete extra parameters as attributes."""
+        if key in self._extra:
+            del self._extra[key]
+            self._changed()
+
+    # Public members
+
+    @property
+    def name(self):
+        """Display name for the trait."""
+        return self._name
+
+    @property
+    def actual(self):
+        """The "actual" value of the trait."""
+        if self._type in GAUGE_TRAITS:
+            return self.current
+        elif self._type == 'counter':
+            return self._mod_current()
+        else:
+            return self._mod_base()
+
+    @property
+    def base(self):
+        """The trait's base value, bounded like `Trait.base`."""
+        return self._load(_BASE)
+
+    @base.setter
+    def base(self, amount):
+        if type(amount) in (int, float):
+            self._settle()
+            if self._kinds[_MAX] == _MAX_BASE:  # The maximum moves with the new base.
+                minimum = self._load(_MIN)
+                if minimum is not None and amount <= minimum:
+                    amount = minimum
+                elif self.mod < 0:
+                    amount += self.mod
+            else:
+                amount = self._enforce_bounds(amount)
+            self._store(_BASE, amount)
+            self._changed()
+
+    @property
+    def mod(self):
+        """The trait's modifier."""
+        return self._load(_MOD)
+
+    @mod.setter
+    def mod(self, amount):
+        if type(amount) in (int, float):
+            self._settle()
+            delta = amount - self.mod
+            self._store(_MOD, amount)
+            self._changed()
+            if self._type in GAUGE_TRAITS:
+                if delta >= 0:
+                    # apply increases to current
+                    self.current = self._enforce_bounds(self.current + delta)
+                else:
+                    # but not decreases, unless current goes out of range
+                    self.current = self._enforce_bounds(self.current)
+
+    @property
+    def min(self):
+        """The lower bound of the range."""
+        if self._type in RANGE_TRAITS:
+            return self._load(_MIN)
+        raise AttributeError(
+            "static 'Trait' object has no attribute 'min'.")
+
+    @min.setter
+    def min(self, amount):
+        if self._type not in RANGE_TRAITS:
+            raise AttributeError(
+                "static 'Trait' object has no attribute 'min'.")
+        self._settle()
+        if amount is None:
+            self._store(_MIN, None)
+        elif type(amount) in (int, float):
+            self._store(_MIN, amount if amount < self.base else self.base)
+        self._changed()
+
+    @property
+    def max(self):
+        """The maximum value of the `Trait`, `mod`+`base` if set to 'base'."""
+        if self._type in RANGE_TRAITS:
+            if self._kinds[_MAX] == _MAX_BASE:
+                return self._mod_base()
+            return self._load(_MAX)
+        raise AttributeError(
+            "static 'Trait' object has no attribute 'max'.")
+
+    @max.setter
+    def max(self, value):
+        if self._type not in RANGE_TRAITS:
+            raise AttributeError(
+                "static 'Trait' object has no attribute 'max'.")
+        self._settle()
+        if value == 'base' or value is None:
+            self._store(_MAX, value)
+        elif type(value) in (int, float):
+            self._store(_MAX, value if value > self.base else self.base)
+        self._changed()
+
+    @property
+    def current(self):
+        """The `current` value of the `Trait`, regenerated if a regen trait."""
+        if self._kinds[_CURRENT] != _ABSENT:
+            value = self._load(_CURRENT)
+        else:
+            value = self._mod_base() if self._type in GAUGE_TRAITS else self.base
+        return self._regen(value) if self._type == 'regen' else value
+
+    @current.setter
+    def current(self, value):
+        if self._type not in RANGE_TRAITS:
+            raise AttributeError(
+                "'current' property is read-only on static 'Trait'.")
+        if type(value) in (int, float):
+            self._store(_CURRENT, self._enforce_bounds(value))
+            if self._type == 'regen':
+                self._store(_T0, time())
+            self._changed()
+
+    @property
+    def rate(self):
+        """Change of a regen trait's `current` per second."""
+        if self._type == 'regen':
+            return self._load(_RATE)
+        raise AttributeError(
+            "{} 'Trait' object has no attribute 'rate'.".format(self._type))
+
+    @rate.setter
+    def rate(self, value):
+        if self._type != 'regen':
+            raise AttributeError(
+                "{} 'Trait' object has no attribute 'rate'.".format(self._type))
+        if type(value) in (int, float):
+            self._settle()
+            self._store(_RATE, value)
+            self._changed()
+
+    @property
+    def extra(self):
+        """Returns a list containing available extra data keys."""
+        return self._extra.keys()
+
+    def reset_mod(self):
+        """Clears any mod value on the `Trait`."""
+        self.mod = 0
+
+    def reset_counter(self):
+        """Resets `current` property equal to `base` value."""
+        self.current = self.base
+
+    def fill_gauge(self):
+        """Adds the `mod`+`base` to the `current` value, honoring bounds."""
+        self.current = self._enforce_bounds(self.current + self._mod_base())
+
+    def percent(self):
+        """Returns the value formatted as a percentage."""
+        if self._type in RANGE_TRAITS:
+            if self.max:
+                return "{:3.1f}%".format(self.current * 100.0 / self.max)
+            elif self._type == 'counter' and self.base != 0:
+                return "{:3.1f}%".format(self.current * 100.0 / self._mod_base())
+            elif self._type in GAUGE_TRAITS and self._mod_base() != 0:
+                return "{:3.1f}%".format(self.current * 100.0 / self._mod_base())
+        return "100.0%"
+
+    # Private members
+
+    def _load(self, index):
+        """Read value `index` back in the type it was stored as."""
+        kind = self._kinds[index]
+        if kind == _INT:
+            return int(self._values[index])
+        if kind == _FLOAT:
+            return self._values[index]
+        if kind == _MAX_BASE:
+            return 'base'
+        return None
+
+    def _store(self, index, value):
+        """Write value `index`, remembering its type."""
+        if value is None:
+            self._kinds[index] = _NONE
+        elif value == 'base':
+            self._kinds[index] = _MAX_BASE
+        elif isinstance(value, (int, long, float)):
+            self._kinds[index] = _FLOAT if isinstance(value, float) else _INT
+            self._values[index] = value
+        else:
+            raise TraitException("Compact trait '{}' needs a number for '{}', not {!r}.".format(
+                self._name, _FIELDS[index], value))
+
+    def _changed(self):
+        """Tell the handler this trait's data changed."""
+        if self._handler is not None:
+            self._handler.mark_dirty(self._key)
+
+    def _regen(self, value):
+        """Returns value after regenerating at `rate` since `t0`."""
+        rate = self._load(_RATE)
+        if not rate:
+            return value
+        return self._enforce_bounds(value + rate * (time() - self._load(_T0)))
+
+    def _settle(self):
+        """Store a regen trait's value as of now, before its rate or bounds change."""
+        if self._type == 'regen' and self._load(_RATE):
+            self._store(_CURRENT, self.current)
+            self._store(_T0, time())
+
+    def _mod_base(self):
+        return self._enforce_bounds(self.mod + self.base)
+
+    def _mod_current(self):
+        return self._enforce_bounds(self.mod + self.current)
+
+    def _enforce_bounds(self, value):
+        """Ensures that incoming value falls within trait's range."""
+        if self._type in RANGE_TRAITS:
+            minimum = self._load(_MIN)
+            if minimum is not None and value <= minimum:
+                return minimum
+            if self._kinds[_MAX] == _MAX_BASE:
+                if value >= self.mod + self.base:
+                    return self.mod + self.base
+            else:
+                maximum = self._load(_MAX)
+                if maximum is not None and value >= maximum:
+                    return maximum
+        return value
+
+
+_COMPACT_ATTRS = frozenset(CompactTrait.__slots__ + tuple(
+    key for key, value in vars(CompactTrait).items() if isinstance(value, property)))
@@ -6,21 +6,16 @@ templates on the fly.
 
 """
 from django.contrib.admin.sites import site
-from django.conf import settings
 from django.contrib.admin.views.decorators import staff_member_required
 from django.shortcuts import render
 from django.contrib.auth import authenticate
 
-from evennia import SESSION_HANDLER
-from evennia.server.sessionhandler import SESSIONS
-from evennia.objects.models import ObjectDB
 from evennia.accounts.models import AccountDB
 from evennia.utils import logger, utils
+from world import gamestats
 
 from django.contrib.auth import login
 
-_BASE_CHAR_TYPECLASS = settings.BASE_CHARACTER_TYPECLASS
-
 
 def _shared_login(request):
     """
@@ -48,43 +43,25 @@ def _shared_login(request):
 
 
 def _gamestats():
-    # Some misc. configurable stuff.
-    # TODO: Move this to either SQL or settings.py based configuration.
-    fpage_account_limit = 8
-
-    # A QuerySet of the most recently connected accounts.
-    recent_users = AccountDB.objects.get_recently_connected_accounts()[:fpage_account_limit]
-    current_users = AccountDB.objects.get_connected_accounts()
-    current_chars = []
-    for element in current_users:
-        grid_char = element.puppet
-        current_chars.append(grid_char.key if grid_char else '*ghost*')
-    nplyrs_conn_recent = len(recent_users) or "none"
-    nplyrs = AccountDB.objects.num_total_accounts() or "none"
-    nplyrs_reg_recent = len(AccountDB.objects.get_recently_created_accounts()) or "none"
-    nsess = SESSION_HANDLER.account_count()
-    # nsess = len(AccountDB.objects.get_connected_accounts()) or "no one"
-
-    nobjs = ObjectDB.objects.all().count()
-    nrooms = ObjectDB.objects.filter(db_location__isnull=True).exclude(db_typeclass_path=_BASE_CHAR_TYPECLASS).count()
-    nexits = ObjectDB.objects.filter(db_location__isnull=False, db_destination__isnull=False).count()
-    nchars = ObjectDB.objects.filter(db_typeclass_path=_BASE_CHAR_TYPECLASS).count()
-    nothers = nobjs - nrooms - nchars - nexits
+    # Counts come from the stats service, refreshed on a timer; who is on comes from memory.
+    stats = gamestats.get()
+    live = gamestats.live()
+    recent_users, nplyrs_reg_recent = gamestats.recent()
 
     pagevars = {
         "page_title": "Front Page",
         "accounts_connected_recent": recent_users,
-        "accounts_connected_now": current_users,
-        "characters_on_grid": current_chars,
-        "num_accounts_connected": nsess or "no one",
-        "num_accounts_registered": nplyrs or "no",
-        "num_accounts_connected_recent": nplyrs_conn_recent or "no",
+        "accounts_connected_now": live['accounts'],
+        "characters_on_grid": live['characters'],
+        "num_accounts_connected": live['sessions'] or "no one",
+        "num_accounts_registered": stats['accounts'] or "no",
+        "num_accounts_connected_recent": len(recent_users) or "no",
         "num_accounts_registered_recent": nplyrs_reg_recent or "no one",
-        "num_rooms": nrooms or "none",
-        "num_exits": nexits or "no",
-        "num_objects": nobjs or "none",
-        "num_characters": nchars or "no",
-        "num_others": nothers or "no"
+        "num_rooms": stats['rooms'] or "none",
+        "num_exits": stats['exits'] or "no",
+        "num_objects": stats['objects'] or "none",
+        "num_characters": stats['characters'] or "no",
+        "num_others": stats['others'] or "no"
     }
     return pagevars
 
@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+"""
+Allies and teams
+
+Each character keeps the fighters they consider allies in `db.Allies`.
+Asking whether one fighter is an ally of another used to mean reading
+and scanning that list, for every fighter engaged with a mover or hit
+by an attack, and one-sided lists made alliances lopsided.
+
+This module keeps each character's allies as a set, loaded from
+`db.Allies` on first use and kept in step by `add()` and `remove()`,
+so `considers(obj, other)` is a set lookup. Change `db.Allies` only
+through those, and list it with `listed()`. The set is dropped by
+`forget()` when a character is unpuppeted or deleted, or a fight it
+was in ends, and read again when next asked for.
+
+In a fight, `Teams` joins fighters who consider each other allies into
+teams with union-find, so allies of allies fight on the same side.
+Every fighter's team is worked out once when the teams are built;
+`hostile()` then costs two dict lookups and a set lookup. A
+`CombatSession` rebuilds its teams when fighters come or go, or when
+any alliance changes (see `version()`).
+
+Example:
+    ```python
+    >>> allies.add(alice, bob)
+    >>> allies.add(bob, alice)
+    >>> teams = allies.Teams([alice, bob, carol])
+    >>> teams.hostile(carol, alice), teams.hostile(bob, alice)
+    (True, False)
+    >>> teams.sides()
+    [[alice, bob], [carol]]
+    ```
+"""
+_ALLIES = {}  # Object: set of fighters it considers allies
+_VERSION = [0]  # Bumped on every change to an alliance
+
+
+def version():
+    """Counter bumped whenever anyone's allies change."""
+    return _VERSION[0]
+
+
+def allies_of(obj):
+    """The set of fighters obj considers allies."""
+    found = _ALLIES.get(obj)
+    if found is None:
+        found = _ALLIES[obj] = set(ally for ally in (obj.db.Allies or []) if ally is not None)
+    return found
+
+
+def listed(obj):
+    """The fighters obj considers allies, in the order they were added."""
+    found = allies_of(obj)
+    return [ally for ally in obj.db.Allies or [] if ally in found]
+
+
+def considers(obj, other):
+    """True if obj considers other an ally."""
+    return other in allies_of(obj)
+
+
+def mutual(obj, other):
+    """True if obj and other consider each other allies."""
+    return considers(obj, other) and considers(other, obj)
+
+
+def add(obj, other):
+    """
+    Make obj consider other an ally.
+
+    Returns:
+        added (bool): False if obj already did.
+    """
+    if considers(obj, other):
+        return False
+    allies_of(obj).add(other)
+    obj.db.Allies = list(obj.db.Allies or []) + [other]
+    _VERSION[0] += 1
+    return True
+
+
+def remove(obj, other):
+    """
+    Make obj stop considering other an ally.
+
+    Returns:
+        removed (bool): False if obj did not consider other an ally.
+    """
+    if not considers(obj, other):
+        return False
+    allies_of(obj).discard(other)
+    obj.db.Allies = [ally for ally in obj.db.Allies or [] if ally != other]
+    _VERSION[0] += 1
+    return True
+
+
+def forget(obj):
+    """Drop the cached allies of obj, when it is unpuppeted or deleted or its fight ends."""
+    if _ALLIES.pop(obj, None) is not None:
+        _VERSION[0] += 1
+
+
+class Teams(object):
+    """
+    Fighters grouped into teams of allies.
+
+    Two fighters who consider each other allies are on the same team,
+    and so is anyone allied in turn with a member.
+
+    Args:
+        fighters (iterable): Everyone in the fight.
+    """
+    def __init__(self, fighters):
+        self.fighters = list(fighters)
+        self.parent = dict((obj, obj) for obj in self.fighters)
+        self.size = dict((obj, 1) for obj in self.fighters)
+        for obj in self.fighters:
+            for other in allies_of(obj):
+                if other in self.parent and considers(other, obj):
+                    self.union(obj, other)
+        self.team = dict((obj, self.find(obj)) for obj in self.fighters)
+
+    def find(self, obj):
+        """The representative of obj's team."""
+        parent = self.parent
+        while parent[obj] is not obj:
+            parent[obj] = parent[parent[obj]]
+            obj = parent[obj]
+        return obj
+
+    def union(self, obj, other):
+        """Put obj and other on the same team."""
+        first, second = self.find(obj), self.find(other)
+        if first is second:
+            return
+        if self.size[first] < self.size[second]:
+            first, second = second, first
+        self.parent[second] = first
+        self.size[first] += self.size[second]
+
+    def same(self, obj, other):
+        """True if obj and other fight on the same team."""
+        return self.team.get(obj, obj) is self.team.get(other, other)
+
+    def hostile(self, obj, other):
+        """True if obj acts against other: blocks their movement, gets in the way of their ranged attacks."""
+        return obj is not other and not self.same(obj, other) and not considers(obj, other)
+
+    def members(self, obj):
+        """Everyone on obj's team, obj included."""
+        team = self.team.get(obj, obj)
+        return [each for each in self.fighters if self.team[each] is team] or [obj]
+
+    def sides(self):
+        """Every team, as lists of fighters, in order of their first fighter."""
+        sides, order = {}, []
+        for obj in self.fighters:
+            team = self.team[obj]
+            if team not in sides:
+                sides[team] = []
+                order.append(team)
+            sides[team].append(obj)
+        return [sides[team] for team in order]
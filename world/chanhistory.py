@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+"""
+Channel history
+
+Channels that keep a log (their `keep_log`, on by default, or the
+`keep_log=True` the active/inactive notices on Public are sent with)
+had every line written to storage as it was sent, so a busy channel
+went to disk once per line, and looking back meant reading it there.
+
+Each channel keeps its recent lines in memory instead, in a ring of
+the last `settings.CHANNEL_HISTORY_SIZE` lines; the oldest drops out
+as a new one comes in. Every line sent goes in the ring, and
+`channel/history` and the lines shown to a new joiner are read from
+it. Lines to keep are also appended to the channel's log, one JSON
+object per line in `settings.CHANNEL_LOG_DIR`, in batches: once
+`settings.CHANNEL_LOG_BATCH` are waiting, every
+`settings.CHANNEL_LOG_FLUSH_INTERVAL` seconds by a ticker and at
+server stop. After a reload the ring is filled again from the end of
+the log on first use.
+
+Example:
+    ```python
+    >>> chanhistory.record(public, '|cRulan |gis now active.')
+    >>> chanhistory.recent(public, 1)
+    [(1500000000.0, '|cRulan |gis now active.')]
+    ```
+"""
+import json
+import os
+from collections import deque
+from time import time
+from django.conf import settings
+from world.helpers import append_jsonl
+
+_HISTORIES = {}  # Channel id: its ChannelHistory
+_TAIL_CHUNK = 8192  # Bytes read at a time from the end of a log
+
+
+def _tail(path, count):
+    """The last count lines of the file at path, reading it from the end."""
+    if not os.path.exists(path):
+        return []
+    with open(path, 'rb') as handle:
+        handle.seek(0, os.SEEK_END)
+        end = handle.tell()
+        data = b''
+        while end > 0 and data.count(b'\n') <= count:
+            start = max(0, end - _TAIL_CHUNK)
+            handle.seek(start)
+            data = handle.read(end - start) + data
+            end = start
+    return [line.decode('utf-8') for line in data.splitlines()[-count:] if line.strip()]
+
+
+class ChannelHistory(object):
+    """
+    Recent lines of one channel, and those not yet written to its log.
+
+    Args:
+        path (str): Log file the lines are appended to; the ring starts
+            with the last lines already in it.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.ring = deque(maxlen=settings.CHANNEL_HISTORY_SIZE)
+        self.buffer = []
+        for line in _tail(path, settings.CHANNEL_HISTORY_SIZE):
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue  # A line cut short by a crash.
+            self.ring.append((entry['t'], entry['msg']))
+
+    def record(self, message, keep=True, now=None):
+        """Add a line to the ring; if keep, it is also written to the log with the next batch."""
+        entry = (round(now or time(), 3), message)
+        self.ring.append(entry)
+        if keep:
+            self.buffer.append(entry)
+            if len(self.buffer) >= settings.CHANNEL_LOG_BATCH:
+                self.flush()
+
+    def recent(self, count=None):
+        """The last count lines (all in the ring if None), oldest first, as (time, message)."""
+        if count is None or count >= len(self.ring):
+            return list(self.ring)
+        return list(self.ring)[-count:] if count > 0 else []
+
+    def flush(self):
+        """Append the waiting lines to the log. Returns how many were written."""
+        rows = [{'t': when, 'msg': message} for when, message in self.buffer]
+        count, self.buffer = append_jsonl(self.path, rows), []
+        return count
+
+
+def path(channel):
+    """The log file of a channel."""
+    return os.path.join(settings.CHANNEL_LOG_DIR, '%s.jsonl' % channel.id)
+
+
+def get(channel):
+    """The ChannelHistory of channel, read on first use."""
+    history = _HISTORIES.get(channel.id)
+    if history is None:
+        history = _HISTORIES[channel.id] = ChannelHistory(path(channel))
+    return history
+
+
+def record(channel, message, keep=True):
+    """Add a line sent to channel to its history; written to its log if keep."""
+    get(channel).record(message, keep)
+
+
+def recent(channel, count=None):
+    """The last count lines sent to channel, oldest first, as (time, message)."""
+    return get(channel).recent(count)
+
+
+def flush_all(*args, **kwargs):
+    """Write out the waiting lines of every channel, every settings.CHANNEL_LOG_FLUSH_INTERVAL seconds."""
+    for history in list(_HISTORIES.values()):
+        history.flush()
@@ -43,6 +43,20 @@ that can be worn. The system as-is is fairly freeform - you
 can cover any garment with almost any other, for example - but it
 can easily be made more restrictive, and can even be tied into a
 system for armor or other equipment.
+
+What a character wears is kept in a slot index on the character (see
+`worn_index()`), mapping each clothing type to the garments worn of it
+in the order they were put on. `Item.wear` and `Item.remove` keep it
+up to date, so describing a character and checking clothing limits
+never look through everything they carry.
+
+The index also keeps the cover graph: which garment covers which, each
+covered garment under exactly one other. Covering is refused if it
+would put a garment under itself, however many layers down, so layers
+like a coat over a shirt over an undershirt always come off from the
+top. Only garments with nothing over them are visible. The graph is
+built again from each garment's `db.covered_by` after a reload.
+
 Example:
     @create a pretty shirt : world.clothing.Item
     @set shirt/clothing_type = 'top'
@@ -52,6 +66,7 @@ from typeclasses.objects import Consumable
 from commands.command import MuxCommand
 from evennia.utils import list_to_string
 from evennia.utils import evtable
+from world import inventory
 
 # Maximum character length of 'wear style' strings, or None for unlimited.
 WEARSTYLE_MAXLENGTH = 65
@@ -77,8 +92,180 @@ CLOTHING_TYPE_AUTOCOVER = {'top': ['undershirt'], 'bottom': ['underpants'], 'gog
 CLOTHING_TYPE_CANT_COVER_WITH = ['jewelry']
 
 
+# Position of each clothing type in CLOTHING_TYPE_ORDER; untyped and unlisted types go last.
+_TYPE_RANK = dict((clothing_type, rank) for rank, clothing_type in enumerate(CLOTHING_TYPE_ORDER))
+_LAST = len(CLOTHING_TYPE_ORDER)
+
+
 # HELPER FUNCTIONS START HERE
 
+class WornIndex(object):
+    """
+    The clothes a character wears, by clothing type.
+
+    Each slot holds the garments of one clothing type in the order they
+    were put on. Garments that have left the character without being
+    removed (deleted, moved away by force) are dropped when next seen.
+
+    Covering is kept as a forest: `covers` maps each covered garment to
+    the one directly over it, `under` maps a garment to those directly
+    beneath it. Changes go through `cover()` and `uncover()`, which keep
+    each garment's `db.covered_by` in step and never make a cycle.
+
+    Args:
+        character (obj): The character wearing the clothes.
+    """
+    def __init__(self, character):
+        self.character = character
+        self.slots = {}  # Clothing type: list of garments worn of it
+        self.types = {}  # Garment: the clothing type it was worn as
+        self.covers = {}  # Covered garment: the garment directly over it
+        self.under = {}  # Garment: list of garments directly under it
+
+    def add(self, garment):
+        """Index garment as worn. Does nothing if it already is."""
+        if garment in self.types:
+            return
+        clothing_type = garment.db.clothing_type or None
+        self.types[garment] = clothing_type
+        self.slots.setdefault(clothing_type, []).append(garment)
+
+    def discard(self, garment):
+        """
+        Drop garment from the index, if it is in it.
+
+        Returns:
+            uncovered (list): Garments it covered, now uncovered.
+        """
+        clothing_type = self.types.pop(garment, False)
+        if clothing_type is False:
+            return []
+        slot = self.slots[clothing_type]
+        slot.remove(garment)
+        if not slot:
+            del self.slots[clothing_type]
+        self.uncover(garment)
+        uncovered = list(self.under.get(garment, ()))
+        for thing in uncovered:
+            self.uncover(thing)
+        return uncovered
+
+    # Cover graph
+
+    def cover_of(self, garment):
+        """The garment directly over garment, or None."""
+        return self.covers.get(garment)
+
+    def outermost(self, garment):
+        """The top layer over garment: what must come off first. garment itself if uncovered."""
+        while garment in self.covers:
+            garment = self.covers[garment]
+        return garment
+
+    def beneath(self, garment):
+        """Every garment under garment, however deep, nearest layers first."""
+        found = list(self.under.get(garment, ()))
+        for thing in found:
+            found.extend(self.under.get(thing, ()))
+        return found
+
+    def visible(self, garment):
+        """True if garment is worn with nothing over it."""
+        return garment in self.types and garment not in self.covers
+
+    def can_cover(self, garment, cover):
+        """True if cover can go over garment without putting either under itself."""
+        if garment not in self.types or cover not in self.types:
+            return False
+        while cover is not None:
+            if cover is garment:
+                return False
+            cover = self.covers.get(cover)
+        return True
+
+    def cover(self, garment, cover):
+        """
+        Cover garment with cover, uncovering it from anything else first.
+
+        Returns:
+            covered (bool): False if it would make a cycle; nothing changes.
+        """
+        if not self.can_cover(garment, cover):
+            return False
+        self._unlink(garment)
+        self.covers[garment] = cover
+        self.under.setdefault(cover, []).append(garment)
+        garment.db.covered_by = cover
+        return True
+
+    def uncover(self, garment):
+        """Leave garment with nothing over it."""
+        if self._unlink(garment):
+            garment.db.covered_by = None
+
+    def _unlink(self, garment):
+        """Take the edge over garment out of the graph. Returns the garment that was over it."""
+        cover = self.covers.pop(garment, None)
+        if cover is not None:
+            layer = self.under[cover]
+            layer.remove(garment)
+            if not layer:
+                del self.under[cover]
+        return cover
+
+    def load_covers(self):
+        """Build the cover graph from each worn garment's `db.covered_by`, dropping any that would loop."""
+        for garment in list(self.types):
+            cover = garment.db.covered_by
+            if cover and not self.cover(garment, cover):
+                garment.db.covered_by = None
+
+    def prune(self):
+        """Drop garments no longer on the character."""
+        for garment in [garment for garment in self.types if garment.location != self.character]:
+            self.discard(garment)
+
+    def count(self, clothing_type=None):
+        """Number of garments worn of clothing_type, or of all types if None."""
+        self.prune()
+        if clothing_type is None:
+            return len(self.types)
+        return len(self.slots.get(clothing_type, ()))
+
+    def items(self):
+        """Every garment worn, ordered by CLOTHING_TYPE_ORDER."""
+        self.prune()
+        ordered = []
+        for clothing_type in sorted(self.slots, key=lambda each: _TYPE_RANK.get(each, _LAST)):
+            ordered.extend(self.slots[clothing_type])
+        return ordered
+
+
+def worn_index(character):
+    """
+    The WornIndex of a character, built from what they carry on first use.
+
+    Args:
+        character (obj): The character to get the index of.
+
+    Returns:
+        index (WornIndex): Kept on the character until `invalidate()`.
+    """
+    index = character.ndb.worn_index
+    if index is None:
+        index = character.ndb.worn_index = WornIndex(character)
+        for thing in character.contents:
+            if thing.db.worn:
+                index.add(thing)
+        index.load_covers()
+    return index
+
+
+def invalidate(character):
+    """Drop a character's worn index, e.g. after changing a worn garment's clothing type."""
+    character.ndb.worn_index = None
+
+
 def order_clothes_list(clothes_list):
     """
     Orders a given clothes list by the order specified in CLOTHING_TYPE_ORDER.
@@ -91,20 +278,9 @@ def order_clothes_list(clothes_list):
                                      according to the hierarchy of clothing types
                                      specified in CLOTHING_TYPE_ORDER.
     """
-    ordered_clothes_list = clothes_list
-    # For each type of clothing that exists...
-    for current_type in reversed(CLOTHING_TYPE_ORDER):
-        # Check each item in the given clothes list.
-        for clothes in clothes_list:
-            # If the item has a clothing type...
-            if clothes.db.clothing_type:
-                item_type = clothes.db.clothing_type
-                # And the clothing type matches the current type...
-                if item_type == current_type:
-                    # Move it to the front of the list!
-                    ordered_clothes_list.remove(clothes)
-                    ordered_clothes_list.insert(0, clothes)
-    return ordered_clothes_list
+    # A stable sort keeps clothes of the same type in the order given.
+    clothes_list.sort(key=lambda clothes: _TYPE_RANK.get(clothes.db.clothing_type, _LAST))
+    return clothes_list
 
 
 def get_worn_clothes(character, exclude_covered=False):
@@ -122,16 +298,11 @@ def get_worn_clothes(character, exclude_covered=False):
                                      the CLOTHING_TYPE_ORDER option specified
                                      in this module.
     """
-    clothes_list = []
-    for thing in character.contents:
-        # If uncovered or not excluding covered items
-        if not thing.db.covered_by or exclude_covered is False:
-            # If 'worn' is True, add to the list
-            if thing.db.worn:
-                clothes_list.append(thing)
-    # Might as well put them in order here too.
-    ordered_clothes_list = order_clothes_list(clothes_list)
-    return ordered_clothes_list
+    clothes_list = worn_index(character).items()
+    if exclude_covered:
+        index = worn_index(character)
+        clothes_list = [garment for garment in clothes_list if index.visible(garment)]
+    return clothes_list
 
 
 def clothing_type_count(clothes_list):
@@ -201,14 +372,18 @@ class Item(Consumable):
         """
         # Set clothing as worn
         self.db.worn = wearstyle
+        index = worn_index(wearer)
+        index.prune()
+        index.add(self)
+        inventory.invalidate(wearer)
         # Auto-cover appropriate clothing types, as specified above
         to_cover = []
         if self.db.clothing_type and self.db.clothing_type in CLOTHING_TYPE_AUTOCOVER:
-            for garment in get_worn_clothes(wearer):
-                if garment.db.clothing_type and garment.db.clothing_type \
-                        in CLOTHING_TYPE_AUTOCOVER[self.db.clothing_type]:
-                    to_cover.append(garment)
-                    garment.db.covered_by = self
+            for clothing_type in CLOTHING_TYPE_AUTOCOVER[self.db.clothing_type]:
+                for garment in list(index.slots.get(clothing_type, ())):
+                    # Only the top layer gets covered; layers under it stay where they are.
+                    if index.cover_of(garment) is None and index.cover(garment, self):
+                        to_cover.append(garment)
         if quiet:
             return
         # Otherwise, display a message to the room
@@ -228,15 +403,10 @@ class Item(Consumable):
             quiet (bool): If false, does not message the room
         """
         self.db.worn = False
+        inventory.invalidate(wearer)
         remove_message = "{wearer} removes {item}."
-        uncovered_list = []
-
-        # Check to see if any other clothes are covered by this object.
-        for thing in wearer.contents:
-            # If anything is covered by
-            if thing.db.covered_by == self:
-                thing.db.covered_by = False
-                uncovered_list.append(thing.name)
+        # Anything covered by this object is uncovered.
+        uncovered_list = [thing.name for thing in worn_index(wearer).discard(self)]
         if len(uncovered_list) > 0:
             remove_message = "{wearer} removes {item}, revealing %s." % list_to_string(uncovered_list)
         # Echo a message to the room
@@ -251,6 +421,7 @@ class Item(Consumable):
         """
         super(Item, self).at_get(getter)
         self.db.worn = False
+        worn_index(getter).discard(self)
 
 # COMMANDS START HERE
 
@@ -290,13 +461,14 @@ class CmdWear(MuxCommand):
             return
 
         # Enforce overall clothing limit.
-        if CLOTHING_OVERALL_LIMIT and len(get_worn_clothes(char)) >= CLOTHING_OVERALL_LIMIT:
+        index = worn_index(char)
+        if CLOTHING_OVERALL_LIMIT and index.count() >= CLOTHING_OVERALL_LIMIT:
             char.msg("You can't wear any more clothes.")
             return
 
         # Apply individual clothing type limits.
         if clothing.db.clothing_type and not clothing.db.worn:
-            type_count = single_type_count(get_worn_clothes(char), clothing.db.clothing_type)
+            type_count = index.count(clothing.db.clothing_type)
             if clothing.db.clothing_type in CLOTHING_TYPE_LIMIT.keys():
                 if type_count >= CLOTHING_TYPE_LIMIT[clothing.db.clothing_type]:
                     char.msg("You can't wear any more clothes of the type '%s'." % clothing.db.clothing_type)
@@ -341,8 +513,9 @@ class CmdRemove(MuxCommand):
         if not clothing.db.worn:
             char.msg("You're not wearing that!")
             return
-        if clothing.db.covered_by:
-            char.msg("You have to take off %s first." % clothing.db.covered_by.name)
+        index = worn_index(char)
+        if not index.visible(clothing):
+            char.msg("You have to take off %s first." % index.outermost(clothing).name)
             return
         clothing.remove(char)
 
@@ -391,21 +564,25 @@ class CmdCover(MuxCommand):
         if to_cover == cover_with:
             char.msg("You can't cover an item with itself!")
             return
-        if cover_with.db.covered_by:
+        index = worn_index(char)
+        if index.cover_of(cover_with):
             char.msg("{} is covered by something else!".format(cover_with.get_display_name(char)))
             return
-        if to_cover.db.covered_by:
+        if index.cover_of(to_cover):
             char.msg("{item} is already covered by {cover}.".format(
-                item=cover_with.get_display_name(char),
-                cover=to_cover.db.covered_by.get_display_name(char)))
+                item=to_cover.get_display_name(char),
+                cover=index.cover_of(to_cover).get_display_name(char)))
             return
         if not cover_with.db.worn:
             cover_with.wear(char, True)  # Put on the item to cover with if it's not on already
+        if not index.cover(to_cover, cover_with):
+            char.msg("You can't cover {item} with {cover}; it's already on top of it!".format(
+                item=to_cover.get_display_name(char), cover=cover_with.get_display_name(char)))
+            return
         char.location.msg_contents("{wearer} covers {item} with {cover}.",
                                    mapping=dict(wearer=char,
                                                 item=to_cover.get_display_name(char),
                                                 cover=cover_with.get_display_name(char)))
-        to_cover.db.covered_by = cover_with
 
 
 class CmdUncover(MuxCommand):
@@ -438,15 +615,16 @@ class CmdUncover(MuxCommand):
         if not to_uncover.db.worn:
             char.msg("You're not wearing {item}!".format(item=to_uncover.get_display_name(char)))
             return
-        if not to_uncover.db.covered_by:
+        index = worn_index(char)
+        covered_by = index.cover_of(to_uncover)
+        if not covered_by:
             char.msg("{item} isn't covered by anything!".format(item=to_uncover.get_display_name(char)))
             return
-        covered_by = to_uncover.db.covered_by
-        if covered_by.db.covered_by:
+        if index.cover_of(covered_by):
             char.msg("{item} is under too many layers to uncover.".format(item=to_uncover.get_display_name(char)))
             return
         char.location.msg_contents("{wearer} uncovers {item}.", mapping=dict(wearer=char, item=to_uncover))
-        to_uncover.db.covered_by = None
+        index.uncover(to_uncover)
 
 
 class CmdGive(MuxCommand):
@@ -489,10 +667,11 @@ class CmdGive(MuxCommand):
             char.msg("You are not holding {it}.".format(it=to_give.get_display_name(char)))
             return
         # This is new! Can't give away something that's worn.
-        if to_give.db.covered_by:
+        covered_by = worn_index(char).cover_of(to_give)
+        if covered_by:
             verb = 'drop {verb}' if drop else 'give {verb} away'
             verb = verb.format(verb=to_give.get_display_name(char))
-            char.msg("You can't %s because it's covered by %s." % (verb, to_give.db.covered_by.get_display_name(char)))
+            char.msg("You can't %s because it's covered by %s." % (verb, covered_by.get_display_name(char)))
             return
         # Remove clothes if they're given or dropped.
         if to_give.db.worn:
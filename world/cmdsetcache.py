@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+"""
+Merged cmdset cache
+
+Every command entered triggers a merge of the Session, Account and
+Character cmdsets with those of the room (`CmdSetRoomDir` or
+`CmdSetGridRoom`), each Exit and every object in reach that carries
+a cmdset (mailbox, dice, vehicle, poll, talk, bot...). In a room that
+does not change, that merge produces the same result every time.
+
+This module wraps Evennia's `get_and_merge_cmdsets` so the merge is
+only done when the stack of contributing cmdsets changes. The cache
+key is the ordered list of (object id, version, current cmdset) for
+every contributor:
+
+    * The current cmdset of a handler is rebuilt by Evennia each time
+      a cmdset is added, removed or deleted, so holding on to it and
+      comparing by identity notices any cmdset change.
+    * The version is bumped by `invalidate(obj)`, called when a
+      character moves and when a location receives or loses an
+      object (exits being added or removed).
+
+Call `install()` once at server start (see `at_server_start`).
+"""
+from twisted.internet.defer import succeed
+
+_ORIGINAL_MERGE = None  # Evennia's own get_and_merge_cmdsets, set by install()
+_VERSIONS = {}  # Object id: version, bumped by invalidate()
+_CACHE = {}  # (callertype, caller): (stack, cmdsets, merged cmdset)
+STATS = {'hits': 0, 'misses': 0}
+
+
+def invalidate(obj):
+    """
+    Bump the cmdset version of obj, forcing a new merge for any
+    caller whose cmdset stack includes it.
+
+    Args:
+        obj (Object): Character, room, exit or other contributor.
+    """
+    if obj is None or not getattr(obj, 'id', None):
+        return
+    _VERSIONS[obj.id] = _VERSIONS.get(obj.id, 0) + 1
+
+
+def forget(caller):
+    """Drop any cached merge for caller; called when a session disconnects or a character is unpuppeted."""
+    for key in [key for key in _CACHE if key[1] is caller]:
+        del _CACHE[key]
+
+
+def clear():
+    """Drop every cached merge."""
+    _CACHE.clear()
+
+
+def _local_objects(caller, obj):
+    """
+    The location, everything in it and everything obj carries that
+    contributes a cmdset to caller, in the order Evennia gathers them.
+    """
+    location = obj.location
+    local = obj.contents_get()
+    if location:
+        local = location.contents_get(exclude=obj) + local + [location]
+    contributors = []
+    for lobj in local:
+        if getattr(lobj, '_is_deleted', False):
+            continue
+        lobj.at_cmdset_get(caller=caller)  # Lets exits build their cmdset if missing.
+        if lobj.cmdset.current and lobj.access(caller, access_type='call', no_superuser_bypass=True):
+            contributors.append(lobj)
+    return contributors
+
+
+def _stack(caller, session, account, obj, callertype):
+    """
+    Build the ordered cmdset stack for this caller.
+
+    Returns:
+        stack (tuple): (object id, version, id of current cmdset) per contributor.
+        cmdsets (list): The current cmdsets themselves. Kept alive with the
+            cached entry so their ids can not be reused by new cmdsets.
+    """
+    from evennia.comms.channelhandler import CHANNELHANDLER
+    stack, cmdsets = [callertype], []
+    if session:
+        cmdsets.append(session.cmdset.current)
+        stack.append(('session', session.sessid, id(cmdsets[-1])))
+    if account:
+        cmdsets.append(CHANNELHANDLER.get_cmdset(account))
+        stack.append(('channels', account.id, id(cmdsets[-1])))
+    contributors = [account] if account else []
+    if obj:
+        contributors += [obj] + _local_objects(caller, obj)
+    for each in contributors:
+        cmdsets.append(each.cmdset.current)
+        stack.append((each.id, _VERSIONS.get(each.id, 0), id(cmdsets[-1])))
+    return tuple(stack), cmdsets
+
+
+def get_and_merge_cmdsets(caller, session, account, obj, callertype, raw_string):
+    """
+    Drop-in replacement for Evennia's `get_and_merge_cmdsets` that
+    returns the previous merge when the cmdset stack is unchanged.
+
+    Returns:
+        deferred (Deferred): Fires with the merged cmdset.
+    """
+    stack, cmdsets = _stack(caller, session, account, obj, callertype)
+    key = (callertype, caller)
+    cached = _CACHE.get(key)
+    if cached and cached[0] == stack:
+        STATS['hits'] += 1
+        return succeed(cached[2])
+    STATS['misses'] += 1
+
+    def store(merged):
+        _CACHE[key] = (stack, cmdsets, merged)
+        return merged
+
+    return _ORIGINAL_MERGE(caller, session, account, obj, callertype, raw_string).addCallback(store)
+
+
+def install():
+    """Swap the cached merge into Evennia's command handler."""
+    global _ORIGINAL_MERGE
+    from evennia.commands import cmdhandler
+    if _ORIGINAL_MERGE is None:
+        _ORIGINAL_MERGE = cmdhandler.get_and_merge_cmdsets
+        cmdhandler.get_and_merge_cmdsets = get_and_merge_cmdsets
@@ -0,0 +1,464 @@
+# -*- coding: utf-8 -*-
+"""
+Combat sessions
+
+A fight used to keep its state in a dozen `db.Combat_*` Attributes on
+every fighter, several of them rewritten by each action. A
+`CombatSession` holds the state of every participant of one fight in
+plain Python structures instead, keyed by the room the fight is in.
+
+The session is saved as a single `combat_session` Attribute on the
+room by `snapshot_all()`, run by a ticker every
+`settings.COMBAT_SNAPSHOT_INTERVAL` seconds and at server stop, and by
+`end()` when the fight is over. `restore_all()` rebuilds the running
+sessions from those snapshots at server start, so a fight survives a
+reload with at most one interval of changes lost.
+
+Ranges between fighters are kept in one symmetric NumPy matrix per
+fight, indexed by each fighter's slot in the turn order, so a move is a
+single row and column update. Engage groups (fighters at range 0 to each
+other, directly or through others) are the connected components of the
+engaged mask, worked out once per change of the matrix.
+
+Each session keeps a heap of deadlines: the end of the current turn and
+the time left to defend against an incoming attack. Actions that happen
+at the same moment, such as defenses, are queued with `queue()`. The
+`TURN_SCHEDULER` in world/turns.py drives every running session from
+one ticker: it expires deadlines, resolves queued actions in a batch
+and passes the turn on.
+
+Everything that happens in a fight is written to its combat log with
+`record()` (see world/combatlog.py).
+
+Example:
+    ```python
+    >>> session = combat.start(room, fighters)
+    >>> fighter = combat.fighter(caller)
+    >>> fighter.actions -= 1
+    >>> session.range(caller, target)
+    2
+    >>> session.step_toward(caller, target)
+    >>> session.engage_group(caller)
+    [caller, target]
+    ```
+"""
+import heapq
+import numpy as np
+from time import time
+from django.conf import settings
+from evennia.objects.models import ObjectDB
+from evennia.utils import logger
+from typeclasses.traits import _detach
+from world import allies, combatlog, rules
+
+SNAPSHOT_ATTRIBUTE = 'combat_session'
+START_RANGE = 2  # Steps between fighters when they join a fight.
+MAX_RANGE = 10  # Farthest range, 'Remote', in rooms without a RoomSize.
+
+_SESSIONS = {}  # Room: its running CombatSession
+_FIGHTING = {}  # Fighter: the CombatSession they are in
+
+
+def get(obj):
+    """The running CombatSession of a room or fighter, or None."""
+    return _SESSIONS.get(obj) or _FIGHTING.get(obj)
+
+
+def sessions():
+    """Every running CombatSession."""
+    return list(_SESSIONS.values())
+
+
+def fighter(obj):
+    """The combat state of obj if it is in a fight, or None."""
+    session = _FIGHTING.get(obj)
+    return session.state[obj] if session else None
+
+
+def start(room, fighters):
+    """Start a fight in room between fighters, in turn order."""
+    session = CombatSession(room)
+    for each in fighters:
+        session.join(each)
+    session.start_turn()
+    return session
+
+
+def snapshot_all(*args, **kwargs):
+    """Save every running session that changed, each settings.COMBAT_SNAPSHOT_INTERVAL seconds."""
+    for session in list(_SESSIONS.values()):
+        try:
+            session.snapshot()
+        except Exception:
+            logger.log_trace('Combat snapshot failed in {}.'.format(session.room))
+
+
+def restore_all():
+    """Rebuild the sessions of unfinished fights from their snapshots."""
+    for room in ObjectDB.objects.filter(db_attributes__db_key=SNAPSHOT_ATTRIBUTE):
+        data = room.attributes.get(SNAPSHOT_ATTRIBUTE)
+        if data and not data.get('ended') and room not in _SESSIONS:
+            session = CombatSession.from_dict(room, data)
+            session.set_deadlines()
+
+
+def _has_hp(obj):
+    """True if obj has a health trait above zero."""
+    return bool(obj.traits.health and obj.traits.health.actual > 0)
+
+
+class Fighter(object):
+    """
+    Combat state of one fighter.
+
+    Attributes:
+        obj (Object): the fighter
+        actions (int): actions left this turn
+        moves (int): movement steps left this turn
+        last_action (str): last action taken; 'null' before the first
+        second (tuple): (attack type, effects) of a pending second attack
+        incoming_attack (tuple): attack waiting for this fighter's defense
+        charged (list): names of charged special moves
+        conditions (dict): active combat conditions, with the number of
+            this fighter's turns they still last
+        used_special (bool): a special move was used this turn
+    """
+    FIELDS = ('actions', 'moves', 'last_action', 'second',
+              'incoming_attack', 'charged', 'conditions', 'used_special')
+
+    def __init__(self, obj, actions=0, moves=0, last_action='null', second=None,
+                 incoming_attack=None, charged=None, conditions=None, used_special=False):
+        self.obj = obj
+        self.defend_by = None  # Deadline to answer incoming_attack; not saved
+        self.actions = actions
+        self.moves = moves
+        self.last_action = last_action
+        self.second = second
+        self.incoming_attack = incoming_attack
+        self.charged = charged or []
+        self.conditions = conditions or {}
+        self.used_special = used_special
+
+    def to_dict(self):
+        """Plain copy of the state, as stored in a snapshot."""
+        data = dict((field, getattr(self, field)) for field in self.FIELDS)
+        data.update(charged=list(self.charged), conditions=dict(self.conditions))
+        return data
+
+
+class CombatSession(object):
+    """
+    State of one fight, held in memory.
+
+    Args:
+        room (Object): where the fight takes place
+
+    Attributes:
+        fighters (list): fighters in turn order; their index is their slot
+        state (dict): `Fighter` state, keyed by fighter
+        slots (dict): slot of each fighter in `fighters` and `ranges`
+        ranges (ndarray): symmetric matrix of steps between fighter slots
+        turn (int): index in `fighters` of whose turn it is
+        turn_started (float): when the current turn began
+        turn_by (float): deadline of the current turn
+        deadlines (list): heap of (deadline, kind, fighter)
+        pending (list): queued (function, args) to resolve on the next tick
+    """
+    def __init__(self, room):
+        self.room = room
+        self.fighters = []
+        self.state = {}
+        self.slots = {}
+        self.ranges = np.zeros((0, 0), dtype=int)
+        self.turn = 0
+        self.started = time()
+        self.turn_started = self.turn_by = None
+        self.deadlines = []
+        self.pending = []
+        self._groups = None  # Engage group labels per slot, until ranges change
+        self._teams = None  # (allies version, Teams), until fighters or alliances change
+        self._saved = None  # The last snapshot written
+        _SESSIONS[room] = self
+
+    @classmethod
+    def from_dict(cls, room, data):
+        """Rebuild a session from a snapshot, dropping fighters since deleted."""
+        data = _detach(data)  # Plain copies, so changes stay in memory until the next snapshot.
+        session = cls(room)
+        session.started = data.get('started', session.started)
+        kept = []
+        for index, obj in enumerate(data['fighters']):
+            if obj is None or obj.location != room:
+                continue
+            kept.append(index)
+            session.fighters.append(obj)
+            session.state[obj] = Fighter(obj, **data['state'].get(obj, {}))
+            _FIGHTING[obj] = session
+        session.slots = dict((obj, slot) for slot, obj in enumerate(session.fighters))
+        session.ranges = np.array(data['ranges'], dtype=int).reshape(
+            len(data['fighters']), len(data['fighters']))[np.ix_(kept, kept)]
+        session.turn = min(data.get('turn', 0), max(len(session.fighters) - 1, 0))
+        session._saved = data
+        session.record('resume', fighters=[rules.ref(obj) for obj in session.fighters],
+                       ranges=session.ranges.tolist())
+        return session
+
+    def to_dict(self):
+        """Plain data of the whole fight, as stored in a snapshot."""
+        return dict(fighters=list(self.fighters), turn=self.turn, started=self.started,
+                    ranges=self.ranges.tolist(),
+                    state=dict((obj, self.state[obj].to_dict()) for obj in self.fighters))
+
+    @property
+    def current(self):
+        """The fighter whose turn it is."""
+        return self.fighters[self.turn] if self.fighters else None
+
+    def join(self, obj):
+        """Add obj to the fight, START_RANGE steps from everyone."""
+        if obj in self.state:
+            return self.state[obj]
+        size = len(self.fighters)
+        ranges = np.full((size + 1, size + 1), START_RANGE, dtype=int)
+        ranges[:size, :size] = self.ranges
+        ranges[size, size] = 0
+        self.ranges, self._groups = ranges, None
+        self.slots[obj] = size
+        self.fighters.append(obj)
+        self.state[obj] = Fighter(obj)
+        self._teams = None
+        _FIGHTING[obj] = self
+        self.record('join', fighter=rules.ref(obj), stats=rules.stats(obj), hp=rules.hp(obj),
+                    ranges=self.ranges[size].tolist())
+        return self.state[obj]
+
+    def leave(self, obj):
+        """Remove obj from the fight."""
+        if obj not in self.state:
+            return
+        index = self.slots[obj]
+        self.fighters.remove(obj)
+        del self.state[obj]
+        _FIGHTING.pop(obj, None)
+        self.ranges = np.delete(np.delete(self.ranges, index, 0), index, 1)
+        self.slots = dict((each, slot) for slot, each in enumerate(self.fighters))
+        self._groups = self._teams = None
+        if index < self.turn:
+            self.turn -= 1
+        if self.turn >= len(self.fighters):
+            self.turn = 0
+        self.record('leave', fighter=rules.ref(obj))
+
+    # Teams
+
+    @property
+    def teams(self):
+        """The fighters' `Teams` of allies, rebuilt when fighters or alliances change."""
+        if self._teams is None or self._teams[0] != allies.version():
+            self._teams = (allies.version(), allies.Teams(self.fighters))
+        return self._teams[1]
+
+    def hostile(self, obj, other):
+        """True if obj acts against other in this fight."""
+        return self.teams.hostile(obj, other)
+
+    # Ranges
+
+    @property
+    def max_range(self):
+        """Farthest two fighters can be apart in this room."""
+        return self.room.db.RoomSize or MAX_RANGE
+
+    def range(self, obj, other):
+        """Steps between two fighters."""
+        return int(self.ranges[self.slots[obj], self.slots[other]])
+
+    def set_range(self, obj, other, steps):
+        """Set the steps between two fighters, both ways."""
+        first, second = self.slots[obj], self.slots[other]
+        if first != second:
+            self.ranges[first, second] = self.ranges[second, first] = max(0, min(steps, self.max_range))
+            self._groups = None
+
+    def _move(self, obj, row):
+        """Replace the row and column of obj's slot with new ranges."""
+        slot = self.slots[obj]
+        row = np.clip(row, 0, self.max_range)
+        row[slot] = 0
+        self.ranges[slot, :] = row
+        self.ranges[:, slot] = row
+        self._groups = None
+
+    def step_toward(self, mover, target):
+        """
+        Move one step toward target, also closing on every fighter that is
+        closer to target than to mover, and backing off from those farther.
+        """
+        row, target_row = self.ranges[self.slots[mover]], self.ranges[self.slots[target]]
+        step = np.where(row > target_row, -1, np.where(row < target_row, 1, 0))
+        step[self.slots[target]] = -1
+        self._move(mover, row + step)
+
+    def step_away(self, mover, target):
+        """
+        Move one step away from target, also backing off from fighters
+        between mover and target and from anyone engaged with either.
+        """
+        slot, target_slot = self.slots[mover], self.slots[target]
+        row, target_row = self.ranges[slot].copy(), self.ranges[target_slot]
+        others = np.ones(len(row), dtype=bool)
+        others[[slot, target_slot]] = False
+        row += others & (row >= target_row) & (row < row[target_slot])
+        row += others & (target_row == 0)
+        row += others & (row == 0)
+        row[target_slot] += 1
+        self._move(mover, row)
+
+    def _group_labels(self):
+        """Label each slot with the lowest slot of its engage group."""
+        if self._groups is None:
+            engaged = self.ranges == 0
+            labels = np.arange(len(self.fighters))
+            while True:
+                spread = np.where(engaged, labels[np.newaxis, :], len(labels)).min(axis=1)
+                if np.array_equal(spread, labels):
+                    break
+                labels = spread
+            self._groups = labels
+        return self._groups
+
+    def engage_group(self, obj):
+        """Fighters engaged with obj, directly or through others, obj included."""
+        labels = self._group_labels()
+        label = labels[self.slots[obj]]
+        return [self.fighters[slot] for slot in np.flatnonzero(labels == label)]
+
+    def engage_groups(self):
+        """Every engage group, in turn order of their first fighter."""
+        labels = self._group_labels()
+        return [[self.fighters[slot] for slot in np.flatnonzero(labels == label)]
+                for label in np.unique(labels)]
+
+    # Turns
+
+    def start_turn(self):
+        """Give the current fighter their action, movement and deadline."""
+        obj = self.current
+        if obj is None:
+            return
+        state = self.state[obj]
+        state.actions = 1
+        state.moves = int(obj.db.MOB or 0) // 2
+        state.used_special = False
+        state.conditions = dict((name, turns - 1) for name, turns in state.conditions.items() if turns > 1)
+        self.turn_started = time()
+        self.turn_by = self.turn_started + settings.COMBAT_TURN_TIMEOUT
+        heapq.heappush(self.deadlines, (self.turn_by, 'turn', obj))
+        self.record('turn', fighter=rules.ref(obj), moves=state.moves, conditions=state.conditions)
+
+    def expect_defense(self, obj):
+        """Start the clock for obj to answer its incoming attack."""
+        state = self.state[obj]
+        state.defend_by = time() + settings.COMBAT_DEFEND_TIMEOUT
+        heapq.heappush(self.deadlines, (state.defend_by, 'defend', obj))
+
+    def set_deadlines(self):
+        """Give the current turn and open defenses fresh deadlines, e.g. after a restore."""
+        self.deadlines = []
+        if self.current is not None:
+            self.turn_started = time()
+            self.turn_by = self.turn_started + settings.COMBAT_TURN_TIMEOUT
+            heapq.heappush(self.deadlines, (self.turn_by, 'turn', self.current))
+        for obj in self.fighters:
+            if self.state[obj].incoming_attack:
+                self.expect_defense(obj)
+
+    def expired(self, now):
+        """
+        Pop the deadlines that have passed and still apply.
+
+        Returns:
+            expired (list): (kind, fighter) for each missed turn or defense.
+        """
+        expired = []
+        while self.deadlines and self.deadlines[0][0] <= now:
+            due, kind, obj = heapq.heappop(self.deadlines)
+            if obj not in self.state:
+                continue
+            if kind == 'turn' and obj is self.current and due == self.turn_by:
+                expired.append((kind, obj))
+            elif kind == 'defend' and self.state[obj].incoming_attack and due == self.state[obj].defend_by:
+                expired.append((kind, obj))
+        return expired
+
+    def queue(self, func, *args):
+        """Queue func(*args) to be resolved with the others on the next tick."""
+        self.pending.append((func, args))
+
+    def resolve_pending(self):
+        """Run every queued action in order. Returns how many ran."""
+        pending, self.pending = self.pending, []
+        for func, args in pending:
+            func(*args)
+        return len(pending)
+
+    def turn_done(self):
+        """
+        True when the current fighter has spent their actions, has no second
+        attack to make and no attack is open. Movement left over does not
+        hold the turn: moving is for before acting, so a fighter does not
+        have to pass to end their turn.
+        """
+        state = self.state.get(self.current)
+        if state is None:
+            return True
+        if state.actions > 0 or state.second or self.pending:
+            return False
+        return not any(self.state[obj].incoming_attack for obj in self.fighters)
+
+    def next_turn(self):
+        """Pass the turn on to the next fighter able to act, or end the fight."""
+        state = self.state.get(self.current)
+        if state is not None:
+            state.moves = 0  # Movement left over is forfeited with the turn.
+        if self.is_over():
+            self.end()
+            return None
+        for _ in range(len(self.fighters)):
+            self.turn = (self.turn + 1) % len(self.fighters)
+            if _has_hp(self.current):
+                break
+        self.start_turn()
+        self.room.msg_contents("It is now %s's turn." % self.current)
+        return self.current
+
+    def is_over(self):
+        """True if fewer than two fighters can fight, or everyone disengaged."""
+        able = [obj for obj in self.fighters if _has_hp(obj)]
+        if len(able) < 2:
+            return True
+        return all(self.state[obj].last_action == 'disengage' for obj in able)
+
+    def record(self, kind, **data):
+        """Log an event of kind with data in this fight's combat log."""
+        combatlog.record(self, kind, **data)
+
+    def snapshot(self):
+        """Save the fight to the room's snapshot Attribute, if it changed."""
+        data = self.to_dict()
+        if data != self._saved:
+            self.room.attributes.add(SNAPSHOT_ATTRIBUTE, data)
+            self._saved = data
+
+    def end(self):
+        """End the fight, saving its final state."""
+        data = self.to_dict()
+        data['ended'] = time()
+        self.room.attributes.add(SNAPSHOT_ATTRIBUTE, data)
+        self.record('end', survivors=[rules.ref(obj) for obj in self.fighters if _has_hp(obj)])
+        combatlog.close(self)
+        for obj in self.fighters:
+            _FIGHTING.pop(obj, None)
+            allies.forget(obj)
+        _SESSIONS.pop(self.room, None)
+        self.room.msg_contents("The fight is over.")
@@ -0,0 +1,187 @@
+# -*- coding: utf-8 -*-
+"""
+Combat log
+
+Every fight keeps an append-only log of what happens in it: fighters
+joining and leaving, each turn, every action, the seed each roll was
+made from with its result, and the state it changed (HP before and
+after, the mover's new ranges). Events are written as one JSON object
+per line, one file per fight in `settings.COMBAT_LOG_DIR`, named after
+the room and the moment the fight started.
+
+Events are kept in memory and appended to the file in batches: once
+`settings.COMBAT_LOG_BATCH` are waiting, every
+`settings.COMBAT_LOG_FLUSH_INTERVAL` seconds by a ticker, when the
+fight ends and at server stop.
+
+`replay()` runs the rolls of a logged fight through world/rules.py
+again and lists every outcome that comes out different. Use it to
+settle a dispute over a fight, or to see which past fights a rule
+change would have changed. From the game directory:
+
+    python -m world.combatlog server/logs/combat/12-1500000000000.jsonl
+"""
+import argparse
+import json
+import os
+import sys
+from random import Random
+from time import time
+from django.conf import settings
+from world import rules
+from world.helpers import append_jsonl
+
+_LOGS = {}  # CombatSession: its CombatLog
+
+
+def _count_lines(path):
+    """Number of lines in the file at path, or 0 if there is none."""
+    if not os.path.exists(path):
+        return 0
+    with open(path) as handle:
+        return sum(1 for _ in handle)
+
+
+class CombatLog(object):
+    """
+    The event log of one fight.
+
+    Args:
+        path (str): File the events are appended to. Numbering goes on
+            from the events already in it, as when a fight is resumed
+            after a reload.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.buffer = []
+        self.seq = _count_lines(path)
+        self.written = 0
+
+    def record(self, kind, **data):
+        """Add an event of kind with data, written with the next batch."""
+        self.seq += 1
+        data.update(seq=self.seq, t=round(time(), 3), kind=kind)
+        self.buffer.append(data)
+        if len(self.buffer) >= settings.COMBAT_LOG_BATCH:
+            self.flush()
+
+    def flush(self):
+        """Append the waiting events to the file. Returns how many were written."""
+        count, self.buffer = append_jsonl(self.path, self.buffer), []
+        self.written += count
+        return count
+
+
+def path(session):
+    """The log file of a fight."""
+    name = '%s-%d.jsonl' % (session.room.id, int(session.started * 1000))
+    return os.path.join(settings.COMBAT_LOG_DIR, name)
+
+
+def get(session):
+    """The CombatLog of a running fight, opened on first use."""
+    log = _LOGS.get(session)
+    if log is None:
+        log = _LOGS[session] = CombatLog(path(session))
+    return log
+
+
+def record(session, kind, **data):
+    """Log an event of kind in the fight of session."""
+    get(session).record(kind, **data)
+
+
+def close(session):
+    """Write out and forget the log of a finished fight."""
+    log = _LOGS.pop(session, None)
+    if log:
+        log.flush()
+
+
+def flush_all(*args, **kwargs):
+    """Write out the waiting events of every fight; run by the 'combat_log' ticker and at server stop."""
+    for log in list(_LOGS.values()):
+        log.flush()
+
+
+def read(filename):
+    """The events in a log file, in order."""
+    with open(filename) as handle:
+        return [json.loads(line) for line in handle if line.strip()]
+
+
+def replay(events):
+    """
+    Run the rolls of logged events through the rules again.
+
+    Args:
+        events (list): Events as returned by `read()`.
+
+    Returns:
+        report (dict): 'events' read, outcomes 'checked' and
+            'mismatches', a list of (seq, kind, field, logged, replayed).
+    """
+    report = {'events': len(events), 'checked': 0, 'mismatches': []}
+
+    def check(event, field, replayed):
+        report['checked'] += 1
+        if event[field] != replayed:
+            report['mismatches'].append((event['seq'], event['kind'], field, event[field], replayed))
+
+    for event in events:
+        kind = event['kind']
+        if kind == 'attack':
+            check(event, 'roll', rules.attack_roll(event['stat'], event['steps'], event['attack_type'],
+                                                   event['effects'], event['conditions'], Random(event['seed'])))
+        elif kind == 'defend':
+            defense = 0
+            if event['defense_type'] != 'endure':
+                defense = rules.defense_roll(event['stat'], event['conditions'], Random(event['seed']))
+            check(event, 'defense', defense)
+            dealt = rules.damage(event['attack'], defense, event['defense_type'],
+                                 event['attack_effects'], event['effects'])
+            check(event, 'damage', dealt)
+            check(event, 'hp_after', max(0, event['hp_before'] - dealt))
+        elif kind == 'move':
+            rng, blocker = Random(event['seed']), None
+            for other, stat in event['checks']:
+                if rules.roll(stat, rng) > rules.roll(event['mob'], rng):
+                    blocker = other
+                    break
+            check(event, 'blocked_by', blocker)
+        elif kind == 'area':
+            base, results = rules.area_attack(event['stats'], event['defenders'], event['ranges'],
+                                              event['attack_type'], event['effects'], Random(event['seed']))
+            check(event, 'roll', base)
+            check(event, 'results', [list(result) for result in results])
+            check(event, 'hp_after', [max(0, before - result[2])
+                                      for before, result in zip(event['hp_before'], results)])
+        elif kind == 'heal':
+            check(event, 'healed', rules.roll(event['spe'], Random(event['seed'])) + 1)
+    return report
+
+
+def format_report(filename, report):
+    """The report of `replay()` as lines of text."""
+    lines = ["%s: %i events, %i outcomes checked, %i different" %
+             (filename, report['events'], report['checked'], len(report['mismatches']))]
+    for seq, kind, field, logged, replayed in report['mismatches']:
+        lines.append("  #%s %s %s: logged %r, replayed %r" % (seq, kind, field, logged, replayed))
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    """Replay log files from the command line. Exits with 1 if any outcome differs."""
+    parser = argparse.ArgumentParser(description="Replay combat logs through the combat rules.")
+    parser.add_argument('files', nargs='+', help="combat log files")
+    args = parser.parse_args(argv)
+    different = 0
+    for filename in args.files:
+        report = replay(read(filename))
+        different += len(report['mismatches'])
+        print(format_report(filename, report))
+    sys.exit(1 if different else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+"""
+Game stats
+
+Counts of accounts, characters, rooms, exits, objects, areas and help
+entries, for the front page of the website and for MSSP crawlers. The
+front page used to count them with about seven queries on every load,
+and the MSSP table reported zeros.
+
+`refresh()` counts everything in one go, every
+`settings.GAME_STATS_INTERVAL` seconds from a ticker, and keeps the
+result in memory for `get()`. Who is connected right now is not counted
+but read from the session handler and the presence roster by `live()`.
+
+MSSP is answered by the Portal, a separate process without the Server's
+memory, so each refresh also writes the counts to
+`settings.GAME_STATS_FILE`. `mssp(name)` returns a function that reads
+a count from that file; Evennia calls it when a crawler asks.
+
+Example:
+    ```python
+    >>> gamestats.get()['rooms']
+    812
+    >>> MSSPTable = {"ROOMS": gamestats.mssp('rooms')}
+    ```
+"""
+import json
+import os
+from time import time
+from django.conf import settings
+
+FRONT_PAGE_RECENT = 8  # Recently connected accounts listed on the front page
+_STATS = {}  # Name: count, as of the last refresh
+_RECENT = {'connected': [], 'created': 0}  # Recent accounts, as of the last refresh
+_FILE = {'mtime': None, 'stats': {}}  # The Portal's copy of GAME_STATS_FILE
+
+
+def _count():
+    """Count everything with the database. Returns a dict of name: count."""
+    from evennia.accounts.models import AccountDB
+    from evennia.help.models import HelpEntry
+    from evennia.objects.models import ObjectDB
+    from evennia.typeclasses.tags import Tag
+    character = settings.BASE_CHARACTER_TYPECLASS
+    objects = ObjectDB.objects.all().count()
+    rooms = ObjectDB.objects.filter(db_location__isnull=True).exclude(db_typeclass_path=character).count()
+    exits = ObjectDB.objects.filter(db_location__isnull=False, db_destination__isnull=False).count()
+    characters = ObjectDB.objects.filter(db_typeclass_path=character).count()
+    return {
+        'accounts': AccountDB.objects.num_total_accounts(),
+        'objects': objects,
+        'rooms': rooms,
+        'exits': exits,
+        'characters': characters,
+        'others': objects - rooms - exits - characters,
+        'mobiles': ObjectDB.objects.typeclass_search('typeclasses.characters.NPC', include_children=True).count(),
+        'areas': Tag.objects.filter(db_category='area').values('db_key').distinct().count(),
+        'helpfiles': HelpEntry.objects.all().count(),
+    }
+
+
+def refresh(*args, **kwargs):
+    """Count everything again, and write the counts for the Portal. Run by the 'game_stats' ticker."""
+    from evennia.accounts.models import AccountDB
+    _STATS.update(_count())
+    _STATS['refreshed'] = time()
+    _RECENT['connected'] = list(AccountDB.objects.get_recently_connected_accounts()[:FRONT_PAGE_RECENT])
+    _RECENT['created'] = len(AccountDB.objects.get_recently_created_accounts())
+    folder = os.path.dirname(settings.GAME_STATS_FILE)
+    if folder and not os.path.isdir(folder):
+        os.makedirs(folder)
+    temp = settings.GAME_STATS_FILE + '.tmp'
+    with open(temp, 'w') as handle:
+        json.dump(_STATS, handle, sort_keys=True)
+    os.rename(temp, settings.GAME_STATS_FILE)  # Never leave the Portal a half-written file.
+
+
+def get():
+    """The counts as of the last refresh, counting now if there was none yet."""
+    if not _STATS:
+        refresh()
+    return dict(_STATS)
+
+
+def recent():
+    """
+    Returns:
+        recent (tuple): (accounts connected most recently, up to
+            FRONT_PAGE_RECENT; number of accounts created recently)
+    """
+    if not _STATS:
+        refresh()
+    return _RECENT['connected'], _RECENT['created']
+
+
+def live():
+    """
+    Who is connected now, from memory.
+
+    Returns:
+        live (dict): 'accounts' connected, 'characters' (names of their
+            puppets, '*ghost*' for accounts without one) and 'sessions'
+            (number of accounts connected).
+    """
+    from evennia.server.sessionhandler import SESSIONS
+    from world import presence
+    accounts = []
+    for session in SESSIONS.get_sessions():
+        account = session.get_account()
+        if account and account not in accounts:
+            accounts.append(account)
+    characters = [entry.key for entry in presence.online()]
+    puppeteers = set(session.get_account() for entry in presence.online() for session in entry.sessions)
+    characters += ['*ghost*' for account in accounts if account not in puppeteers]
+    return {'accounts': accounts, 'characters': characters, 'sessions': SESSIONS.account_count()}
+
+
+def read(name):
+    """A count as last written to settings.GAME_STATS_FILE, 0 if there is none; for the Portal."""
+    try:
+        mtime = os.path.getmtime(settings.GAME_STATS_FILE)
+    except OSError:
+        return 0
+    if mtime != _FILE['mtime']:
+        try:
+            with open(settings.GAME_STATS_FILE) as handle:
+                _FILE['stats'] = json.load(handle)
+            _FILE['mtime'] = mtime
+        except (IOError, ValueError):
+            return 0
+    return _FILE['stats'].get(name, 0)
+
+
+def mssp(name):
+    """A function returning the count name as a string, for the MSSP table."""
+    return lambda: str(read(name))
@@ -3,6 +3,8 @@ Helpers
 
 Methods that are helpful to have in a module.
 """
+import json
+import os
 
 
 def make_bar(value, maximum, length, gradient):
@@ -19,6 +21,29 @@ def make_bar(value, maximum, length, gradient):
     return barstring[:int(length) + 13] + "|n"
 
 
+def append_jsonl(path, rows):
+    """
+    Append rows to the file at path, one JSON object per line, making
+    its folder first if need be.
+
+    Args:
+        path (str): File to append to.
+        rows (iterable): Dicts to write, in order.
+
+    Returns:
+        count (int): Number of rows written.
+    """
+    lines = [json.dumps(row, sort_keys=True) + '\n' for row in rows]
+    if not lines:
+        return 0
+    folder = os.path.dirname(path)
+    if folder and not os.path.isdir(folder):
+        os.makedirs(folder)
+    with open(path, 'a') as handle:
+        handle.write(''.join(lines))
+    return len(lines)
+
+
 def mass_unit(value):
     """Present a suitable mass unit based on value"""
     if not value:
@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+"""
+Inventory view
+
+`inventory` used to put every carried item in one table, looking up
+each item's display name and mass. A character carrying hundreds of
+things got one huge table, worked out again on every call.
+
+An `InventoryView` sorts a character's inventory once: worn clothes
+apart, the rest stacked so identical items (same key, typeclass and
+description) show once with a count, stacks ordered by any key in
+`SORT_KEYS`. The view is kept in the character's ndb until
+`invalidate()`, called when something arrives, leaves or is put on or
+taken off, so showing another page only formats the
+`settings.INVENTORY_PAGE_SIZE` rows on it.
+
+Example:
+    ```python
+    >>> view = inventory.get(caller)
+    >>> stacks, number, pages = view.page(2, 'mass')
+    >>> stacks[0].name, stacks[0].count
+    ('rock', 12)
+    ```
+"""
+from django.conf import settings
+
+_CLOTHING = None
+
+
+def _clothing():
+    """world.clothing, imported on first use: it imports the typeclasses that invalidate views."""
+    global _CLOTHING
+    if _CLOTHING is None:
+        from world import clothing as _CLOTHING
+    return _CLOTHING
+
+
+class Stack(object):
+    """
+    Identical items carried, shown as one row.
+
+    Args:
+        items (list): The items, in the order they were received.
+    """
+    def __init__(self, items):
+        self.items = items
+        self.order = 0  # Position of the latest arrival among everything carried
+
+    @property
+    def first(self):
+        return self.items[0]
+
+    @property
+    def name(self):
+        return self.first.key
+
+    @property
+    def count(self):
+        return len(self.items)
+
+    @property
+    def mass(self):
+        """Mass of every item in the stack together."""
+        return sum(item.get_mass() for item in self.items if hasattr(item, 'get_mass'))
+
+
+# How stacks can be ordered: sort key function and whether largest goes first.
+SORT_KEYS = {
+    'name': (lambda stack: stack.name.lower(), False),
+    'mass': (lambda stack: stack.mass, True),
+    'count': (lambda stack: stack.count, True),
+    'new': (lambda stack: stack.order, True),
+}
+
+
+def _identity(item):
+    """Items with the same identity look alike and are stacked."""
+    return item.key, item.typeclass_path, item.db.desc_brief or item.db.desc or ''
+
+
+class InventoryView(object):
+    """
+    A character's inventory, worn clothes apart and the rest stacked.
+
+    Args:
+        character (obj): The character carrying it.
+    """
+    def __init__(self, character):
+        self.character = character
+        self.worn = _clothing().get_worn_clothes(character)
+        worn = set(self.worn)
+        stacks = {}
+        self.stacks = []
+        for order, item in enumerate(character.contents):
+            if item in worn:
+                continue
+            identity = _identity(item)
+            stack = stacks.get(identity)
+            if stack is None:
+                stack = stacks[identity] = Stack([])
+                self.stacks.append(stack)
+            stack.items.append(item)
+            stack.order = order  # Latest arrival in the stack
+        self.orders = {}  # Sort key: stacks in that order
+
+    def __len__(self):
+        return len(self.stacks)
+
+    def ordered(self, sort='name'):
+        """The stacks ordered by sort, one of SORT_KEYS."""
+        if sort not in self.orders:
+            key, reverse = SORT_KEYS[sort]
+            self.orders[sort] = sorted(self.stacks, key=key, reverse=reverse)
+        return self.orders[sort]
+
+    def page(self, number=1, sort='name'):
+        """
+        One page of stacks.
+
+        Args:
+            number (int): Page number, starting at 1; out of range goes
+                to the nearest page.
+            sort (str): One of SORT_KEYS.
+
+        Returns:
+            page (tuple): (stacks on the page, page number, number of pages)
+        """
+        size = settings.INVENTORY_PAGE_SIZE
+        pages = max(1, (len(self.stacks) + size - 1) // size)
+        number = min(max(1, number), pages)
+        return self.ordered(sort)[(number - 1) * size:number * size], number, pages
+
+
+def get(character):
+    """The InventoryView of character, made on first use."""
+    view = character.ndb.inventory_view
+    if view is None:
+        view = character.ndb.inventory_view = InventoryView(character)
+    return view
+
+
+def invalidate(character):
+    """Drop the inventory view of character; call when what it carries or wears changes."""
+    if character is not None and character.ndb.inventory_view is not None:
+        character.ndb.inventory_view = None
@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+"""
+Online name index
+
+Finding an online character by name used to mean going through every
+session, getting its puppet and comparing names. This module indexes
+the names (key and aliases, lowercased) of every puppeted character:
+
+    * a dict from name to characters, for exact lookups,
+    * a sorted list of (name, id, character), searched with bisect for
+      names starting with a prefix,
+    * close matches of a misspelled name with difflib, only when
+      neither of those finds anyone.
+
+The presence roster (world/presence.py) keeps it up to date: it adds a
+character when puppeted, drops it when its last session leaves, and
+indexes it again when its key has changed, after its next command.
+
+Example:
+    ```python
+    >>> names.find('ruLAN')      # exact
+    [Rulan]
+    >>> names.find('ru')         # prefix
+    [Rulan, Ruby]
+    >>> names.find('rulna')      # close match
+    [Rulan]
+    ```
+"""
+from bisect import bisect_left, insort
+from difflib import get_close_matches
+
+FUZZY_CUTOFF = 0.75  # How close a misspelling must be, 0 to 1
+_EXACT = {}  # Lowercased name: set of characters
+_SORTED = []  # (lowercased name, id, character), sorted
+_NAMES = {}  # Character: the names it is indexed under
+
+
+def _names(character):
+    """Lowercased key and aliases of character."""
+    names = set([character.key.lower()])
+    names.update(alias.lower() for alias in character.aliases.all())
+    return names
+
+
+def add(character):
+    """Index the names of character, replacing any it was indexed under."""
+    remove(character)
+    names = _NAMES[character] = _names(character)
+    for name in names:
+        _EXACT.setdefault(name, set()).add(character)
+        insort(_SORTED, (name, character.id, character))
+
+
+def remove(character):
+    """Drop character from the index."""
+    for name in _NAMES.pop(character, ()):
+        found = _EXACT.get(name)
+        if found is not None:
+            found.discard(character)
+            if not found:
+                del _EXACT[name]
+        index = bisect_left(_SORTED, (name, character.id))
+        if index < len(_SORTED) and _SORTED[index][2] is character:
+            del _SORTED[index]
+
+
+def renamed(character):
+    """Index character again if its key is not among the names it is indexed under."""
+    names = _NAMES.get(character)
+    if names is not None and character.key.lower() not in names:
+        add(character)
+
+
+def exact(name):
+    """Online characters named name, key or alias."""
+    return list(_EXACT.get(name.lower(), ()))
+
+
+def prefix(text):
+    """Online characters with a name starting with text, in name order, each once."""
+    text = text.lower()
+    found = []
+    for name, _, character in _SORTED[bisect_left(_SORTED, (text,)):]:
+        if not name.startswith(text):
+            break
+        if character not in found:
+            found.append(character)
+    return found
+
+
+def fuzzy(text, limit=3):
+    """Online characters with a name close to text, closest first."""
+    found = []
+    for name in get_close_matches(text.lower(), list(_EXACT), limit, FUZZY_CUTOFF):
+        found.extend(character for character in _EXACT[name] if character not in found)
+    return found
+
+
+def find(text):
+    """
+    Online characters by name: exact matches if any, else those with a
+    name starting with text, else close matches.
+
+    Args:
+        text (str): Name, start of a name or misspelled name.
+
+    Returns:
+        found (list): Characters matched, possibly empty.
+    """
+    text = text.strip()
+    if not text:
+        return []
+    return exact(text) or prefix(text) or fuzzy(text)
@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+"""
+Occupancy
+
+How long characters stay in each room and area, and how full they get,
+counted per hour. The presence roster (world/presence.py) calls
+`enter()` when a puppeted character arrives somewhere and `leave()`
+when it moves on or goes offline; each visit adds its dwell time to
+the bucket of the hour it ended in, and every arrival raises the
+hour's peak occupancy if there were never that many there at once.
+
+Buckets of the last `settings.OCCUPANCY_HOURS` hours are kept in
+memory. What changed is appended to `settings.OCCUPANCY_LOG` in a
+batch every `settings.OCCUPANCY_FLUSH_INTERVAL` seconds and at server
+stop, one JSON object per line, and read back at server start.
+
+Example:
+    ```python
+    >>> occupancy.average_dwell(room=park)  # Seconds, last 24 hours
+    312.5
+    >>> occupancy.heatmap('downtown', hours=3)
+    [(420317, 12, 4), (420318, 30, 7), (420319, 0, 0)]
+    ```
+"""
+import json
+import os
+from time import time
+from django.conf import settings
+from world.helpers import append_jsonl
+
+_COUNTS = {}  # ('room', id) or ('area', name): characters there now
+_BUCKETS = {}  # ('room', id) or ('area', name): {hour: [dwell seconds, visits, peak]}
+_PENDING = {}  # (place, hour): [dwell seconds, visits, peak] not yet written
+
+
+def _hour(now=None):
+    """Number of the hour now falls in, counted from the epoch."""
+    return int((now or time()) // 3600)
+
+
+def _add(place, hour, dwell, visits, peak):
+    """Add a visit's numbers to the bucket of place and hour, and to what is waiting to be written."""
+    for store, key in ((_BUCKETS.setdefault(place, {}), hour), (_PENDING, (place, hour))):
+        bucket = store.get(key)
+        if bucket is None:
+            bucket = store[key] = [0, 0, 0]
+        bucket[0] += dwell
+        bucket[1] += visits
+        bucket[2] = max(bucket[2], peak)
+
+
+def enter(location, area=None, now=None):
+    """
+    Count a character arriving.
+
+    Args:
+        location (obj): Room arrived in; None (Nothingness) is not counted.
+        area (str): Area arrived in, if the character came from another.
+    """
+    places = [('room', location.id)] if location is not None else []
+    if area:
+        places.append(('area', area))
+    for place in places:
+        count = _COUNTS[place] = _COUNTS.get(place, 0) + 1
+        _add(place, _hour(now), 0, 0, count)
+
+
+def leave(location, arrived, area=None, area_arrived=None, now=None):
+    """
+    Count a character leaving.
+
+    Args:
+        location (obj): Room left; None (Nothingness) is not counted.
+        arrived (float): Time the character arrived in location.
+        area (str): Area left, if the character is going to another.
+        area_arrived (float): Time the character arrived in area.
+    """
+    now = now or time()
+    visits = [(('room', location.id), arrived)] if location is not None else []
+    if area:
+        visits.append((('area', area), area_arrived))
+    for place, since in visits:
+        _COUNTS[place] = max(0, _COUNTS.get(place, 0) - 1)
+        _add(place, _hour(now), now - since, 1, 0)
+
+
+def _window(place, hours):
+    """Buckets of place in the last hours hours (at least one), as (hour, bucket) oldest first."""
+    buckets = _BUCKETS.get(place, {})
+    last = _hour()
+    return [(hour, buckets.get(hour, (0, 0, 0))) for hour in range(last - max(1, hours) + 1, last + 1)]
+
+
+def _key(room=None, area=None):
+    """The place counted for room, or for area if no room."""
+    return ('room', room.id) if room is not None else ('area', area)
+
+
+def average_dwell(room=None, area=None, hours=24):
+    """
+    Average time a visit to room (or area, if no room) lasted.
+
+    Returns:
+        seconds (float): Over visits that ended in the last hours
+            hours, or None if there were none.
+    """
+    window = _window(_key(room, area), hours)
+    visits = sum(bucket[1] for hour, bucket in window)
+    return sum(bucket[0] for hour, bucket in window) / float(visits) if visits else None
+
+
+def peak(room=None, area=None, hours=24):
+    """Most characters at once in room (or area, if no room) in the last hours hours."""
+    return max([0] + [bucket[2] for hour, bucket in _window(_key(room, area), hours)])
+
+
+def heatmap(area, hours=24):
+    """
+    Load on area hour by hour.
+
+    Returns:
+        rows (list): (hour number, visits ended, peak occupancy) for
+            each of the last hours hours, oldest first.
+    """
+    return [(hour, bucket[1], bucket[2]) for hour, bucket in _window(('area', area), hours)]
+
+
+def areas():
+    """Names of all areas with counted visits."""
+    return sorted(place[1] for place in _BUCKETS if place[0] == 'area')
+
+
+def _trim():
+    """Forget buckets older than settings.OCCUPANCY_HOURS."""
+    first = _hour() - settings.OCCUPANCY_HOURS + 1
+    for place in list(_BUCKETS):
+        buckets = _BUCKETS[place]
+        for hour in [hour for hour in buckets if hour < first]:
+            del buckets[hour]
+        if not buckets:
+            del _BUCKETS[place]
+
+
+def flush_all(*args, **kwargs):
+    """Append changed buckets to the occupancy log. The ticker passes arguments, which are not used."""
+    _trim()
+    count = append_jsonl(settings.OCCUPANCY_LOG, (
+        {'kind': place[0], 'place': place[1], 'hour': hour, 'dwell': round(bucket[0], 1),
+         'visits': bucket[1], 'peak': bucket[2]} for (place, hour), bucket in _PENDING.items()))
+    _PENDING.clear()
+    return count
+
+
+def load():
+    """
+    Read the buckets of the last settings.OCCUPANCY_HOURS hours back
+    from the occupancy log, then write the log again with one line per
+    bucket so it does not grow without end.
+    """
+    if not os.path.exists(settings.OCCUPANCY_LOG):
+        return
+    first = _hour() - settings.OCCUPANCY_HOURS + 1
+    with open(settings.OCCUPANCY_LOG) as handle:
+        for line in handle:
+            if not line.strip():
+                continue
+            row = json.loads(line)
+            if row['hour'] >= first:
+                _add((row['kind'], row['place']), row['hour'], row['dwell'], row['visits'], row['peak'])
+    os.remove(settings.OCCUPANCY_LOG)
+    flush_all()
@@ -0,0 +1,232 @@
+# -*- coding: utf-8 -*-
+"""
+Portal pool
+
+Portals are pairs of exits lent out of a pool: objects tagged 'pool'
+(category 'portal') waiting in Nothingness. `portal` used to search
+the pool on every use and take the last two objects still in
+Nothingness, but a portal only leaves Nothingness when it opens, some
+seconds later, so two portals opened together could take the same
+pair. Opening and closing were plain delays, lost by a reload, which
+left portals standing in rooms for good.
+
+This module keeps the pool in memory instead: a set of free portal
+objects and the `Lease` of every pair lent out. `lease()` takes a
+pair off the free set at once, so no other request can get it, and
+schedules it to open after `settings.PORTAL_OPEN_DELAY` seconds and
+close `settings.PORTAL_LIFETIME` seconds after it was asked for.
+
+Each lease is also saved as a `portal_lease` Attribute on its entry
+portal. `load()` reads the pool at server start: leases are resumed,
+opened or closed as their times say, and portals found out of
+Nothingness without a lease are sent back to the pool.
+
+Example:
+    ```python
+    >>> lease = portals.lease(caller, target, exit_lock='none()')
+    >>> lease.enter, lease.exit
+    (Portal, Portal)
+    >>> portals.free()
+    4
+    ```
+"""
+import evennia
+from time import time
+from django.conf import settings
+from evennia.objects.models import ObjectDB
+from evennia.utils import logger
+from evennia.utils.utils import delay
+
+LEASE_ATTRIBUTE = 'portal_lease'
+_FREE = set()  # Portals in Nothingness, ready to lend
+_LEASED = {}  # Entry portal: its Lease
+_LOADED = []  # Set once the pool has been read
+
+
+class Lease(object):
+    """
+    A pair of portals lent out, connecting the locations of char and target.
+
+    Args:
+        enter (obj): Portal that appears where the target is.
+        exit (obj): Portal that appears where char is.
+        char (obj): Character who opened the portal.
+        target (obj): Character the portal goes to.
+        origin (obj): Location of char when the portal was opened.
+        enter_lock (str): Lock string for traversing enter.
+        exit_lock (str): Lock string for traversing exit.
+        quiet (bool): The portals appear and vanish quietly.
+        opens (float): Time the portals appear.
+        closes (float): Time the portals vanish and return to the pool.
+    """
+    FIELDS = ('enter_lock', 'exit_lock', 'quiet', 'opens', 'closes', 'opened')
+    OBJECTS = ('enter', 'exit', 'char', 'target', 'origin')
+
+    def __init__(self, enter, exit, char, target, origin, enter_lock='all()', exit_lock='all()',
+                 quiet=False, opens=None, closes=None):
+        now = time()
+        self.enter, self.exit = enter, exit
+        self.char, self.target, self.origin = char, target, origin
+        self.enter_lock, self.exit_lock = enter_lock, exit_lock
+        self.quiet = quiet
+        self.opens = now + settings.PORTAL_OPEN_DELAY if opens is None else opens
+        self.closes = now + settings.PORTAL_LIFETIME if closes is None else closes
+        self.opened = False
+
+    def to_dict(self):
+        """The lease as plain data, objects by id."""
+        data = dict((field, getattr(self, field)) for field in self.FIELDS)
+        data.update((name, getattr(self, name).id if getattr(self, name) else None) for name in self.OBJECTS)
+        return data
+
+    @classmethod
+    def from_dict(cls, enter, data):
+        """
+        Rebuild a saved lease of enter.
+
+        Returns:
+            lease (Lease): The lease, or None if one of its portals or
+                characters is gone.
+        """
+        objects = dict((name, ObjectDB.objects.get_id(data[name]) if data.get(name) else None)
+                       for name in cls.OBJECTS if name != 'enter')
+        if not (objects['exit'] and objects['char'] and objects['target']):
+            return None
+        lease = cls(enter, objects['exit'], objects['char'], objects['target'], objects['origin'])
+        for field in cls.FIELDS:
+            setattr(lease, field, data[field])
+        return lease
+
+    def save(self):
+        self.enter.attributes.add(LEASE_ATTRIBUTE, self.to_dict())
+
+    @property
+    def active(self):
+        """True while this lease holds its portals."""
+        return _LEASED.get(self.enter) is self
+
+    def schedule(self):
+        """Open and close the portals when their times come, or now if they are past."""
+        now = time()
+        if not self.opened and self.closes > now:
+            delay(max(0, self.opens - now), callback=self.open)
+        delay(max(0, self.closes - now), callback=self.close)
+
+    def open(self):
+        """Lock the portals and move them into place."""
+        if not self.active or self.opened:
+            return
+        char, target, portal_enter, portal_exit = self.char, self.target, self.enter, self.exit
+        self.opened = True
+        self.save()
+        portal_enter.locks.add('enter:' + self.enter_lock)
+        portal_exit.locks.add('enter:' + self.exit_lock)
+        loc = self.origin or char.location
+        portal_enter.move_to(target.location, quiet=self.quiet)
+        if self.quiet:
+            target.msg('{} quietly appears in {}.'.format(portal_enter.get_display_name(target),
+                                                          loc.get_display_name(target)))
+            char.msg('{} quietly appears in {}.'.format(portal_exit.get_display_name(char),
+                                                        loc.get_display_name(char)))
+        portal_exit.move_to(loc, quiet=self.quiet)
+
+    def close(self):
+        """Remove the portals to Nothingness and give them back to the pool."""
+        if not self.active:
+            return
+        vanish_message = '|r{}|n vanishes into ' + settings.NOTHINGNESS + '.'
+        for portal in (self.enter, self.exit):
+            try:
+                _stow(portal, vanish_message)
+            except Exception:
+                logger.log_trace('Portal {} could not return to the pool.'.format(portal))
+        release(self)
+
+
+def _stow(portal, message=None):
+    """Move whatever is in portal out to where it stands, and portal to Nothingness."""
+    here = portal.location
+    if here:
+        for every in portal.contents:
+            every.move_to(here)
+        if message:
+            here.msg_contents(message.format(portal))
+        portal.move_to(None, to_none=True)
+
+
+def load():
+    """Read the pool: free portals, saved leases to resume, and stray portals to take back."""
+    del _LOADED[:]
+    _FREE.clear()
+    leased = set()
+    for enter in ObjectDB.objects.filter(db_attributes__db_key=LEASE_ATTRIBUTE):
+        data = enter.attributes.get(LEASE_ATTRIBUTE)
+        lease = Lease.from_dict(enter, data) if data else None
+        if lease is None:
+            enter.attributes.remove(LEASE_ATTRIBUTE)
+            continue
+        if enter not in _LEASED:  # Leases already running keep their delays.
+            _LEASED[enter] = lease
+            lease.schedule()
+        leased.update((enter, _LEASED[enter].exit))
+    for portal in evennia.search_tag('pool', category='portal'):
+        if portal in leased:
+            continue
+        if portal.location:  # Left out by a lease that was lost.
+            _stow(portal)
+        _FREE.add(portal)
+    _LOADED.append(True)
+
+
+def free():
+    """Number of portals ready to lend."""
+    if not _LOADED:
+        load()
+    return len(_FREE)
+
+
+def leases():
+    """Every Lease out now."""
+    return list(_LEASED.values())
+
+
+def lease(char, target, enter_lock='all()', exit_lock='all()', quiet=False):
+    """
+    Lend a pair of portals connecting the locations of char and target.
+
+    Args:
+        char (obj): Character opening the portal; its location is one end.
+        target (obj): Character the portal goes to; its location is the other end.
+        enter_lock (str): Who can go through the portal at target's end.
+        exit_lock (str): Who can go through the portal at char's end.
+        quiet (bool): The portals appear and vanish quietly.
+
+    Returns:
+        lease (Lease): The pair lent out, scheduled to open and close;
+            None if fewer than two portals are free.
+    """
+    if not _LOADED:
+        load()
+    now = time()
+    for overdue in [each for each in _LEASED.values() if each.closes <= now]:
+        overdue.close()  # Its close was lost; take the portals back now.
+    if len(_FREE) < 2:
+        load()  # Builders may have added portals to the pool since.
+        if len(_FREE) < 2:
+            return None
+    portal_enter, portal_exit = _FREE.pop(), _FREE.pop()
+    taken = Lease(portal_enter, portal_exit, char, target, char.location, enter_lock, exit_lock, quiet)
+    _LEASED[portal_enter] = taken
+    taken.save()
+    taken.schedule()
+    return taken
+
+
+def release(lease):
+    """End lease and give its portals back to the pool; they should be in Nothingness by now."""
+    if _LEASED.get(lease.enter) is lease:
+        del _LEASED[lease.enter]
+    lease.enter.attributes.remove(LEASE_ATTRIBUTE)
+    for portal in (lease.enter, lease.exit):
+        if not portal.location:
+            _FREE.add(portal)
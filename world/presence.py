@@ -0,0 +1,177 @@
+# -*- coding: utf-8 -*-
+"""
+Presence roster
+
+`who` and its variants (`where`, `ws`, `what`) used to go through every
+connected session, find its puppet and read the puppet's name,
+location and messages on every call.
+
+This module keeps a roster of the characters puppeted right now, one
+`Presence` entry each, with what those commands show: name, location
+and its area tag, the sessions puppeting it (for online and idle
+times), doing (room pose), species and gender. Entries are also
+indexed by location, names are indexed for lookups in world/names.py,
+and every arrival and departure is counted in world/occupancy.py. The
+roster is kept up to date by hooks:
+
+    * `arrive()` from `at_post_puppet`, `depart()` from
+      `at_post_unpuppet` once no session is left,
+    * `moved()` from `at_after_move`,
+    * `touch()` after every command, which reads the name and
+      messages again, since poses and names change by command.
+
+Each entry carries its sort keys ready-made (`sort_key`, `since`,
+`idle`). The roster lives in memory only; `rebuild()` fills it from
+the connected sessions at server start, since sessions outlive a
+reload.
+
+Example:
+    ```python
+    >>> [entry.key for entry in presence.online()]
+    ['Amber', 'Rulan']
+    >>> presence.get(rulan).area
+    'park'
+    ```
+"""
+import time
+from world import names, occupancy
+
+_ROSTER = {}  # Character: its Presence
+_BY_LOCATION = {}  # Location: set of characters puppeted there
+
+
+class Presence(object):
+    """
+    What the roster knows of one puppeted character.
+
+    Args:
+        character (obj): The puppeted character.
+    """
+    __slots__ = ('character', 'key', 'sort_key', 'location', 'area', 'arrived', 'area_arrived',
+                 'sessions', 'doing', 'species', 'gender')
+
+    def __init__(self, character):
+        self.character = character
+        self.location = None
+        self.area = None
+        self.arrived = self.area_arrived = time.time()
+        self.sessions = []
+        self.refresh()
+
+    def refresh(self):
+        """Read the name and messages of the character again."""
+        character = self.character
+        self.key = character.key
+        self.sort_key = character.key.lower()
+        messages = character.db.messages or {}
+        self.doing = messages.get('pose') or messages.get('pose_default') or ''
+        self.species = messages.get('species') or ''
+        self.gender = messages.get('gender') or ''
+
+    @property
+    def since(self):
+        """Time the earliest session still puppeting the character connected."""
+        return min(session.conn_time for session in self.sessions) if self.sessions else time.time()
+
+    @property
+    def idle(self):
+        """Time of the last command from any session puppeting the character."""
+        return max(session.cmd_last_visible for session in self.sessions) if self.sessions else time.time()
+
+
+def _unplace(entry, area=None):
+    """Take entry out of its location in the location index, on its way to area."""
+    present = _BY_LOCATION.get(entry.location)
+    if present is not None and entry.character in present:
+        present.discard(entry.character)
+        if not present:
+            del _BY_LOCATION[entry.location]
+        left = entry.area if entry.area != area else None
+        occupancy.leave(entry.location, entry.arrived, left, entry.area_arrived)
+
+
+def _place(entry, location):
+    """Move entry to location in the location index."""
+    if entry.location is location and entry.character in _BY_LOCATION.get(location, ()):
+        return
+    area = location.tags.get(category='area') if location else None
+    placed = entry.character in _BY_LOCATION.get(entry.location, ())
+    _unplace(entry, area)
+    now = time.time()
+    if not placed or area != entry.area:
+        entry.area_arrived = now
+        occupancy.enter(location, area)
+    else:
+        occupancy.enter(location)
+    entry.location, entry.area, entry.arrived = location, area, now
+    _BY_LOCATION.setdefault(location, set()).add(entry.character)
+
+
+def arrive(character):
+    """Add or refresh character in the roster, after it is puppeted."""
+    entry = _ROSTER.get(character)
+    if entry is None:
+        entry = _ROSTER[character] = Presence(character)
+    else:
+        entry.refresh()
+    entry.sessions = list(character.sessions.all())
+    _place(entry, character.location)
+    names.add(character)
+    return entry
+
+
+def depart(character):
+    """Take character off the roster, after its last session unpuppets it."""
+    entry = _ROSTER.pop(character, None)
+    if entry is not None:
+        _unplace(entry)
+    names.remove(character)
+
+
+def moved(character):
+    """Note the new location of character, if it is on the roster."""
+    entry = _ROSTER.get(character)
+    if entry is not None:
+        _place(entry, character.location)
+
+
+def touch(character):
+    """Read name and messages of character again after a command, if it is on the roster."""
+    entry = _ROSTER.get(character)
+    if entry is not None:
+        entry.refresh()
+        names.renamed(character)
+        if entry.location is not character.location:
+            _place(entry, character.location)
+
+
+def get(character):
+    """The Presence of character, or None if it is not puppeted."""
+    return _ROSTER.get(character)
+
+
+def online():
+    """Every Presence on the roster."""
+    return list(_ROSTER.values())
+
+
+def at(location):
+    """Presences of the characters puppeted in location."""
+    return [_ROSTER[character] for character in _BY_LOCATION.get(location, ())]
+
+
+def locations():
+    """Dict of every location with puppeted characters: list of their Presences."""
+    return dict((location, [_ROSTER[character] for character in present])
+                for location, present in _BY_LOCATION.items())
+
+
+def rebuild():
+    """Fill the roster again from the puppets of every connected session."""
+    from evennia.server.sessionhandler import SESSIONS
+    for character in list(_ROSTER):
+        depart(character)
+    for session in SESSIONS.get_sessions():
+        puppet = session.get_puppet()
+        if puppet:
+            arrive(puppet)
@@ -0,0 +1,757 @@
+# -*- coding: utf-8 -*-
+"""
+Combat rules
+
+The top half of this module is the combat engine: attack rolls,
+defense rolls, damage, special move costs and range modifiers, worked
+out over plain numbers and effect names. It imports nothing from
+Evennia, and every roll takes an optional `random.Random`, so the same
+seed always plays out the same fight. world/simulator.py runs
+thousands of fights through it offline.
+
+The bottom half applies those rules to fighters in a running
+`CombatSession` (world/combat.py) for the commands in
+commands/battle.py: checking whether a command may be used, queueing
+attacks and defenses, movement with blocking and the effects of
+special moves. The rolls of each action are made from a seed of their
+own, written with the outcome to the fight's combat log
+(world/combatlog.py) so they can be replayed.
+
+Example:
+    ```python
+    >>> rules.seed(42)
+    >>> attack = rules.attack_roll(6, steps=4, attack_type='ranged')
+    >>> defense = rules.defense_roll(5)
+    >>> rules.damage(attack, defense, attack_effects=['Double Damage'])
+    4
+    ```
+"""
+from random import Random
+
+RNG = Random()  # Used by every roll not given its own
+
+RANGE_NAMES = ('Engaged', 'Very Close', 'Close', 'Medium-Close', 'Medium', 'Medium-Far',
+               'Far', 'Very Far', 'Distant', 'Very Distant', 'Remote')
+RANGE_FALLOFF = 2  # Ranged attacks lose 1 per this many steps beyond 'Close'
+STATS = ('ATM', 'ATR', 'DEF', 'VIT', 'MOB', 'SPE')
+STAT_POINTS = 36  # Points a character spreads over their stats
+STAT_MAX = 10
+
+# Special moves
+SPECIAL_TYPES = ('Special Melee Attack', 'Special Ranged Attack', 'Support Self',
+                 'Support Other', 'Hinder Other', 'Special Defense')
+ATTACKS = SPECIAL_TYPES[:2]
+SUPPORTS = SPECIAL_TYPES[2:4]
+# Effect name: (SP cost, special types it can be given to). Limits and
+# drawbacks have a negative cost.
+SPECIAL_EFFECTS = {
+    # Attacks
+    'Double Damage': (3, ATTACKS),
+    'Defense Bypass': (2, ATTACKS),
+    'Double Attack': (2, ATTACKS),
+    'Knockback': (1, ATTACKS),
+    'Area Attack': (3, ATTACKS),
+    'Boosted Range': (1, ('Special Ranged Attack',)),
+    'Lunge Attack': (1, ('Special Melee Attack',)),
+    'Parting Attack': (1, ('Special Melee Attack',)),
+    # Defenses
+    'Perfect Defense': (3, ('Special Defense',)),
+    'Counterattack': (2, ('Special Defense',)),
+    # Support and hindrance
+    'Healing': (2, SUPPORTS),
+    'Power Up': (2, SUPPORTS),
+    'Weaken': (2, ('Hinder Other',)),
+    'Immobilization': (2, ('Hinder Other',)),
+    'Bonus Action': (2, SUPPORTS + ('Hinder Other',)),
+    # Limits
+    'Touch Effect': (-1, ('Support Other', 'Hinder Other')),
+    'Ranged-Only Defense': (-1, ('Special Defense',)),
+    'Melee-Only Defense': (-1, ('Special Defense',)),
+    'Vital Move': (-1, SPECIAL_TYPES),
+    'Charge Move': (-2, SPECIAL_TYPES),
+    'Desperation Move': (-2, SPECIAL_TYPES),
+    'Opening Gambit': (-2, SPECIAL_TYPES),
+    # Drawbacks
+    'Recoil': (-1, SPECIAL_TYPES),
+    'Exhausting': (-1, SPECIAL_TYPES),
+    'Exposing': (-1, SPECIAL_TYPES),
+}
+# Combat condition: (attack roll modifier, defense roll multiplier)
+CONDITIONS = {
+    'Powered Up': (2, 1.0),
+    'Weakened': (-2, 1.0),
+    'Vulnerable': (0, 0.5),
+    'Immobilization': (0, 1.0),
+}
+CONDITION_TURNS = 2  # Lasts through the affected fighter's next turn
+
+
+def seed(value=None):
+    """Seed the module's RNG, making every following roll repeatable."""
+    RNG.seed(value)
+
+
+def new_seed():
+    """
+    A seed for the rolls of one action, so they can be replayed from
+    the combat log. Drawn from the module RNG, so `seed()` still
+    repeats them.
+    """
+    return RNG.getrandbits(32)
+
+
+def roll(stat, rng=None):
+    """A random number from 1 to stat, or 0 if stat is 0 or less."""
+    stat = int(stat or 0)
+    return (rng or RNG).randint(1, stat) if stat > 0 else 0
+
+
+def max_hp(vit):
+    """Maximum HP for a VIT stat."""
+    return max(int(vit or 0) * 3, 1)
+
+
+def max_sp(spe):
+    """Maximum SP for a SPE stat."""
+    return int(spe or 0) * 2
+
+
+def range_name(steps):
+    """The name of a range, e.g. 'Close' for 2 steps."""
+    return RANGE_NAMES[max(0, min(int(steps), len(RANGE_NAMES) - 1))]
+
+
+def range_modifier(steps, attack_type, effects=()):
+    """
+    Attack roll modifier for the distance to the target.
+
+    Args:
+        steps (int): Range to the target.
+        attack_type (str): 'melee' or 'ranged'.
+        effects (iterable): Special effects of the attack.
+
+    Returns:
+        modifier (int): 0 up to 'Close' range or with 'Boosted Range',
+            else -1 for every RANGE_FALLOFF steps beyond it.
+    """
+    if attack_type != 'ranged' or 'Boosted Range' in effects:
+        return 0
+    return -(max(0, steps - 2) // RANGE_FALLOFF)
+
+
+def attack_roll(stat, steps=0, attack_type='melee', effects=(), conditions=(), rng=None):
+    """
+    Roll an attack.
+
+    Args:
+        stat (int): ATM for melee attacks, ATR for ranged ones.
+        steps (int): Range to the target.
+        attack_type (str): 'melee' or 'ranged'.
+        effects (iterable): Special effects of the attack.
+        conditions (iterable): Combat conditions of the attacker.
+        rng (Random, optional): Random source; the module RNG if not given.
+
+    Returns:
+        roll (int): The attack roll, never below 0.
+    """
+    result = roll(stat, rng) + range_modifier(steps, attack_type, effects)
+    result += sum(CONDITIONS[each][0] for each in conditions if each in CONDITIONS)
+    return max(0, result)
+
+
+def defense_roll(stat, conditions=(), rng=None):
+    """
+    Roll a defense.
+
+    Args:
+        stat (int): DEF of the defender.
+        conditions (iterable): Combat conditions of the defender.
+        rng (Random, optional): Random source; the module RNG if not given.
+
+    Returns:
+        roll (int): The defense roll.
+    """
+    result = roll(stat, rng)
+    for each in conditions:
+        if each in CONDITIONS:
+            result = int(result * CONDITIONS[each][1])
+    return result
+
+
+def damage(attack, defense, defense_type='defend', attack_effects=(), defense_effects=()):
+    """
+    Damage done by an attack.
+
+    Args:
+        attack (int): Attack roll.
+        defense (int): Defense roll, ignored when enduring.
+        defense_type (str): 'defend' or 'endure'.
+        attack_effects (iterable): Special effects of the attack.
+        defense_effects (iterable): Special effects of the defense.
+
+    Returns:
+        damage (int): The attack roll minus the defense roll, or the whole
+            attack roll if endured; doubled by 'Double Damage'.
+    """
+    if 'Perfect Defense' in defense_effects:
+        return 0
+    if defense_type == 'endure':
+        result = attack
+    else:
+        if 'Defense Bypass' in attack_effects:
+            defense //= 2
+        result = max(0, attack - defense)
+    if 'Double Damage' in attack_effects:
+        result *= 2
+    return result
+
+
+def area_attack(attacker, defenders, ranges, attack_type='melee', attack_effects=(), rng=None):
+    """
+    Resolve one attack against many defenders at once, all of them
+    defending. A single attack roll is made, then adjusted for the
+    range to each defender.
+
+    Args:
+        attacker (dict): Stats of the attacker, and optionally 'conditions'.
+        defenders (list): Dicts with the DEF, and optionally 'conditions',
+            of each defender.
+        ranges (list): Range to each defender.
+        attack_type (str): 'melee' or 'ranged'.
+        attack_effects (iterable): Special effects of the attack.
+        rng (Random, optional): Random source; the module RNG if not given.
+
+    Returns:
+        result (tuple): (attack roll before range modifiers, list of
+            (attack, defense roll, damage) per defender)
+    """
+    stat = attacker['ATM'] if attack_type == 'melee' else attacker['ATR']
+    base = attack_roll(stat, 0, 'melee', attack_effects, attacker.get('conditions', ()), rng)
+    results = []
+    for defender, steps in zip(defenders, ranges):
+        attack = max(0, base + range_modifier(steps, attack_type, attack_effects))
+        defense = defense_roll(defender['DEF'], defender.get('conditions', ()), rng)
+        results.append((attack, defense, damage(attack, defense, 'defend', attack_effects)))
+    return base, results
+
+
+def special_cost(effects):
+    """SP cost of a special move with effects, never below 0."""
+    return max(0, sum(SPECIAL_EFFECTS[each][0] for each in effects if each in SPECIAL_EFFECTS))
+
+
+def check_special(special_type, effects, spe):
+    """
+    Check a special move against the rules.
+
+    Args:
+        special_type (str): One of SPECIAL_TYPES.
+        effects (iterable): Effect names.
+        spe (int): SPE stat of its owner.
+
+    Returns:
+        error (str): What is wrong with the move, or None if it is valid.
+    """
+    if special_type not in SPECIAL_TYPES:
+        return "'%s' is not a type of special move." % special_type
+    for effect in effects:
+        if effect not in SPECIAL_EFFECTS:
+            return "'%s' is not a special move effect." % effect
+        if special_type not in SPECIAL_EFFECTS[effect][1]:
+            return "'%s' can't be used on a %s." % (effect, special_type)
+    if len(set(effects)) != len(effects):
+        return "A special move can't have the same effect twice."
+    if special_cost(effects) > max_sp(spe):
+        return "It costs %i SP, more than your total SP of %i." % (special_cost(effects), max_sp(spe))
+    return None
+
+
+def resolve(attacker, defender, steps=0, attack_type='melee', defense_type='defend',
+            attack_effects=(), defense_effects=(), rng=None):
+    """
+    Resolve one attack between two fighters given as plain data.
+
+    Args:
+        attacker (dict): Stats of the attacker, and optionally 'conditions'.
+        defender (dict): Stats of the defender, and optionally 'conditions'.
+        steps (int): Range between them.
+        attack_type (str): 'melee' or 'ranged'.
+        defense_type (str): 'defend' or 'endure'.
+        attack_effects (iterable): Special effects of the attack.
+        defense_effects (iterable): Special effects of the defense.
+        rng (Random, optional): Random source; the module RNG if not given.
+
+    Returns:
+        result (tuple): (attack roll, defense roll, damage).
+    """
+    stat = attacker['ATM'] if attack_type == 'melee' else attacker['ATR']
+    attack = attack_roll(stat, steps, attack_type, attack_effects, attacker.get('conditions', ()), rng)
+    defense = 0
+    if defense_type != 'endure':
+        defense = defense_roll(defender['DEF'], defender.get('conditions', ()), rng)
+    return attack, defense, damage(attack, defense, defense_type, attack_effects, defense_effects)
+
+
+# Fighters in a running CombatSession
+
+_COMBAT = None  # world.combat, imported on first use so the engine runs without a server
+
+
+def _combat():
+    """The world.combat module."""
+    global _COMBAT
+    if _COMBAT is None:
+        from world import combat
+        _COMBAT = combat
+    return _COMBAT
+
+
+def stats(obj):
+    """The combat stats of obj as a dict of ints after its active effects, with its current conditions."""
+    effects = obj.effects if hasattr(obj, 'effects') else None
+    data = {}
+    for stat in STATS:
+        value = int(obj.attributes.get(stat) or 0)
+        data[stat] = int(effects.effective(stat, value)) if effects else value
+    state = _combat().fighter(obj)
+    data['conditions'] = list(state.conditions) if state else []
+    return data
+
+
+def hp(obj):
+    """Current HP of obj, or 0 if it has none."""
+    health = obj.traits.health if hasattr(obj, 'traits') else None
+    return health.actual if health else 0
+
+
+def is_fighter(obj):
+    """True if obj can take part in a fight."""
+    return bool(hasattr(obj, 'traits') and obj.traits.health)
+
+
+def ref(obj):
+    """'key#id' of obj, as fighters are named in the combat log."""
+    return '%s#%s' % (obj.key, obj.id) if obj is not None else None
+
+
+def _find(caller, target):
+    """The object target refers to, looked up from caller if it is a name."""
+    if not isinstance(target, basestring):
+        return target
+    name = target.split(None, 1)[0] if target.strip() else ''
+    found = caller.search(name, quiet=True) if name else None
+    return found[0] if found else None
+
+
+def _effect_string(effects):
+    """' |255[|455A|255 and|455 B|255]|n' for the effects, or ''."""
+    if not effects:
+        return ''
+    names = list(effects)
+    joined = names[-1] if len(names) == 1 else \
+        '|255, |455'.join(names[:-1]) + ' |255and|455 ' + names[-1]
+    return ' |255[|455%s|255]|n' % joined
+
+
+def _enemies_engaged(obj):
+    """Fighters at range 0 to obj who are hostile toward it."""
+    session = _combat().get(obj)
+    return [other for other in session.fighters
+            if session.hostile(other, obj) and session.range(obj, other) == 0]
+
+
+def cmd_check(caller, args, action, checks):
+    """
+    Check whether caller may use a combat command.
+
+    Args:
+        caller (Object): Who is using the command.
+        args (str or Object): The command arguments, starting with the
+            target name, or the target itself.
+        action (str): What is being done, for the error message.
+        checks (list): Names of the checks to make, in order.
+
+    Returns:
+        error (str): Why the command can't be used, or None if it can.
+    """
+    combat = _combat()
+    session = combat.get(caller)
+    state = combat.fighter(caller)
+    target = None
+    for check in checks:
+        if check == 'InCombat' and not state:
+            return "You can only %s in combat!" % action
+        if check == 'IsTurn' and session.current is not caller:
+            return "You can only %s on your turn!" % action
+        if check == 'HasHP' and hp(caller) <= 0:
+            return "You can't %s, you've been defeated!" % action
+        if check == 'HasAction' and state.actions <= 0:
+            return "You have already used your action this turn!"
+        if check == 'HasMove':
+            if state.moves <= 0:
+                return "You have no more movement this turn!"
+            if 'Immobilization' in state.conditions:
+                return "You can't move, you've been immobilized!"
+        if check == 'AttacksResolved' and \
+                any(session.state[obj].incoming_attack for obj in session.fighters):
+            return "You have to wait until all attacks are resolved!"
+        if check == 'NeedsTarget':
+            target = _find(caller, args) if args else None
+            if target is None:
+                return "You need to specify a target to %s!" % action
+        if check == 'TargetNotSelf' and target is caller:
+            return "You can't %s yourself!" % action
+        if check == 'TargetInFight' and (not session or target not in session.slots):
+            return "%s isn't in the fight!" % target
+        if check == 'TargetHasHP' and hp(target) <= 0:
+            return "%s has already been defeated!" % target
+        if check == 'TargetNotEngaged' and session.range(caller, target) == 0:
+            return "You're already engaged with %s!" % target
+    return None
+
+
+def attack_type_check(caller, target, attack_type, effects):
+    """
+    Check that caller can make this type of attack on target.
+
+    Returns:
+        error (str): Why the attack can't be made, or None if it can.
+    """
+    session = _combat().get(caller)
+    target = _find(caller, target)
+    steps = session.range(caller, target)
+    if attack_type == 'melee' and steps > (2 if 'Lunge Attack' in effects else 0):
+        return "|413You need to be engaged with %s to attack in melee!|n" % target
+    if attack_type == 'ranged':
+        engaged = _enemies_engaged(caller)
+        if engaged:
+            return "|413You can't make ranged attacks while engaged with %s!|n" % engaged[0]
+    return None
+
+
+def _attack_message(attacker, attack_type, message):
+    """The attack message to show: given, picked from the attacker's pool or the default."""
+    if message == 'default' or not message:
+        pool = attacker.db.Melee_Messages if attack_type == 'melee' else attacker.db.Range_Messages
+        message = RNG.choice(pool) if pool else "<self> attacks <target>!"
+    if '<self>' not in message:
+        message = '<self> ' + message
+    return message
+
+
+def queue_attack(attacker, target, message, effects, attack_type):
+    """
+    Roll an attack on target, who then has to defend against it.
+
+    Args:
+        attacker (Object): The fighter attacking.
+        target (Object or str): The fighter attacked, or their name.
+        message (str): Attack message, 'default' or '' to use the
+            attacker's messages; may contain <self> and <target>.
+        effects (list): Special effects of the attack.
+        attack_type (str): 'melee' or 'ranged'.
+    """
+    combat = _combat()
+    target = _find(attacker, target)
+    session = combat.get(attacker)
+    data, roll_seed = stats(attacker), new_seed()
+    stat = data['ATM'] if attack_type == 'melee' else data['ATR']
+    steps = session.range(attacker, target)
+    attack = attack_roll(stat, steps, attack_type, effects, data['conditions'], Random(roll_seed))
+    session.record('attack', attacker=ref(attacker), target=ref(target), attack_type=attack_type,
+                   effects=list(effects), steps=steps, stat=stat, conditions=data['conditions'],
+                   seed=roll_seed, roll=attack)
+    message = _attack_message(attacker, attack_type, message)
+    message = message.replace('<self>', str(attacker)).replace('<target>', str(target))
+    if attack_type == 'melee':
+        message += " |522[Melee attack roll vs. %s: |544%i|522]|n" % (target, attack)
+    else:
+        message += " |525[Ranged attack roll vs. %s: |545%i|525]|n" % (target, attack)
+    session.room.msg_contents(message + _effect_string(effects))
+    session.state[target].incoming_attack = (attack, attacker, list(effects), attack_type)
+    session.expect_defense(target)
+    _grant_second(attacker, effects, attack_type)
+
+
+def _grant_second(attacker, effects, attack_type):
+    """Give attacker a second attack if effects include 'Double Attack' and they have none waiting."""
+    fighter = _combat().fighter(attacker)
+    if 'Double Attack' in effects and fighter and not fighter.second:
+        fighter.second = (attack_type, [e for e in effects if e != 'Double Attack'])
+
+
+def defend_queue(defender, defense_type, effects):
+    """
+    Answer the incoming attack on defender; it is resolved on the next tick.
+
+    Args:
+        defender (Object): The fighter defending.
+        defense_type (str): 'defend' or 'endure'.
+        effects (list): Special effects of the defense.
+    """
+    session = _combat().get(defender)
+    state = session.state[defender]
+    if state.defend_by is None:
+        return  # Already answered.
+    state.defend_by = None
+    session.queue(resolve_attack, defender, defense_type, list(effects))
+
+
+def resolve_attack(defender, defense_type, effects):
+    """Resolve the incoming attack on defender, dealing damage and effects."""
+    session = _combat().get(defender)
+    if session is None or defender not in session.state:
+        return
+    state = session.state[defender]
+    if not state.incoming_attack:
+        return
+    attack, attacker, attack_effects, attack_type = state.incoming_attack
+    state.incoming_attack = None
+    data, roll_seed, hp_before = stats(defender), new_seed(), hp(defender)
+    defense = 0
+    if defense_type != 'endure':
+        defense = defense_roll(data['DEF'], data['conditions'], Random(roll_seed))
+    dealt = damage(attack, defense, defense_type, attack_effects, effects)
+    _apply_hit(session, defender, attacker, dealt, defense, defense_type, attack_effects)
+    session.record('defend', defender=ref(defender), attacker=ref(attacker), defense_type=defense_type,
+                   effects=list(effects), attack=attack, attack_effects=list(attack_effects),
+                   stat=data['DEF'], conditions=data['conditions'], seed=roll_seed, defense=defense,
+                   damage=dealt, hp_before=hp_before, hp_after=hp(defender),
+                   ranges=session.ranges[session.slots[defender]].tolist())
+    _after_hit(session, defender, attacker, effects)
+
+
+def _apply_hit(session, defender, attacker, dealt, defense, defense_type, attack_effects):
+    """Deal the damage of a resolved attack on defender, with knockback, and tell the room."""
+    if defense_type == 'endure':
+        tag = "|225[Endure]|n"
+    else:
+        tag = "|225[Defense roll: |445%i|225]|n" % defense
+    if dealt:
+        defender.traits.health.current -= dealt
+        session.room.msg_contents("%s takes |555%i damage|n from %s's attack! %s" %
+                                  (defender, dealt, attacker, tag))
+        if 'Knockback' in attack_effects and attacker in session.state:
+            for _ in range(2):
+                session.step_away(defender, attacker)
+            session.room.msg_contents("%s is knocked back to %s range! |552[|5542|552 steps]|n" %
+                                      (defender, range_name(session.range(defender, attacker)).lower()))
+    else:
+        session.room.msg_contents("%s defends against %s's attack! %s" % (defender, attacker, tag))
+
+
+def _after_hit(session, defender, attacker, effects):
+    """Announce defender's defeat, or make their counterattack if their defense had one."""
+    if hp(defender) <= 0:
+        session.room.msg_contents("|413%s has been defeated!|n" % defender)
+    elif 'Counterattack' in effects and attacker in session.state and hp(attacker) > 0:
+        counter_type = 'melee' if session.range(defender, attacker) == 0 else 'ranged'
+        queue_attack(defender, attacker, 'default', [], counter_type)
+
+
+def area_targets(attacker, target):
+    """Who an area attack on target hits: target and every enemy of attacker engaged with them."""
+    session = _combat().get(attacker)
+    return [obj for obj in session.engage_group(target)
+            if obj is not attacker and (obj is target or session.hostile(attacker, obj)) and hp(obj) > 0]
+
+
+def resolve_area_attack(attacker, target, message, effects, attack_type):
+    """
+    Attack target and everyone around them at once. All targets defend
+    automatically; their damage is applied in one bulk trait update,
+    the room is sent one message with every outcome, knockback and
+    defeat, and each target gets a line of their own. 'Double Attack'
+    gives a second attack as it does for a single attack.
+
+    Args:
+        attacker (Object): The fighter attacking.
+        target (Object): The fighter the attack is aimed at.
+        message (str): Attack message; may contain <self> and <target>.
+        effects (list): Special effects of the attack.
+        attack_type (str): 'melee' or 'ranged'.
+    """
+    from world.traitbatch import TraitBatch  # Needs NumPy and the database, unlike the engine
+    session = _combat().get(attacker)
+    targets = area_targets(attacker, target)
+    data, roll_seed = stats(attacker), new_seed()
+    defenders = [stats(obj) for obj in targets]
+    ranges = [session.range(attacker, obj) for obj in targets]
+    base, results = area_attack(data, defenders, ranges, attack_type, effects, Random(roll_seed))
+    hp_before = [hp(obj) for obj in targets]
+    dealt_to = dict((obj, dealt) for obj, (_, _, dealt) in zip(targets, results))
+    batch = TraitBatch(targets, 'health')
+    batch.add_current([-dealt_to[obj] for obj in batch.objs])
+    batch.commit()
+    hp_after = [hp(obj) for obj in targets]
+    outcomes, defeated = [], []
+    for obj, (attack, defense, dealt), left in zip(targets, results, hp_after):
+        tag = "|225[Defense roll: |445%i|225]|n" % defense
+        if dealt:
+            outcome = "%s |555-%i|n" % (obj, dealt)
+            obj.msg("You take |555%i damage|n from %s's attack! %s" % (dealt, attacker, tag))
+            if 'Knockback' in effects:
+                for _ in range(2):
+                    session.step_away(obj, attacker)
+                outcome += " |552(knocked back to %s range)|n" % range_name(session.range(obj, attacker)).lower()
+            outcomes.append(outcome)
+        else:
+            outcomes.append("%s |225blocks|n" % obj)
+            obj.msg("You defend against %s's attack! %s" % (attacker, tag))
+        if left <= 0:
+            defeated.append(str(obj))
+    message = _attack_message(attacker, attack_type, message)
+    message = message.replace('<self>', str(attacker)).replace('<target>', str(target))
+    message += " |522[Area attack roll: |544%i|522]|n%s\n%s" % (base, _effect_string(effects), ', '.join(outcomes))
+    if defeated:
+        message += "\n|413Defeated: %s|n" % ', '.join(defeated)
+    session.room.msg_contents(message)
+    session.record('area', attacker=ref(attacker), targets=[ref(obj) for obj in targets], attack_type=attack_type,
+                   effects=list(effects), stats=data, defenders=defenders, ranges=ranges, seed=roll_seed,
+                   roll=base, results=[list(result) for result in results], hp_before=hp_before, hp_after=hp_after)
+    _grant_second(attacker, effects, attack_type)
+
+
+def recover(obj):
+    """Restore all of obj's HP and SP."""
+    obj.traits.health.fill_gauge()
+    obj.db.SP = max_sp(obj.db.SPE)
+    obj.msg("You rest and recover all of your HP and SP.")
+
+
+def get_engage_group(obj):
+    """Fighters engaged with obj, directly or through others, obj included."""
+    return _combat().get(obj).engage_group(obj)
+
+
+def _blocked(mover, rng, checks):
+    """
+    Roll for each enemy engaged with mover to block one step: their ATM
+    or DEF, whichever is higher, against mover's MOB.
+
+    Args:
+        rng (Random): Random source of the move.
+        checks (list): Gets a [fighter, stat] appended for every roll made.
+
+    Returns:
+        blocker (Object): The first fighter to block, or None.
+    """
+    mobility = int(mover.db.MOB or 0)
+    for other in _enemies_engaged(mover):
+        if hp(other) <= 0:
+            continue
+        stat = max(int(other.db.ATM or 0), int(other.db.DEF or 0))
+        checks.append([ref(other), stat])
+        if roll(stat, rng) > roll(mobility, rng):
+            return other
+    return None
+
+
+def _multi_step(mover, target, distance, mode, step, done, verb):
+    """Take up to distance steps, each of which an engaged enemy may block."""
+    combat = _combat()
+    session, state = combat.get(mover), combat.fighter(mover)
+    steps, blocker, checks, roll_seed = 0, None, [], new_seed()
+    rng = Random(roll_seed)
+    while steps < distance and not done(session.range(mover, target)):
+        blocker = _blocked(mover, rng, checks)
+        if blocker:
+            break
+        step(mover, target)
+        steps += 1
+    if mode == 'normal':
+        state.moves -= steps
+    session.record('move', mover=ref(mover), target=ref(target), verb=verb, mode=mode, distance=distance,
+                   mob=int(mover.db.MOB or 0), seed=roll_seed, checks=checks, steps=steps,
+                   blocked_by=ref(blocker), ranges=session.ranges[session.slots[mover]].tolist())
+    if steps:
+        session.room.msg_contents("%s %s to %s range with %s! |552[|554%i|552 step%s]|n" %
+                                  (mover, verb, range_name(session.range(mover, target)).lower(), target,
+                                  steps, '' if steps == 1 else 's'))
+    if blocker:
+        session.room.msg_contents("%s blocks %s's movement!" % (blocker, mover))
+    return steps
+
+
+def ms_approach(mover, target, distance, mode):
+    """
+    Move mover up to distance steps toward target.
+
+    Args:
+        mode (str): 'normal' spends movement; 'free' does not, as for
+            the 'Lunge Attack' effect.
+
+    Returns:
+        steps (int): Steps taken.
+    """
+    session = _combat().get(mover)
+    return _multi_step(mover, target, distance, mode, session.step_toward,
+                       lambda steps: steps <= 0, 'approaches')
+
+
+def ms_withdraw(mover, target, distance, mode):
+    """
+    Move mover up to distance steps away from target.
+
+    Args:
+        mode (str): 'normal' spends movement; 'free' does not, as for
+            the 'Parting Attack' effect.
+
+    Returns:
+        steps (int): Steps taken.
+    """
+    session = _combat().get(mover)
+    return _multi_step(mover, target, distance, mode, session.step_away,
+                       lambda steps: steps >= session.max_range, 'withdraws')
+
+
+def _condition(obj, name):
+    """Give obj a combat condition until the end of its next turn."""
+    state = _combat().fighter(obj)
+    if state:
+        state.conditions[name] = CONDITION_TURNS
+        _combat().get(obj).record('condition', fighter=ref(obj), condition=name, turns=CONDITION_TURNS)
+
+
+def _record(obj, kind, **data):
+    """Log an event in the fight obj is in, if any."""
+    session = _combat().get(obj)
+    if session:
+        session.record(kind, **data)
+
+
+def special_drawback(target, user, effects):
+    """Apply the drawback effects of user's special move."""
+    if 'Recoil' in effects:
+        hp_before = hp(user)
+        user.traits.health.current -= 2
+        _record(user, 'recoil', fighter=ref(user), damage=2, hp_before=hp_before, hp_after=hp(user))
+        user.location.msg_contents("%s takes |5552 damage|n from recoil! |255[|455Recoil|255]|n" % user)
+    if 'Exhausting' in effects:
+        state = _combat().fighter(user)
+        if state:
+            state.moves = 0
+    if 'Exposing' in effects:
+        _condition(user, 'Vulnerable')
+
+
+def special_support(target, user, effects):
+    """Apply the effects of user's support special move to target."""
+    if 'Healing' in effects:
+        roll_seed, hp_before = new_seed(), hp(target)
+        healed = roll(int(user.db.SPE or 0), Random(roll_seed)) + 1
+        target.traits.health.current += healed
+        _record(target, 'heal', user=ref(user), target=ref(target), spe=int(user.db.SPE or 0),
+                seed=roll_seed, healed=healed, hp_before=hp_before, hp_after=hp(target))
+        target.location.msg_contents("%s recovers |555%i HP|n!" % (target, healed))
+    if 'Power Up' in effects:
+        _condition(target, 'Powered Up')
+
+
+def special_hinder(target, user, effects):
+    """Apply the effects of user's hindering special move to target."""
+    if 'Weaken' in effects:
+        _condition(target, 'Weakened')
+    if 'Immobilization' in effects:
+        _condition(target, 'Immobilization')
+
@@ -0,0 +1,218 @@
+# -*- coding: utf-8 -*-
+"""
+Combat simulator
+
+Plays out one-on-one fights between generated fighters with the combat
+engine in world/rules.py, without a server or database, so a change to
+the rules can be measured before it goes live. From the game directory:
+
+    python -m world.simulator --fights 5000 --seed 1
+
+or `simulate(5000, seed=1)` from Python, which returns the report as a
+dict. It covers:
+
+    * throughput: fights and attacks resolved per second,
+    * balance: win rates by build (melee, ranged or even) and by each
+      fighter's highest stat, how often the first to act wins, draws,
+    * turns to kill: rounds until a fight is decided,
+    * resolve latency: mean and p99 time to resolve one attack.
+
+Fighters, their specials and every roll come from one seeded
+`random.Random`, so the same seed and rules give the same fights.
+
+Each generated fighter spends STAT_POINTS on their stats and gets one
+special attack of their build's type, paid for with SP. On their turn
+a melee fighter closes in (dashing if it can't reach) and attacks, a
+ranged fighter steps away from an engaged foe and shoots. Attacks are
+always defended.
+"""
+import argparse
+from random import Random
+from timeit import default_timer
+from world import rules
+
+START_RANGE = 2  # As world.combat.START_RANGE
+ROOM_SIZE = 10  # As world.combat.MAX_RANGE
+MAX_TURNS = 200  # A fight still going after this many turns is a draw
+SPECIAL_ATTACK_EFFECTS = ('Double Damage', 'Defense Bypass', 'Knockback', 'Boosted Range')
+
+
+def percentile(values, percent):
+    """The value below which percent of values fall (nearest rank), or 0.0 if none."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(0, min(len(ordered) - 1, int(round(percent / 100.0 * len(ordered))) - 1))]
+
+
+def make_fighter(rng):
+    """
+    Generate a fighter with random stats and a special attack.
+
+    Returns:
+        fighter (dict): Stats, 'build', 'special' (type, effects) and 'cost'.
+    """
+    weights = [rng.random() ** 2 for _ in rules.STATS]
+    values = dict((stat, 0) for stat in rules.STATS)
+    for _ in range(rules.STAT_POINTS):
+        open_stats = [index for index, stat in enumerate(rules.STATS) if values[stat] < rules.STAT_MAX]
+        pick = rng.random() * sum(weights[index] for index in open_stats)
+        for index in open_stats:
+            pick -= weights[index]
+            if pick <= 0:
+                break
+        values[rules.STATS[index]] += 1
+    fighter = dict(values)
+    if fighter['ATM'] == fighter['ATR']:
+        fighter['build'] = 'even'
+    else:
+        fighter['build'] = 'melee' if fighter['ATM'] > fighter['ATR'] else 'ranged'
+    attack_type = 'melee' if fighter['ATM'] >= fighter['ATR'] else 'ranged'
+    special_type = 'Special Melee Attack' if attack_type == 'melee' else 'Special Ranged Attack'
+    effects = [effect for effect in SPECIAL_ATTACK_EFFECTS if special_type in rules.SPECIAL_EFFECTS[effect][1]]
+    effects = rng.sample(effects, rng.randint(1, 2))
+    while effects and rules.check_special(special_type, effects, fighter['SPE']):
+        effects.pop()
+    fighter.update(special=(attack_type, effects), cost=rules.special_cost(effects))
+    return fighter
+
+
+def _blocked(mover, foe, rng):
+    """True if foe blocks mover stepping out of engaged range."""
+    return rules.roll(max(foe['ATM'], foe['DEF']), rng) > rules.roll(mover['MOB'], rng)
+
+
+def _take_turn(me, foe, steps, room_size, rng, latencies):
+    """
+    Play one turn of me against foe.
+
+    Returns:
+        steps (int): The range between them after the turn.
+    """
+    moves, action = me['MOB'] // 2, True
+    if me['ATM'] >= me['ATR']:
+        if steps > moves:
+            moves += (me['MOB'] + 1) // 2
+            action = False
+        steps = max(0, steps - moves)
+        attack_type = 'melee' if steps == 0 else None
+    else:
+        while moves and steps < room_size:
+            if steps == 0 and _blocked(me, foe, rng):
+                break
+            steps, moves = steps + 1, moves - 1
+        attack_type = 'ranged' if steps else 'melee'
+    if not (action and attack_type):
+        return steps
+    effects = ()
+    if me['special'][0] == attack_type and me['sp'] >= me['cost']:
+        effects = me['special'][1]
+        me['sp'] -= me['cost']
+    started = default_timer()
+    dealt = rules.resolve(me, foe, steps, attack_type, 'defend', effects, (), rng)[2]
+    latencies.append(default_timer() - started)
+    foe['hp'] -= dealt
+    if dealt and 'Knockback' in effects:
+        steps = min(room_size, steps + 2)
+    return steps
+
+
+def fight(first, second, rng, room_size=ROOM_SIZE, max_turns=MAX_TURNS):
+    """
+    Play out a fight, first taking the first turn.
+
+    Returns:
+        result (tuple): (index of the winner, 0 or 1, or None for a draw;
+            turns taken; list of seconds spent resolving each attack)
+    """
+    fighters = [dict(each, hp=rules.max_hp(each['VIT']), sp=rules.max_sp(each['SPE']))
+                for each in (first, second)]
+    steps, latencies = START_RANGE, []
+    for turn in range(max_turns):
+        me, foe = fighters[turn % 2], fighters[1 - turn % 2]
+        steps = _take_turn(me, foe, steps, room_size, rng, latencies)
+        if foe['hp'] <= 0:
+            return turn % 2, turn + 1, latencies
+    return None, max_turns, latencies
+
+
+def simulate(fights=5000, seed=0, room_size=ROOM_SIZE):
+    """
+    Run fights between pairs of newly generated fighters.
+
+    Args:
+        fights (int): How many fights to run.
+        seed (hashable): Seed for fighters and rolls.
+        room_size (int): Farthest range fighters can get apart.
+
+    Returns:
+        report (dict): Throughput, balance and latency figures.
+    """
+    rng = Random(seed)
+    played = dict((key, 0) for key in ('melee', 'ranged', 'even') + rules.STATS)
+    won = dict(played)
+    first_wins, draws, rounds, latencies = 0, 0, [], []
+    started = default_timer()
+    for _ in range(fights):
+        pair = (make_fighter(rng), make_fighter(rng))
+        winner, turns, resolved = fight(pair[0], pair[1], rng, room_size)
+        latencies.extend(resolved)
+        for index, each in enumerate(pair):
+            main_stat = max(rules.STATS, key=lambda stat: each[stat])
+            for key in (each['build'], main_stat):
+                played[key] += 1
+                won[key] += index == winner
+        if winner is None:
+            draws += 1
+            continue
+        first_wins += winner == 0
+        rounds.append((turns + 1) // 2)
+    elapsed = default_timer() - started
+    decided = fights - draws
+    return {
+        'fights': fights,
+        'seed': seed,
+        'seconds': elapsed,
+        'fights_per_second': fights / elapsed if elapsed else 0.0,
+        'attacks_per_second': len(latencies) / elapsed if elapsed else 0.0,
+        'win_rates': dict((key, won[key] / float(played[key])) for key in played if played[key]),
+        'first_mover_win_rate': first_wins / float(decided) if decided else 0.0,
+        'draws': draws,
+        'rounds_to_kill': {'mean': sum(rounds) / float(len(rounds)) if rounds else 0.0,
+                           'median': percentile(rounds, 50),
+                           'p90': percentile(rounds, 90)},
+        'resolve_latency': {'mean': sum(latencies) / len(latencies) if latencies else 0.0,
+                            'p99': percentile(latencies, 99)},
+    }
+
+
+def format_report(report):
+    """The report of `simulate()` as lines of text."""
+    lines = ["%i fights (seed %s) in %.2fs: %.0f fights/s, %.0f attacks/s" %
+             (report['fights'], report['seed'], report['seconds'],
+              report['fights_per_second'], report['attacks_per_second']),
+             "First mover wins %.1f%%, %i draws" % (report['first_mover_win_rate'] * 100, report['draws']),
+             "Rounds to kill: mean %.2f, median %i, p90 %i" %
+             (report['rounds_to_kill']['mean'], report['rounds_to_kill']['median'],
+              report['rounds_to_kill']['p90']),
+             "Resolve latency: mean %.1fus, p99 %.1fus" %
+             (report['resolve_latency']['mean'] * 1e6, report['resolve_latency']['p99'] * 1e6),
+             "Win rates:"]
+    for key in ('melee', 'ranged', 'even') + rules.STATS:
+        if key in report['win_rates']:
+            lines.append("  %-6s %5.1f%%" % (key, report['win_rates'][key] * 100))
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    """Run the simulator from the command line and print its report."""
+    parser = argparse.ArgumentParser(description="Simulate fights with the combat rules.")
+    parser.add_argument('--fights', type=int, default=5000, help="number of fights")
+    parser.add_argument('--seed', default='0', help="seed for fighters and rolls")
+    parser.add_argument('--room-size', type=int, default=ROOM_SIZE, help="farthest range in the arena")
+    args = parser.parse_args(argv)
+    print(format_report(simulate(args.fights, args.seed, args.room_size)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+"""
+Compiled special moves
+
+A character's special moves are kept in two free-form Attributes:
+`db.Special_Moves` maps each move name to [special type, [effects]],
+and `db.Special_Messages` maps move names to lists of messages. Every
+use of a move read and checked those again, working out its SP cost
+more than once on the way.
+
+`get(obj)` compiles them once into a table of immutable `SpecialMove`
+tuples, each with its SP cost, attack type, reach, message templates
+and rule check already worked out, and keeps the table in `obj.ndb`.
+It is compiled again only after `invalidate(obj)`, called wherever a
+character's special moves or messages change, or when the SPE stat
+the moves were checked against changes.
+
+Example:
+    ```python
+    >>> move = specials.find(caller, 'mega')
+    >>> move.cost, move.attack_type, move.reach
+    (4, 'melee', 0)
+    >>> move.message()
+    '<self> throws a megaton punch at <target>!'
+    ```
+"""
+from collections import namedtuple
+from random import choice
+from world import rules
+
+STATS = {'hits': 0, 'compiles': 0}
+ATTACK_TYPES = {'Special Melee Attack': 'melee', 'Special Ranged Attack': 'ranged'}
+TARGETED = ('Special Melee Attack', 'Special Ranged Attack', 'Support Other', 'Hinder Other')
+DEFAULT_MESSAGES = {
+    'Special Melee Attack': "<self> uses a special attack on <target>!",
+    'Special Ranged Attack': "<self> uses a special attack on <target>!",
+    'Support Other': "<self> uses a special move on <target>!",
+    'Hinder Other': "<self> uses a special move on <target>!",
+}
+
+
+def _template(message):
+    """The message with <self> in it, put in front if missing."""
+    return message if '<self>' in message else '<self> ' + message
+
+
+class SpecialMove(namedtuple('SpecialMove', 'name type effects cost attack_type reach messages error')):
+    """
+    One compiled special move.
+
+    Attributes:
+        name (str): Name of the move.
+        type (str): One of `rules.SPECIAL_TYPES`.
+        effects (tuple): Effect names.
+        cost (int): SP cost.
+        attack_type (str): 'melee' or 'ranged' for attacks, else None.
+        reach (int): Farthest range to the target the move can be used
+            at, or None if any range will do.
+        messages (tuple): Message templates with <self> and <target>.
+        error (str): Why the move breaks the rules, or None.
+    """
+    __slots__ = ()
+
+    @property
+    def needs_target(self):
+        """True if the move is used on someone else."""
+        return self.type in TARGETED
+
+    def message(self, custom='default'):
+        """A message template for using the move: custom if given, else one of its own."""
+        if custom and custom != 'default':
+            return _template(custom)
+        return choice(self.messages)
+
+    def pretty(self):
+        """Description of the move with its type, SP cost and effects."""
+        text = "|455%s|255 (%s, |455%i|255 SP)|n" % (self.name, self.type, self.cost)
+        if self.effects:
+            text += " |255[|455%s|255]|n" % '|255, |455'.join(self.effects)
+        return text
+
+
+def compile_move(name, definition, messages, spe):
+    """
+    Compile one special move.
+
+    Args:
+        name (str): Name of the move.
+        definition (list): [special type, [effects]] as stored in
+            `db.Special_Moves`.
+        messages (list): The move's messages from `db.Special_Messages`.
+        spe (int): SPE stat of the move's owner.
+
+    Returns:
+        move (SpecialMove): The compiled move; its `error` is set if the
+            definition is malformed or breaks the rules.
+    """
+    try:
+        special_type, effects = definition[0], tuple(definition[1])
+    except (IndexError, KeyError, TypeError):
+        return SpecialMove(name, None, (), 0, None, None, ("<self> uses a special move!",),
+                           "%s: This special move is not set up properly." % name)
+    attack_type = ATTACK_TYPES.get(special_type)
+    reach = None
+    if attack_type == 'melee':
+        reach = 2 if 'Lunge Attack' in effects else 0
+    elif 'Touch Effect' in effects:
+        reach = 0
+    templates = tuple(_template(message) for message in messages or () if message)
+    templates = templates or (DEFAULT_MESSAGES.get(special_type, "<self> uses a special move!"),)
+    error = rules.check_special(special_type, effects, spe)
+    return SpecialMove(name, special_type, effects, rules.special_cost(effects), attack_type, reach,
+                       templates, "%s: %s" % (name, error) if error else None)
+
+
+def compile_table(moves, messages, spe):
+    """Compile every move in moves. Returns a dict of SpecialMove by name."""
+    messages = messages or {}
+    return dict((name, compile_move(name, definition, messages.get(name), spe))
+                for name, definition in (moves or {}).items())
+
+
+def get(obj):
+    """The compiled special moves of obj, as a dict of SpecialMove by name."""
+    spe = obj.db.SPE
+    cached = obj.ndb.special_table
+    if cached and cached[0] == spe:
+        STATS['hits'] += 1
+        return cached[1]
+    STATS['compiles'] += 1
+    table = compile_table(obj.db.Special_Moves, obj.db.Special_Messages, spe)
+    obj.ndb.special_table = (spe, table)
+    return table
+
+
+def find(obj, word):
+    """The first of obj's special moves with word in its name, or None."""
+    word = word.lower()
+    for name in sorted(get(obj)):
+        if word in name.lower():
+            return get(obj)[name]
+    return None
+
+
+def invalidate(obj):
+    """Drop obj's compiled moves; call after changing its special moves or messages."""
+    obj.ndb.special_table = None
@@ -0,0 +1,5 @@
+"""
+Unit tests of the world modules, run with the game's test runner:
+
+    evennia test --settings settings.py world
+"""
@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+"""Tests of alliances and fight teams, world/allies.py."""
+from unittest import TestCase
+from world import allies
+
+
+class _Db(object):
+    Allies = None
+
+
+class _Fighter(object):
+    def __init__(self, key):
+        self.key, self.db = key, _Db()
+
+    def __repr__(self):
+        return self.key
+
+
+class TestTeams(TestCase):
+    def setUp(self):
+        allies._ALLIES.clear()
+        self.alice, self.bob, self.carol, self.dave = [_Fighter(key) for key in ('alice', 'bob', 'carol', 'dave')]
+
+    def test_add_remove_and_listed(self):
+        self.assertTrue(allies.add(self.alice, self.bob))
+        self.assertFalse(allies.add(self.alice, self.bob))
+        allies.add(self.alice, self.carol)
+        self.assertEqual(allies.listed(self.alice), [self.bob, self.carol])
+        self.assertTrue(allies.remove(self.alice, self.bob))
+        self.assertEqual(self.alice.db.Allies, [self.carol])
+        allies.forget(self.alice)
+        self.assertEqual(allies.allies_of(self.alice), set([self.carol]))  # Read back from db.Allies
+
+    def test_teams_join_mutual_allies_transitively(self):
+        for one, other in ((self.alice, self.bob), (self.bob, self.carol)):
+            allies.add(one, other)
+            allies.add(other, one)
+        allies.add(self.dave, self.alice)  # One-sided
+        teams = allies.Teams([self.alice, self.bob, self.carol, self.dave])
+        self.assertEqual(teams.sides(), [[self.alice, self.bob, self.carol], [self.dave]])
+        self.assertFalse(teams.hostile(self.alice, self.carol))
+        self.assertTrue(teams.hostile(self.alice, self.dave))
+        self.assertFalse(teams.hostile(self.dave, self.alice))  # Dave holds back from Alice
+        version = allies.version()
+        allies.remove(self.bob, self.carol)
+        self.assertNotEqual(allies.version(), version)
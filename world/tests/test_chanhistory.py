@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+"""Tests of the channel history ring and its log, world/chanhistory.py."""
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+from django.test import override_settings
+from world import chanhistory
+
+
+class _Channel(object):
+    def __init__(self, id):
+        self.id = id
+
+
+class TestTail(TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.path = os.path.join(self.folder, 'log')
+        self.chunk = chanhistory._TAIL_CHUNK
+        chanhistory._TAIL_CHUNK = 16  # Several reads for even a short file
+
+    def tearDown(self):
+        chanhistory._TAIL_CHUNK = self.chunk
+        shutil.rmtree(self.folder)
+
+    def test_tail(self):
+        self.assertEqual(chanhistory._tail(self.path, 3), [])
+        with open(self.path, 'w') as handle:
+            handle.write(''.join('line %i\n' % number for number in range(50)))
+        self.assertEqual(chanhistory._tail(self.path, 3), ['line 47', 'line 48', 'line 49'])
+        self.assertEqual(len(chanhistory._tail(self.path, 100)), 50)
+
+
+class TestChannelHistory(TestCase):
+    def setUp(self):
+        chanhistory._HISTORIES.clear()
+        self.folder = tempfile.mkdtemp()
+        self.settings = override_settings(CHANNEL_HISTORY_SIZE=5, CHANNEL_LOG_BATCH=3, CHANNEL_LOG_DIR=self.folder)
+        self.settings.__enter__()
+        self.public = _Channel(7)
+
+    def tearDown(self):
+        self.settings.__exit__(None, None, None)
+        chanhistory._HISTORIES.clear()
+        shutil.rmtree(self.folder)
+
+    def test_ring_keeps_the_last_lines(self):
+        for number in range(8):
+            chanhistory.record(self.public, 'line %i' % number)
+        self.assertEqual([message for when, message in chanhistory.recent(self.public)],
+                         ['line %i' % number for number in range(3, 8)])
+        self.assertEqual([message for when, message in chanhistory.recent(self.public, 2)], ['line 6', 'line 7'])
+        self.assertEqual(chanhistory.recent(self.public, 0), [])
+
+    def test_batches_and_reload(self):
+        chanhistory.record(self.public, 'kept 1')
+        chanhistory.record(self.public, 'not kept', keep=False)
+        chanhistory.record(self.public, 'kept 2')
+        self.assertFalse(os.path.exists(chanhistory.path(self.public)))  # Below the batch size
+        self.assertEqual(len(chanhistory.recent(self.public)), 3)
+        chanhistory.flush_all()
+        chanhistory._HISTORIES.clear()
+        self.assertEqual([message for when, message in chanhistory.recent(self.public)], ['kept 1', 'kept 2'])
@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+"""Tests of the worn-clothing index and its cover graph, world/clothing.py."""
+from unittest import TestCase
+from world.clothing import WornIndex
+
+
+class _Db(object):
+    def __init__(self, **attributes):
+        self.__dict__.update(attributes)
+
+    def __getattr__(self, name):
+        return None  # Unset Attributes read as None, as on a real object.
+
+
+class _Garment(object):
+    """Just what the index reads of a garment."""
+    def __init__(self, key, clothing_type, wearer):
+        self.key, self.location = key, wearer
+        self.db = _Db(clothing_type=clothing_type)
+
+    def __repr__(self):
+        return self.key
+
+
+class TestWornIndex(TestCase):
+    def setUp(self):
+        self.character = object()
+        self.index = WornIndex(self.character)
+        self.shirt = _Garment('shirt', 'undershirt', self.character)
+        self.top = _Garment('top', 'top', self.character)
+        self.coat = _Garment('coat', 'outerwear', self.character)
+        for garment in (self.coat, self.shirt, self.top):
+            self.index.add(garment)
+
+    def test_items_in_type_order(self):
+        self.assertEqual(self.index.items(), [self.top, self.shirt, self.coat])
+        self.assertEqual(self.index.count('top'), 1)
+
+    def test_cover(self):
+        self.assertTrue(self.index.cover(self.shirt, self.top))
+        self.assertTrue(self.index.cover(self.top, self.coat))
+        self.assertIs(self.shirt.db.covered_by, self.top)
+        self.assertIs(self.index.outermost(self.shirt), self.coat)
+        self.assertEqual(self.index.beneath(self.coat), [self.top, self.shirt])
+        self.assertFalse(self.index.visible(self.shirt))
+
+    def test_cover_refuses_cycles(self):
+        self.index.cover(self.shirt, self.top)
+        self.index.cover(self.top, self.coat)
+        self.assertFalse(self.index.can_cover(self.coat, self.shirt))  # Over the bottom of the chain
+        self.assertFalse(self.index.can_cover(self.coat, self.top))  # Over the middle
+        self.assertFalse(self.index.can_cover(self.coat, self.coat))
+        self.assertFalse(self.index.cover(self.coat, self.shirt))
+        self.assertIsNone(self.coat.db.covered_by)
+
+    def test_discard_uncovers(self):
+        self.index.cover(self.shirt, self.top)
+        self.assertEqual(self.index.discard(self.top), [self.shirt])
+        self.assertIsNone(self.shirt.db.covered_by)
+        self.assertTrue(self.index.visible(self.shirt))
+
+    def test_prune_and_load_covers(self):
+        self.top.db.covered_by = self.shirt
+        self.shirt.db.covered_by = self.top  # A loop saved by older code
+        self.index.load_covers()
+        kept = [garment for garment in (self.top, self.shirt) if self.index.cover_of(garment)]
+        self.assertEqual(len(kept), 1)  # One edge of the loop is dropped, and its Attribute cleared.
+        dropped = self.shirt if kept == [self.top] else self.top
+        self.assertIsNone(dropped.db.covered_by)
+        self.coat.location = None
+        self.assertEqual(self.index.count(), 2)
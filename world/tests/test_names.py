@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+"""Tests of the online name index, world/names.py."""
+from unittest import TestCase
+from world import names
+
+
+class _Aliases(object):
+    def __init__(self, aliases):
+        self.aliases = list(aliases)
+
+    def all(self):
+        return self.aliases
+
+
+class _Character(object):
+    """Just what the index reads of a character."""
+    def __init__(self, id, key, aliases=()):
+        self.id, self.key, self.aliases = id, key, _Aliases(aliases)
+
+    def __repr__(self):
+        return self.key
+
+
+class TestNames(TestCase):
+    def setUp(self):
+        names._EXACT.clear()
+        del names._SORTED[:]
+        names._NAMES.clear()
+        self.rulan = _Character(1, 'Rulan', ['Ru'])
+        self.ruby = _Character(2, 'Ruby')
+        self.lion = _Character(3, 'LazyLion')
+        for character in (self.rulan, self.ruby, self.lion):
+            names.add(character)
+
+    def test_exact_wins_over_prefix(self):
+        self.assertEqual(names.find('RULAN'), [self.rulan])
+        self.assertEqual(names.find('ru'), [self.rulan])  # Rulan's alias
+
+    def test_prefix_in_name_order(self):
+        self.assertEqual(names.find('rub'), [self.ruby])
+        self.assertEqual(names.prefix('r'), [self.rulan, self.ruby])
+
+    def test_fuzzy_last(self):
+        self.assertEqual(names.find('rulna'), [self.rulan])
+        self.assertEqual(names.find('zz'), [])
+        self.assertEqual(names.find('  '), [])
+
+    def test_renamed(self):
+        self.rulan.key = 'Rolan'
+        names.renamed(self.rulan)
+        self.assertEqual(names.exact('rulan'), [])
+        self.assertEqual(names.find('rol'), [self.rulan])
+
+    def test_remove(self):
+        for character in (self.rulan, self.ruby, self.lion):
+            names.remove(character)
+        self.assertEqual((names._EXACT, names._SORTED, names._NAMES), ({}, [], {}))
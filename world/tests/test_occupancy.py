@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+"""Tests of the hourly occupancy counts, world/occupancy.py."""
+import os
+import shutil
+import tempfile
+from time import time
+from unittest import TestCase
+from django.test import override_settings
+from world import occupancy
+
+
+class _Room(object):
+    def __init__(self, id):
+        self.id = id
+
+
+class TestOccupancy(TestCase):
+    def setUp(self):
+        for state in (occupancy._COUNTS, occupancy._BUCKETS, occupancy._PENDING):
+            state.clear()
+        self.folder = tempfile.mkdtemp()
+        self.log = os.path.join(self.folder, 'occupancy.jsonl')
+        self.park = _Room(1)
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def test_dwell_and_peak(self):
+        now = time()
+        occupancy.enter(self.park, 'downtown')
+        occupancy.enter(self.park)
+        occupancy.leave(self.park, now - 120, 'downtown', now - 300, now=now)
+        occupancy.leave(self.park, now - 60, now=now)
+        self.assertEqual(occupancy.average_dwell(room=self.park), 90)
+        self.assertEqual(occupancy.average_dwell(area='downtown'), 300)
+        self.assertEqual(occupancy.peak(room=self.park), 2)
+        self.assertEqual(occupancy.peak(area='downtown'), 1)
+        self.assertEqual(occupancy.areas(), ['downtown'])
+
+    def test_window(self):
+        occupancy.enter(self.park, 'downtown')
+        rows = occupancy.heatmap('downtown', hours=3)
+        self.assertEqual([hour for hour, visits, peak in rows],
+                         list(range(occupancy._hour() - 2, occupancy._hour() + 1)))
+        self.assertEqual(rows[-1][1:], (0, 1))
+        self.assertEqual(len(occupancy.heatmap('downtown', hours=0)), 1)  # At least one hour
+        self.assertEqual(occupancy.peak(room=_Room(2), hours=0), 0)
+        self.assertIsNone(occupancy.average_dwell(room=_Room(2)))
+
+    def test_old_hours_are_trimmed_and_reloaded(self):
+        with override_settings(OCCUPANCY_HOURS=2, OCCUPANCY_LOG=self.log):
+            occupancy._add(('room', 1), occupancy._hour() - 5, 10, 1, 1)
+            occupancy._add(('room', 1), occupancy._hour(), 20, 1, 1)
+            self.assertEqual(occupancy.flush_all(), 2)
+            self.assertEqual(list(occupancy._BUCKETS[('room', 1)]), [occupancy._hour()])
+            occupancy._BUCKETS.clear()
+            occupancy.load()
+            self.assertEqual(occupancy.average_dwell(room=self.park), 20)
+            with open(self.log) as handle:
+                self.assertEqual(len(handle.readlines()), 1)  # Compacted to the buckets kept
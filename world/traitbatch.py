@@ -0,0 +1,213 @@
+# -*- coding: utf-8 -*-
+"""
+Trait batches
+
+Some game events touch the same trait on many objects at once:
+regenerating `health` for everyone online, a room-wide hazard, or
+recomputing `mass` limits after a rules change. Doing that one `Trait`
+at a time means a property call and a save for every object.
+
+A `TraitBatch` loads one trait from many objects into NumPy arrays,
+applies vectorized arithmetic with the same bound rules as `Trait`
+(min, max, and max='base'), and writes all changed traits back in a
+single database transaction.
+
+Regen traits are loaded with the value they have regenerated to when
+the batch is made, and committed with that moment as their new `t0`.
+
+Example:
+    ```python
+    >>> batch = TraitBatch(room.contents, 'health')
+    >>> batch.add_current(-3)           # hazard hits everyone
+    >>> batch.actual
+    array([ 17.,   4.,   0.])
+    >>> batch.commit()                  # one transaction
+    ```
+"""
+import numpy as np
+from time import time
+from django.db import transaction
+from typeclasses.traits import RANGE_TRAITS, GAUGE_TRAITS, _detach
+
+
+def _number(value, like):
+    """Return numpy value as a plain int if it was an int and still is whole, else float."""
+    value = float(value)
+    if isinstance(like, int) and value.is_integer():
+        return int(value)
+    return value
+
+
+class TraitBatch(object):
+    """
+    Vectorized view of one trait across many objects.
+
+    Objects without the trait are skipped; `objs` lists the ones kept,
+    in the order of the arrays.
+
+    Args:
+        objs (iterable): Objects with a `traits` TraitHandler.
+        key (str): Trait key, e.g. 'health'.
+    """
+    def __init__(self, objs, key):
+        self.key = key
+        self.objs, self.traits = [], []
+        for obj in objs:
+            handler = getattr(obj, 'traits', None)
+            trait = handler.get(key) if handler else None
+            if trait is not None:
+                self.objs.append(obj)
+                self.traits.append(trait)
+        size = len(self.traits)
+        self.loaded_at = time()  # Regen traits are read as of this moment.
+        self.is_range = np.array([t._type in RANGE_TRAITS for t in self.traits], dtype=bool)
+        self.is_gauge = np.array([t._type in GAUGE_TRAITS for t in self.traits], dtype=bool)
+        self.is_counter = np.array([t._type == 'counter' for t in self.traits], dtype=bool)
+        self.base = np.array([t.base for t in self.traits], dtype=float)
+        self.mod = np.array([t.mod for t in self.traits], dtype=float)
+        self.current = np.array([t.current for t in self.traits], dtype=float)
+        minimum, maximum = np.full(size, np.nan), np.full(size, np.nan)
+        self.max_is_base = np.zeros(size, dtype=bool)
+        for index, trait in enumerate(self.traits):
+            if trait._type not in RANGE_TRAITS:
+                continue
+            data = self._data(trait)
+            if data.get('min') is not None:
+                minimum[index] = data['min']
+            if data.get('max') == 'base':
+                self.max_is_base[index] = True
+            elif data.get('max') is not None:
+                maximum[index] = data['max']
+        self.min, self.max = minimum, maximum
+        self._loaded = (self.base.copy(), self.mod.copy(), self.current.copy())
+
+    def __len__(self):
+        return len(self.traits)
+
+    @staticmethod
+    def _data(trait):
+        """The dict form of a Trait or CompactTrait."""
+        return trait.to_dict() if hasattr(trait, 'to_dict') else trait._data
+
+    # Bounds
+
+    def _upper(self):
+        """Upper bound per trait: max, base+mod if max is 'base', or unbounded."""
+        upper = np.where(self.max_is_base, self.base + self.mod, self.max)
+        return np.where(np.isnan(upper), np.inf, upper)
+
+    def _lower(self):
+        """Lower bound per trait, or unbounded."""
+        return np.where(np.isnan(self.min), -np.inf, self.min)
+
+    def _enforce_bounds(self, values):
+        """Vectorized `Trait._enforce_bounds`: the minimum wins over the maximum."""
+        lower = self._lower()
+        bounded = np.minimum(values, self._upper())
+        bounded = np.where(bounded <= lower, lower, bounded)
+        return np.where(self.is_range, bounded, values)
+
+    # Reading
+
+    @property
+    def actual(self):
+        """Array of actual values, as `Trait.actual` would report them."""
+        mod_base = self._enforce_bounds(self.base + self.mod)
+        mod_current = self._enforce_bounds(self.current + self.mod)
+        return np.where(self.is_gauge, self.current, np.where(self.is_counter, mod_current, mod_base))
+
+    def percent(self):
+        """Array of current values as a fraction of max, like `Trait.percent`."""
+        full = np.where(np.isnan(self.max) & ~self.max_is_base, self.base + self.mod, self._upper())
+        with np.errstate(divide='ignore', invalid='ignore'):
+            ratio = np.where(full != 0, self.current * 100.0 / full, 100.0)
+        return np.where(self.is_range, ratio, 100.0)
+
+    # Writing
+
+    def add_current(self, amount, where=None):
+        """Add amount (scalar or array) to `current` of range traits, within bounds."""
+        self.set_current(self.current + amount, where)
+
+    def set_current(self, values, where=None):
+        """Set `current` of range traits to values (scalar or array), within bounds."""
+        values = np.broadcast_to(np.asarray(values, dtype=float), self.current.shape)
+        mask = self.is_range if where is None else (self.is_range & where)
+        self.current = np.where(mask, self._enforce_bounds(values), self.current)
+
+    def fill(self, where=None):
+        """Vectorized `Trait.fill_gauge` for gauge traits."""
+        mask = self.is_gauge if where is None else (self.is_gauge & where)
+        filled = self._enforce_bounds(self.current + self._enforce_bounds(self.base + self.mod))
+        self.current = np.where(mask, filled, self.current)
+
+    def set_base(self, values, where=None):
+        """Set `base` to values (scalar or array), within bounds."""
+        values = np.broadcast_to(np.asarray(values, dtype=float), self.base.shape)
+        old = self.base
+        self.base = np.where(self.max_is_base, values, old)  # max='base' follows the new base.
+        bounded = self._enforce_bounds(values)
+        self.base = bounded if where is None else np.where(where, bounded, old)
+
+    def set_mod(self, values, where=None):
+        """Set `mod`; increases flow into gauge `current` like `Trait.mod`."""
+        values = np.broadcast_to(np.asarray(values, dtype=float), self.mod.shape)
+        if where is not None:
+            values = np.where(where, values, self.mod)
+        delta = values - self.mod
+        self.mod = values
+        raised = np.where(delta >= 0, self.current + delta, self.current)
+        self.current = np.where(self.is_gauge, self._enforce_bounds(raised), self.current)
+
+    def add_mod(self, amount, where=None):
+        """Add amount (scalar or array) to `mod`."""
+        self.set_mod(self.mod + amount, where)
+
+    # Persistence
+
+    def changed(self):
+        """Boolean array of traits that differ from what was loaded."""
+        base, mod, current = self._loaded
+        return (self.base != base) | (self.mod != mod) | (self.current != current)
+
+    def commit(self):
+        """
+        Write every changed trait back to its object in one transaction.
+
+        Returns:
+            count (int): Number of traits written.
+        """
+        rows = np.flatnonzero(self.changed())
+        handlers = []
+        with transaction.atomic():
+            for row in rows:
+                obj, trait = self.objs[row], self.traits[row]
+                data = _detach(self._data(trait))
+                data['base'] = _number(self.base[row], data.get('base'))
+                data['mod'] = _number(self.mod[row], data.get('mod'))
+                if trait._type in RANGE_TRAITS:
+                    data['current'] = _number(self.current[row], data.get('current', data['base']))
+                if trait._type == 'regen':
+                    data['t0'] = self.loaded_at
+                handler = obj.traits
+                handler.attr_dict[self.key] = data  # Saves now unless the handler is buffered.
+                handler.cache.pop(self.key, None)
+                handler.mark_dirty(self.key)
+                if handler.buffered:
+                    handlers.append(handler)
+            for handler in handlers:
+                handler.flush()
+        self.traits = [obj.traits.get(self.key) for obj in self.objs]
+        self._loaded = (self.base.copy(), self.mod.copy(), self.current.copy())
+        return len(rows)
+
+    def apply(self, func):
+        """
+        Run func(batch) to do arbitrary vectorized work, then commit.
+
+        Returns:
+            count (int): Number of traits written.
+        """
+        func(self)
+        return self.commit()
+
@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+"""
+Turn scheduler
+
+One `TurnScheduler` runs the turns of every fight in the game from a
+single ticker, every `settings.COMBAT_TICK_INTERVAL` seconds. On each
+tick and for each running `CombatSession` it:
+
+    * passes the turn of a fighter who has not finished it within
+      `settings.COMBAT_TURN_TIMEOUT` seconds,
+    * defends for a fighter who has not answered an attack within
+      `settings.COMBAT_DEFEND_TIMEOUT` seconds,
+    * resolves every action queued since the last tick in one batch,
+    * moves on to the next fighter once the turn is done.
+
+Only the deadlines at the top of each session's heap are looked at, so
+a tick costs little more than the actions it resolves.
+
+`stats()` reports active fights, turns taken, mean turn latency (time
+from the start of a turn to its end), timeouts and tick cost.
+
+Call `install()` once at server start (see `at_server_start`).
+"""
+from time import time
+from django.conf import settings
+from evennia import TICKER_HANDLER
+from evennia.utils import logger
+from world import combat, rules
+
+
+class TurnScheduler(object):
+    """Drives the turns of all running fights."""
+    def __init__(self):
+        self.turns = 0
+        self.turn_time = 0.0  # Total seconds of all finished turns
+        self.timeouts = {'turn': 0, 'defend': 0}
+        self.resolved = 0
+        self.ticks = 0
+        self.tick_time = 0.0  # Total seconds spent in tick()
+
+    def tick(self):
+        """Advance every running fight."""
+        now = time()
+        for session in combat.sessions():
+            try:
+                self._advance(session, now)
+            except Exception:
+                logger.log_trace('Turn tick failed in {}.'.format(session.room))
+        self.ticks += 1
+        self.tick_time += time() - now
+
+    def _advance(self, session, now):
+        """Expire deadlines, resolve queued actions and end the turn if done."""
+        for kind, obj in session.expired(now):
+            self.timeouts[kind] += 1
+            if kind == 'turn':
+                self._auto_pass(session, obj)
+            else:
+                self._auto_defend(obj)
+        self.resolved += session.resolve_pending()
+        if session.turn_done():
+            self.turns += 1
+            self.turn_time += now - (session.turn_started or now)
+            session.next_turn()
+
+    @staticmethod
+    def _auto_pass(session, obj):
+        """Pass for a fighter whose turn timed out."""
+        state = session.state[obj]
+        state.last_action = 'pass'
+        state.actions = state.moves = 0
+        state.second = None
+        session.room.msg_contents("%s hesitates too long. |222[Pass]|n" % obj)
+        session.record('pass', fighter=rules.ref(obj), timeout=True)
+
+    @staticmethod
+    def _auto_defend(obj):
+        """Defend for a fighter who did not answer an attack in time."""
+        rules.defend_queue(obj, 'defend', [])
+
+    def stats(self):
+        """
+        Returns:
+            stats (dict): active fights, turns, mean turn latency and mean
+                tick cost in seconds, timeouts by kind and actions resolved.
+        """
+        return {'fights': len(combat.sessions()),
+                'turns': self.turns,
+                'turn_latency': self.turn_time / self.turns if self.turns else 0.0,
+                'timeouts': dict(self.timeouts),
+                'resolved': self.resolved,
+                'tick_cost': self.tick_time / self.ticks if self.ticks else 0.0}
+
+
+TURN_SCHEDULER = TurnScheduler()
+
+
+def tick(*args, **kwargs):
+    """Ticker callback running `TURN_SCHEDULER.tick()`."""
+    TURN_SCHEDULER.tick()
+
+
+def install():
+    """Start ticking the turn scheduler."""
+    TICKER_HANDLER.add(interval=settings.COMBAT_TICK_INTERVAL, callback=tick,
+                       idstring='combat_turns', persistent=False)